@@ -0,0 +1,261 @@
+"""gzip/brotli response compression.
+
+`CompressionMiddleware` negotiates Accept-Encoding (br > gzip), skips small
+bodies (COMPRESSION_MIN_SIZE, default 1 KiB), already-encoded responses,
+SSE and binary formats, and runs the compressor on a worker thread for
+anything large so the event loop stays free. Streaming responses (NDJSON /
+CSV exports) are compressed chunk by chunk with a sync flush, so they still
+arrive progressively.
+
+`PrecompressedCache` keeps cached response bodies together with their gzip and
+brotli variants, computed once when the entry is stored; offshore clients on
+VSAT links get the compressed bytes with no per-request CPU cost. A miss is
+rebuilt by one request per key (the others wait for it), and a body computed
+before a `clear()` is not stored. The variants are built on the request path,
+so they use moderate settings (COMPRESSION_CACHE_GZIP_LEVEL, 6;
+COMPRESSION_CACHE_BROTLI_QUALITY, 5): brotli 11 costs over a second on the
+full computer list.
+
+brotli is optional: without it only gzip is offered.
+"""
+
+import gzip
+import importlib.util
+import os
+import threading
+import time
+import zlib
+import logging
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+HAS_BROTLI = importlib.util.find_spec('brotli') is not None
+if HAS_BROTLI:
+    import brotli
+
+MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+CACHE_GZIP_LEVEL = int(os.getenv('COMPRESSION_CACHE_GZIP_LEVEL', '6'))
+CACHE_BROTLI_QUALITY = int(os.getenv('COMPRESSION_CACHE_BROTLI_QUALITY', '5'))
+# Bodies/chunks above this size are compressed on a worker thread
+OFFLOAD_SIZE = 16 * 1024
+
+_SKIP_CONTENT_TYPES = (
+    'text/event-stream', 'image/', 'video/', 'audio/', 'application/zip', 'application/gzip',
+    'application/vnd.openxmlformats', 'application/pdf', 'application/octet-stream',
+)
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding the client accepts ('br', 'gzip') or None."""
+    accepted = {}
+    for part in (accept_encoding or '').lower().split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token] = q
+    if HAS_BROTLI and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, quality=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY if quality is None else quality)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL if quality is None else quality, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.encoding == 'br':
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._c.finish()
+        return self._c.flush()
+
+
+async def _maybe_offload(func, data):
+    if len(data) >= OFFLOAD_SIZE:
+        return await anyio.to_thread.run_sync(func, data)
+    return func(data)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding'))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressionResponder(encoding, self.minimum_size, send).send)
+
+
+class _CompressionResponder:
+    def __init__(self, encoding, minimum_size, send):
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._send = send
+        self.start = None
+        self.passthrough = False
+        self.stream = None
+
+    def _should_skip(self, headers):
+        if 'content-encoding' in headers:
+            return True
+        content_type = headers.get('content-type', '').lower()
+        return any(content_type.startswith(t) for t in _SKIP_CONTENT_TYPES)
+
+    def _encoded_headers(self, length=None):
+        headers = MutableHeaders(raw=self.start['headers'])
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        if length is None:
+            if 'content-length' in headers:
+                del headers['content-length']
+        else:
+            headers['Content-Length'] = str(length)
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            self.passthrough = self._should_skip(Headers(raw=message['headers']))
+            if self.passthrough:
+                await self._send(message)
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.stream is None and not more_body:
+            # Whole body in one message (JSONResponse & co)
+            if len(body) < self.minimum_size:
+                await self._send(self.start)
+                await self._send(message)
+                return
+            compressed = await _maybe_offload(lambda data: compress(data, self.encoding), body)
+            self._encoded_headers(len(compressed))
+            await self._send(self.start)
+            await self._send({'type': 'http.response.body', 'body': compressed})
+            return
+
+        if self.stream is None:
+            # Streaming response: compress chunk by chunk, flushing so clients see progress
+            self.stream = _StreamCompressor(self.encoding)
+            self._encoded_headers()
+            await self._send(self.start)
+
+        data = await _maybe_offload(self.stream.chunk, body) if body else b''
+        if not more_body:
+            data += self.stream.finish()
+        await self._send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+
+class PrecompressedEntry:
+    __slots__ = ('body', 'variants', 'media_type', 'expires_at')
+
+    def __init__(self, body, media_type, ttl):
+        self.body = body
+        self.media_type = media_type
+        self.expires_at = time.monotonic() + ttl
+        self.variants = {}
+        if len(body) >= MIN_SIZE:
+            self.variants['gzip'] = compress(body, 'gzip', quality=CACHE_GZIP_LEVEL)
+            if HAS_BROTLI:
+                self.variants['br'] = compress(body, 'br', quality=CACHE_BROTLI_QUALITY)
+
+    def response(self, request):
+        encoding = choose_encoding(request.headers.get('accept-encoding'))
+        headers = {'Vary': 'Accept-Encoding'}
+        if encoding in self.variants:
+            headers['Content-Encoding'] = encoding
+            return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class PrecompressedCache:
+    """Small TTL cache of serialised responses with their compressed variants."""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._building = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    def put(self, key, body, media_type='application/json', generation=None):
+        """Store and return the entry.
+
+        With `generation` (from `generation()` taken before reading the data),
+        an entry built before a later `clear()` is returned but not stored.
+        """
+        entry = PrecompressedEntry(body, media_type, self.ttl)
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._entries[key] = entry
+        return entry
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def get_or_build(self, key, build, media_type='application/json'):
+        """Cached entry for `key`, or `build()` it; concurrent misses wait for one build."""
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            generation = self.generation()
+            try:
+                return self.put(key, build(), media_type, generation=generation)
+            finally:
+                with self._lock:
+                    if self._building.get(key) is building:
+                        del self._building[key]
+
+    def clear(self, *_):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
@@ -0,0 +1,50 @@
+"""Offload blocking I/O (pyodbc, ldap3, WinRM) out of the event loop.
+
+Async routes must not call blocking drivers directly: one slow query would
+freeze every other request on the worker. `run_blocking` runs the call on a
+dedicated, bounded thread pool (BLOCKING_IO_THREADS, default 16) so database
+stalls cannot starve the default executor used by FastAPI for sync routes.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_blocking_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                size = max(1, int(os.getenv('BLOCKING_IO_THREADS', '16')))
+                _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='blocking-io')
+                logger.info(f'Blocking I/O pool started with {size} threads')
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Await `func(*args, **kwargs)` executed on the blocking I/O pool.
+
+    The caller's context is copied into the worker thread so per-request state
+    (e.g. the metrics sub-timers) follows the call.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def shutdown_blocking_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
@@ -1,11 +1,15 @@
 """Connection adapters for SQL, AD and external services.
 This module will try to reuse the global instances defined in `backend.app` when
 available. It also exposes a helper function `test_all_connections()` which
-performs lightweight checks and returns a status dictionary. The FastAPI
-startup event calls that helper and prints results to the console.
+performs lightweight checks and returns a status dictionary. The debug route
+runs that helper in a background thread (`start_connection_tests()`) and
+serves the last cached result via `get_connection_statuses()`; continuous
+dependency health lives in `managers.health`.
 """
 
 import logging
+import threading
+from datetime import datetime
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -164,3 +168,45 @@ def test_all_connections() -> Dict[str, Any]:
         statuses['sync_service'] = {'available': False, 'error': str(e)}
 
     return statuses
+
+
+# ─── Cached background checks ──────────────────────────────────────────────────
+_status_lock = threading.Lock()
+_last_statuses: Dict[str, Any] = {}
+_last_checked_at = None
+_check_thread = None
+
+
+def _run_connection_tests():
+    global _last_statuses, _last_checked_at
+    try:
+        statuses = test_all_connections()
+    except Exception as e:
+        statuses = {'error': str(e)}
+    with _status_lock:
+        _last_statuses = statuses
+        _last_checked_at = datetime.now()
+    logger.info('Connection status summary:')
+    for k, v in statuses.items():
+        logger.info(f' - {k}: {v}')
+
+
+def start_connection_tests() -> bool:
+    """Run `test_all_connections()` in a daemon thread (no-op if one is running)."""
+    global _check_thread
+    with _status_lock:
+        if _check_thread and _check_thread.is_alive():
+            return False
+        _check_thread = threading.Thread(target=_run_connection_tests, name='connection-tests', daemon=True)
+        _check_thread.start()
+    return True
+
+
+def get_connection_statuses() -> Dict[str, Any]:
+    """Last cached result of the background connection tests."""
+    with _status_lock:
+        return {
+            'checked_at': _last_checked_at.isoformat() if _last_checked_at else None,
+            'running': bool(_check_thread and _check_thread.is_alive()),
+            'statuses': dict(_last_statuses),
+        }
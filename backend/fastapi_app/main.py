@@ -1,6 +1,7 @@
 import sys
 import os
 import importlib
+import importlib.util
 
 # --- FIX PARA AMBIENTE DE SERVIÇO (NSSM) ---
 # Garante que o Python encontre a pasta 'backend' e 'fastapi_app'
@@ -22,7 +23,18 @@ from .routes import computers_router, warranty_router, dhcp_router, sync_router,
 from .routes.notifications import router as notifications_router
 from .routes.warranty_jobs import router as warranty_jobs_router
 from .routes.funcionarios import funcionarios_router
-from .connections import test_all_connections
+from .routes.events import events_router
+from .routes.dashboard import dashboard_router
+from .routes.health import health_router
+from .routes.metrics import metrics_router
+from .managers.health import health_prober
+from .managers.coordination import leader_elector
+from .managers.logon_refresher import lastlogon_refresher
+from .managers.dhcp_filters import dhcp_filter_store
+from .managers.dashboard_stats import dashboard_stats
+from .concurrency import shutdown_blocking_executor
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware
 from .routes.debug_routes import debug_router
 
 app = FastAPI(title="AD Inventory FastAPI",
@@ -31,7 +43,8 @@ app = FastAPI(title="AD Inventory FastAPI",
 
 @app.get("/")
 async def root():
-    return {"message": "AD Inventory API is running", "status": "healthy"}
+    # Status vem do snapshot em cache do health_prober (sem tocar nas dependências)
+    return {"message": "AD Inventory API is running", "status": health_prober.snapshot()['status']}
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +54,10 @@ app.add_middleware(
     allow_headers=settings.CORS_HEADERS,
     max_age=settings.CORS_MAX_AGE,
 )
+# gzip/br for anything over COMPRESSION_MIN_SIZE (SSE and binary exports pass through)
+app.add_middleware(CompressionMiddleware)
+# Outermost: latência por rota + tempo em SQL/LDAP/WinRM/Dell, exposto em /metrics
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(computers_router, prefix="/api/computers")
 app.include_router(warranty_router, prefix="/api")
@@ -49,6 +66,10 @@ app.include_router(sync_router, prefix="/api")
 app.include_router(notifications_router, prefix="/api")
 app.include_router(warranty_jobs_router, prefix="/api")
 app.include_router(funcionarios_router, prefix="/api/funcionarios")
+app.include_router(events_router, prefix="/api/events")
+app.include_router(dashboard_router, prefix="/api/dashboard")
+app.include_router(health_router, prefix="/health")
+app.include_router(metrics_router, prefix="/metrics")
 app.include_router(debug_router, prefix="/api/debug")
 app.include_router(mobiles_router, prefix="/api/mobiles")
 app.include_router(iphone_catalog_router, prefix="/api/iphone-catalog")
@@ -59,29 +80,31 @@ register_exception_handlers(app)
 async def startup_event():
     # Removidos emojis para evitar UnicodeEncodeError no Windows Service
     print("FastAPI startup event")
-    try:
-        statuses = test_all_connections()
-        print("Connection status summary:")
-        for k, v in statuses.items():
-            print(f" - {k}: {v}")
-    except Exception as e:
-        print(f"Error during connection tests at startup: {e}")
-
-    try:
-        # Tenta importar o módulo legacy
-        mod = importlib.import_module('backend.app')
-
-        from . import connections as _connections
-        if getattr(mod, 'dhcp_manager', None) and getattr(_connections, 'dhcp_manager', None) is None:
-            _connections.dhcp_manager = getattr(mod, 'dhcp_manager')
-            print('Loaded dhcp_manager from backend.app')
-            
-        if getattr(mod, 'sync_service', None) and getattr(_connections, 'sync_service', None) is None:
-            _connections.sync_service = getattr(mod, 'sync_service')
-            print('Loaded sync_service from backend.app')
-    except Exception as e:
-        # Caractere 'i' comum no lugar do emoji para evitar erro de encoding
-        print(f"(i) Could not import legacy backend.app managers: {e}")
+    # Sondas de SQL, LDAP, Dell, WinRM e CorporeRM rodam em background;
+    # /health/* e / leem só o snapshot em cache
+    health_prober.start()
+    # Eleição do líder dos agendadores (lease no SQL) para rodar com vários workers
+    leader_elector.start()
+    # Snapshots dos filtros DHCP: o líder baixa via WinRM, os demais releem do SQL
+    dhcp_filter_store.start()
+    # Primeiro snapshot do dashboard calculado fora da requisição
+    dashboard_stats.start()
+
+    from . import connections as _connections
+    if (_connections.dhcp_manager is None or _connections.sync_service is None) \
+            and importlib.util.find_spec('backend.app') is not None:
+        try:
+            # Tenta importar o módulo legacy só quando faltar algum manager local
+            mod = importlib.import_module('backend.app')
+            if getattr(mod, 'dhcp_manager', None) and _connections.dhcp_manager is None:
+                _connections.dhcp_manager = getattr(mod, 'dhcp_manager')
+                print('Loaded dhcp_manager from backend.app')
+            if getattr(mod, 'sync_service', None) and _connections.sync_service is None:
+                _connections.sync_service = getattr(mod, 'sync_service')
+                print('Loaded sync_service from backend.app')
+        except Exception as e:
+            # Caractere 'i' comum no lugar do emoji para evitar erro de encoding
+            print(f"(i) Could not import legacy backend.app managers: {e}")
 
     try:
         from .managers.user_detect_service import user_detect_scheduler
@@ -99,6 +122,12 @@ async def shutdown_event():
         user_detect_scheduler.stop()
     except Exception:
         pass
+    health_prober.stop()
+    leader_elector.stop()
+    dhcp_filter_store.stop()
+    dashboard_stats.stop()
+    lastlogon_refresher.shutdown()
+    shutdown_blocking_executor()
 
 
 if __name__ == "__main__":
@@ -1,91 +1,196 @@
-from ldap3 import Server, Connection, ALL, SUBTREE, MODIFY_REPLACE, MODIFY_DELETE
+from ldap3 import SUBTREE, MODIFY_REPLACE, MODIFY_DELETE
+from ldap3.core.exceptions import LDAPCommunicationError
+from ldap3.utils.conv import escape_filter_chars
 import logging
+import os
 import subprocess
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import timezone
-from ..config import AD_SERVER, AD_USERNAME, AD_PASSWORD, AD_BASE_DN
+from ..config import AD_BASE_DN
+from ..metrics import timed, timer, registry
+from .ldap_pool import ldap_pool
 
 logger = logging.getLogger(__name__)
 
-
-class ADComputerManager:
-    def __init__(self):
-        self.server = Server(AD_SERVER, get_info=ALL)
-        self.connection = None
-
-    def connect(self):
+_COMPUTER_ATTRIBUTES = [
+    'cn', 'distinguishedName', 'userAccountControl', 'description',
+    'operatingSystem', 'operatingSystemVersion', 'lastLogonTimestamp', 'lastLogon'
+]
+
+
+def _sanitize_description(desc):
+    s = str(desc)
+    # Remove nulls and C0 control characters that commonly trigger invalidAttributeSyntax
+    s = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F]", "", s)
+    # Trim to AD description practical limit
+    if len(s) > 1024:
+        s = s[:1024]
+    return s
+
+
+class ComputerLookupCache:
+    """Cache LRU com TTL dos resultados de `find_computer`, por nome (sem diferenciar maiúsculas).
+
+    Buscas simultâneas do mesmo computador esperam a que já está indo ao DC.
+    `invalidate` avança uma época, então uma busca que começou antes de uma
+    escrita nossa não grava no cache o valor antigo.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = float(ttl if ttl is not None else os.getenv('AD_COMPUTER_CACHE_SECONDS', '60'))
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv('AD_COMPUTER_CACHE_SIZE', '2048'))
+        self._entries = OrderedDict()     # nome -> (expira_em, resultado)
+        self._inflight = {}               # nome -> threading.Event
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, computer_name, loader):
+        key = computer_name.lower()
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    registry.inc('ad_computer_cache_requests_total', result='hit')
+                    return dict(entry[1])
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = self._inflight[key] = threading.Event()
+                    epoch = self._epoch
+                    break
+            # Outra thread já está buscando: espera e relê o cache (ou assume a busca se ela falhou)
+            waiter.wait(30)
+
+        registry.inc('ad_computer_cache_requests_total', result='miss')
         try:
-            self.connection = Connection(self.server, user=AD_USERNAME, password=AD_PASSWORD, auto_bind=True)
-            logger.info('Connected to AD')
-            return True
-        except Exception:
-            logger.exception('AD connect failed')
-            return False
+            result = loader()
+            with self._lock:
+                if self.ttl > 0 and epoch == self._epoch:
+                    self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.set()
+
+    @property
+    def epoch(self):
+        return self._epoch
+
+    def peek(self, computer_name):
+        """Resultado em cache (cópia) ou None, sem ir ao DC."""
+        with self._lock:
+            entry = self._entries.get(computer_name.lower())
+            if entry and entry[0] > time.monotonic():
+                registry.inc('ad_computer_cache_requests_total', result='hit')
+                return dict(entry[1])
+        return None
+
+    def put(self, computer_name, result, epoch=None):
+        """Guarda um resultado obtido fora de `get_or_load` (ex.: busca em lote).
+
+        Com `epoch`, ignora o valor se houve invalidação desde que a busca começou.
+        """
+        with self._lock:
+            if self.ttl <= 0 or (epoch is not None and epoch != self._epoch):
+                return
+            key = computer_name.lower()
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, computer_name=None):
+        with self._lock:
+            self._epoch += 1
+            if computer_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(computer_name.lower(), None)
 
-    def disconnect(self):
-        if self.connection:
-            try:
-                self.connection.unbind()
-            except Exception:
-                pass
-            self.connection = None
+    def __len__(self):
+        return len(self._entries)
 
-    def find_computer(self, computer_name):
-        if not self.connect():
-            raise Exception('Falha na conexão com Active Directory')
 
+class ADComputerManager:
+    """Leitura e alteração de objetos computador no AD.
+
+    Cada operação usa uma única conexão do `ldap_pool`: a busca e o modify
+    acontecem na mesma sessão, reaproveitando o DN encontrado. Leituras passam
+    pelo `ComputerLookupCache` (AD_COMPUTER_CACHE_SECONDS, 60); nossas
+    escritas invalidam o computador alterado.
+    """
+
+    def __init__(self, pool=None, cache=None):
+        self.pool = pool or ldap_pool
+        self.cache = cache or ComputerLookupCache()
+        self.lookup_chunk_size = max(1, int(os.getenv('AD_LOOKUP_CHUNK_SIZE', '200')))
+
+    def find_computer(self, computer_name, use_cache=True):
+        if not use_cache:
+            return self._lookup(computer_name)
+        return self.cache.get_or_load(computer_name, lambda: self._lookup(computer_name))
+
+    @timed('ldap')
+    def _lookup(self, computer_name):
         try:
-            search_filter = f"(&(objectClass=computer)(|(cn={computer_name})(sAMAccountName={computer_name}$)))"
-            self.connection.search(search_base=AD_BASE_DN, search_filter=search_filter, search_scope=SUBTREE, attributes=[
-                'cn', 'distinguishedName', 'userAccountControl', 'description',
-                'operatingSystem', 'lastLogonTimestamp', 'lastLogon'
-            ])
-
-            if not self.connection.entries:
-                raise Exception(f"Computador '{computer_name}' não encontrado no Active Directory")
-
-            computer = self.connection.entries[0]
-            dn = str(computer.distinguishedName)
-            uac = int(computer.userAccountControl.value) if computer.userAccountControl.value else 0
-            is_disabled = bool(uac & 2)
-
-            # Get the most recent logon timestamp (lastLogonTimestamp is replicated, lastLogon is per-DC)
-            last_logon_ts = None
-            try:
-                ts1 = computer.lastLogonTimestamp.value if hasattr(computer, 'lastLogonTimestamp') and computer.lastLogonTimestamp.value else None
-                ts2 = computer.lastLogon.value if hasattr(computer, 'lastLogon') and computer.lastLogon.value else None
-                # Pick the most recent one
-                if ts1 and ts2:
-                    last_logon_ts = max(ts1, ts2)
-                else:
-                    last_logon_ts = ts1 or ts2
-            except Exception:
-                pass
-
-            return {
-                'name': str(computer.cn),
-                'dn': dn,
-                'userAccountControl': uac,
-                'disabled': is_disabled,
-                'description': str(computer.description) if computer.description else '',
-                'operatingSystem': str(computer.operatingSystem) if computer.operatingSystem else '',
-                'lastLogon': last_logon_ts.replace(tzinfo=timezone.utc).isoformat() if last_logon_ts and last_logon_ts.tzinfo is None else (last_logon_ts.isoformat() if last_logon_ts else None)
-            }
+            return self.pool.run(lambda conn: self._find_computer(conn, computer_name))
         except Exception:
             logger.exception('find_computer failed')
             raise
-        finally:
-            self.disconnect()
 
+    def _find_computer(self, conn, computer_name):
+        search_filter = f"(&(objectClass=computer)(|(cn={computer_name})(sAMAccountName={computer_name}$)))"
+        conn.search(search_base=AD_BASE_DN, search_filter=search_filter, search_scope=SUBTREE, attributes=_COMPUTER_ATTRIBUTES)
+
+        if not conn.entries:
+            raise Exception(f"Computador '{computer_name}' não encontrado no Active Directory")
+
+        return self._entry_to_computer(conn.entries[0])
+
+    @staticmethod
+    def _entry_to_computer(computer):
+        dn = str(computer.distinguishedName)
+        uac = int(computer.userAccountControl.value) if computer.userAccountControl.value else 0
+        is_disabled = bool(uac & 2)
+
+        # Get the most recent logon timestamp (lastLogonTimestamp is replicated, lastLogon is per-DC)
+        last_logon_ts = None
+        try:
+            ts1 = computer.lastLogonTimestamp.value if hasattr(computer, 'lastLogonTimestamp') and computer.lastLogonTimestamp.value else None
+            ts2 = computer.lastLogon.value if hasattr(computer, 'lastLogon') and computer.lastLogon.value else None
+            # Pick the most recent one
+            if ts1 and ts2:
+                last_logon_ts = max(ts1, ts2)
+            else:
+                last_logon_ts = ts1 or ts2
+        except Exception:
+            pass
+
+        return {
+            'name': str(computer.cn),
+            'dn': dn,
+            'userAccountControl': uac,
+            'disabled': is_disabled,
+            'description': str(computer.description) if computer.description else '',
+            'operatingSystem': str(computer.operatingSystem) if computer.operatingSystem else '',
+            'operatingSystemVersion': str(computer.operatingSystemVersion) if computer.operatingSystemVersion else '',
+            'lastLogon': last_logon_ts.replace(tzinfo=timezone.utc).isoformat() if last_logon_ts and last_logon_ts.tzinfo is None else (last_logon_ts.isoformat() if last_logon_ts else None)
+        }
+
+    @timed('ldap')
     def toggle_computer_status(self, computer_name, action):
         if action not in ['enable', 'disable']:
             raise ValueError("Ação deve ser 'enable' ou 'disable'")
 
-        if not self.connect():
-            raise Exception('Falha na conexão com Active Directory')
-
-        try:
-            computer = self.find_computer(computer_name)
+        def _toggle(conn):
+            computer = self._find_computer(conn, computer_name)
             current_uac = computer['userAccountControl']
             is_currently_disabled = computer['disabled']
 
@@ -100,14 +205,11 @@ class ADComputerManager:
             else:
                 new_uac = current_uac & ~2
 
-            # Modify attribute
-            if not self.connect():
-                raise Exception('Falha na reconexão com Active Directory')
-
-            success = self.connection.modify(computer['dn'], {'userAccountControl': [(MODIFY_REPLACE, [str(new_uac)])]})
+            # Same session and DN as the lookup: no extra bind
+            success = conn.modify(computer['dn'], {'userAccountControl': [(MODIFY_REPLACE, [str(new_uac)])]})
 
             if not success:
-                error_info = self.connection.result
+                error_info = conn.result
                 raise Exception(f"Falha na modificação do AD: {error_info.get('description', 'Erro desconhecido')}")
 
             action_text = 'desativado' if action == 'disable' else 'ativado'
@@ -121,11 +223,14 @@ class ADComputerManager:
                     'new_status': {'disabled': action == 'disable', 'userAccountControl': new_uac}
                 }
             }
+
+        try:
+            return self.pool.run(_toggle)
         except Exception:
             logger.exception('toggle_computer_status failed')
             raise
         finally:
-            self.disconnect()
+            self.cache.invalidate(computer_name)
 
     def toggle_computer_status_powershell(self, computer_name, action):
         try:
@@ -154,37 +259,25 @@ class ADComputerManager:
         except Exception:
             logger.exception('toggle_computer_status_powershell failed')
             raise
+        finally:
+            self.cache.invalidate(computer_name)
+    @timed('ldap')
     def set_computer_description(self, computer_name, description):
         if description is None:
             raise ValueError('Descrição não fornecida')
 
-        # Find the computer first (this will connect/disconnect)
-        computer = self.find_computer(computer_name)
+        sanitized = _sanitize_description(description)
 
-        # Reconnect to perform modify
-        if not self.connect():
-            raise Exception('Falha na conexão com Active Directory')
-
-        def _sanitize(desc):
-            s = str(desc)
-            # Remove nulls and C0 control characters that commonly trigger invalidAttributeSyntax
-            s = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F]", "", s)
-            # Trim to AD description practical limit
-            if len(s) > 1024:
-                s = s[:1024]
-            return s
-
-        raw_desc = description
-        sanitized = _sanitize(raw_desc)
-
-        try:
+        def _set(conn):
+            # Lookup and modify share one pooled session; the DN comes from the lookup
+            computer = self._find_computer(conn, computer_name)
             dn = computer.get('dn')
 
             # If sanitized is empty, attempt to delete the attribute instead of setting empty string
             if not sanitized or sanitized.strip() == '':
-                success = self.connection.modify(dn, {'description': [(MODIFY_DELETE, [])]})
+                success = conn.modify(dn, {'description': [(MODIFY_DELETE, [])]})
                 if not success:
-                    error_info = self.connection.result
+                    error_info = conn.result
                     err_text = error_info.get('description', '') if isinstance(error_info, dict) else str(error_info)
                     raise Exception(f"Falha na remoção da descrição no AD: {err_text}")
 
@@ -197,10 +290,10 @@ class ADComputerManager:
                     }
                 }
 
-            success = self.connection.modify(dn, {'description': [(MODIFY_REPLACE, [sanitized])]})
+            success = conn.modify(dn, {'description': [(MODIFY_REPLACE, [sanitized])]})
 
             if not success:
-                error_info = self.connection.result
+                error_info = conn.result
                 err_text = error_info.get('description', '') if isinstance(error_info, dict) else str(error_info)
                 # Try a more aggressive sanitization if we detect attribute syntax problem
                 if 'invalidAttributeSyntax' in err_text or 'invalid attribute syntax' in err_text.lower():
@@ -209,7 +302,7 @@ class ADComputerManager:
                         aggressive = ''.join(ch for ch in sanitized if ord(ch) >= 32 and ord(ch) != 127)
                         if len(aggressive) > 1024:
                             aggressive = aggressive[:1024]
-                        success2 = self.connection.modify(dn, {'description': [(MODIFY_REPLACE, [aggressive])]})
+                        success2 = conn.modify(dn, {'description': [(MODIFY_REPLACE, [aggressive])]})
                         if success2:
                             return {
                                 'success': True,
@@ -232,11 +325,152 @@ class ADComputerManager:
                     'new_description': sanitized
                 }
             }
+
+        try:
+            return self.pool.run(_set)
         except Exception:
             logger.exception('set_computer_description failed')
             raise
         finally:
-            self.disconnect()
+            self.cache.invalidate(computer_name)
+
+    def _search_many(self, conn, names):
+        """Resolve vários computadores com filtros `(|(cn=a)(cn=b)...)`; chave = nome minúsculo.
+
+        Os nomes vão em blocos de AD_LOOKUP_CHUNK_SIZE (200) por filtro, com os
+        valores escapados (RFC 4515), e cada busca segue o cookie de paginação
+        até o fim.
+        """
+        found = {}
+        names = list(dict.fromkeys(n for n in names if n))
+        for i in range(0, len(names), self.lookup_chunk_size):
+            terms = ''.join(f'(cn={escape_filter_chars(n)})' for n in names[i:i + self.lookup_chunk_size])
+            cookie = None
+            while True:
+                conn.search(search_base=AD_BASE_DN, search_filter=f'(&(objectClass=computer)(|{terms}))',
+                            search_scope=SUBTREE, attributes=_COMPUTER_ATTRIBUTES,
+                            paged_size=1000, paged_cookie=cookie)
+                for entry in conn.entries:
+                    computer = self._entry_to_computer(entry)
+                    found[computer['name'].lower()] = computer
+                controls = (conn.result or {}).get('controls') or {}
+                cookie = controls.get('1.2.840.113556.1.4.319', {}).get('value', {}).get('cookie')
+                if not cookie:
+                    break
+        return found
+
+    @timed('ldap')
+    def find_computers(self, names, use_cache=True):
+        """Resolve muitos computadores em poucas buscas; devolve {nome pedido: computador}.
+
+        Nomes ausentes do AD não aparecem no resultado. Com `use_cache`, os que
+        já estão no cache de lookups não vão ao DC, e os resolvidos alimentam o cache.
+        """
+        result, missing = {}, []
+        for name in dict.fromkeys(n for n in names if n):
+            cached = self.cache.peek(name) if use_cache else None
+            if cached is not None:
+                result[name] = cached
+            else:
+                missing.append(name)
+        if not missing:
+            return result
+
+        epoch = self.cache.epoch
+        try:
+            found = self.pool.run(lambda conn: self._search_many(conn, missing))
+        except Exception:
+            logger.exception('find_computers failed')
+            raise
+        if use_cache:
+            registry.inc('ad_computer_cache_requests_total', amount=len(missing), result='miss')
+        for name in missing:
+            computer = found.get(name.lower())
+            if computer is not None:
+                result[name] = computer
+                self.cache.put(name, computer, epoch)
+        return result
+
+    def _apply_operation(self, conn, op, computer):
+        """Aplica um item do bulk (ação e/ou descrição) com um único modify no DN já resolvido."""
+        name = op['name']
+        result = {'name': name, 'success': False}
+        if computer is None:
+            result['error'] = f"Computador '{name}' não encontrado no Active Directory"
+            return result
+
+        changes = {}
+        previous = {'disabled': computer['disabled'], 'description': computer['description']}
+        new_uac = computer['userAccountControl']
+        action = op.get('action')
+        if action:
+            new_uac = new_uac | 2 if action == 'disable' else new_uac & ~2
+            if new_uac != computer['userAccountControl']:
+                changes['userAccountControl'] = [(MODIFY_REPLACE, [str(new_uac)])]
+        description = None
+        if 'description' in op:
+            description = _sanitize_description(op['description'] or '')
+            if description.strip() == '':
+                description = ''
+                if computer['description']:
+                    changes['description'] = [(MODIFY_DELETE, [])]
+            elif description != computer['description']:
+                changes['description'] = [(MODIFY_REPLACE, [description])]
+
+        result.update(dn=computer['dn'], previous=previous)
+        if not changes:
+            result.update(success=True, already_in_desired_state=True)
+            return result
+
+        if not conn.modify(computer['dn'], changes):
+            error_info = conn.result
+            err_text = error_info.get('description', '') if isinstance(error_info, dict) else str(error_info)
+            result['error'] = f"Falha na modificação do AD: {err_text or 'Erro desconhecido'}"
+            return result
+
+        # Mantém o estado resolvido em dia para operações repetidas no mesmo computador
+        if 'userAccountControl' in changes:
+            computer.update(userAccountControl=new_uac, disabled=bool(new_uac & 2))
+        if 'description' in changes:
+            computer['description'] = description
+        result.update(success=True, changed=sorted(changes),
+                      new_status={'disabled': computer['disabled'], 'userAccountControl': computer['userAccountControl'],
+                                  'description': computer['description']})
+        return result
+
+    def bulk_modify(self, operations):
+        """Aplica muitas alterações (enable/disable, descrição) com uma busca e uma conexão do pool.
+
+        `operations` é uma lista de {'name', 'action'?, 'description'?}. Gera um
+        resultado por item, na ordem, à medida que cada modify termina. Se a
+        sessão cair no meio, os itens restantes são refeitos uma vez numa conexão
+        nova (o estado é relido, então repetir é seguro).
+        """
+        pending = list(operations)
+        retried = False
+        try:
+            while pending:
+                try:
+                    with self.pool.connection() as conn:
+                        with timer('ldap'):
+                            found = self._search_many(conn, [op['name'] for op in pending])
+                        while pending:
+                            with timer('ldap'):
+                                result = self._apply_operation(conn, pending[0], found.get(pending[0]['name'].lower()))
+                            pending.pop(0)
+                            yield result
+                except LDAPCommunicationError as e:
+                    if retried:
+                        logger.error(f'bulk_modify: conexão LDAP perdida novamente ({e}); abortando {len(pending)} itens')
+                        for op in pending:
+                            yield {'name': op['name'], 'success': False, 'error': f'Conexão com o AD perdida: {e}'}
+                        return
+                    logger.warning(f'bulk_modify: conexão LDAP perdida ({e}); refazendo bind para {len(pending)} itens')
+                    registry.inc('ldap_pool_retries_total')
+                    retried = True
+        finally:
+            for op in operations:
+                self.cache.invalidate(op['name'])
 
     def set_computer_description_powershell(self, computer_name, description):
         try:
@@ -262,6 +496,8 @@ class ADComputerManager:
         except Exception:
             logger.exception('set_computer_description_powershell failed')
             raise
+        finally:
+            self.cache.invalidate(computer_name)
 
 
 # Singleton
@@ -0,0 +1,291 @@
+"""
+Coordenação entre workers (uvicorn --workers N) via SQL Server.
+
+- `dbo.app_leases`: leases nomeados com expiração. `LeaseManager.try_acquire`
+  é um MERGE com HOLDLOCK, então só um processo ganha; o dono renova antes de
+  expirar e, se morrer, outro assume após LEASE_TTL_SECONDS.
+- `leader_elector`: heartbeat que mantém o lease "scheduler-leader". Os
+  agendadores (detecção de usuários, sync em background, recálculo periódico
+  do dashboard) só rodam no líder, então N workers não duplicam varreduras.
+- `dbo.app_jobs`: estado central dos jobs (garantias, detecção em massa).
+  Cada worker mantém o job em memória enquanto roda e grava um snapshot JSON
+  aqui (com throttle); qualquer worker responde ao status e pode pedir
+  cancelamento, que o dono recebe na próxima gravação.
+
+COORDINATION_BACKEND=local desliga o SQL (um único processo é sempre líder e
+os jobs ficam só em memória, como antes).
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+INSTANCE_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+_TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+_LEASES_DDL = """
+IF OBJECT_ID('dbo.app_leases', 'U') IS NULL
+    CREATE TABLE dbo.app_leases (
+        name NVARCHAR(100) NOT NULL PRIMARY KEY,
+        holder NVARCHAR(200) NOT NULL,
+        acquired_at DATETIME2 NOT NULL,
+        expires_at DATETIME2 NOT NULL
+    );
+"""
+
+_JOBS_DDL = """
+IF OBJECT_ID('dbo.app_jobs', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.app_jobs (
+        id NVARCHAR(64) NOT NULL PRIMARY KEY,
+        kind NVARCHAR(50) NOT NULL,
+        status NVARCHAR(20) NOT NULL,
+        owner NVARCHAR(200) NOT NULL,
+        state NVARCHAR(MAX) NULL,
+        cancel_requested BIT NOT NULL DEFAULT 0,
+        created_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+        updated_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+    );
+    CREATE INDEX IX_app_jobs_kind_status ON dbo.app_jobs (kind, status) INCLUDE (updated_at);
+END
+"""
+
+
+def _backend():
+    return os.getenv('COORDINATION_BACKEND', 'sql').lower()
+
+
+class LeaseManager:
+    def __init__(self, holder=INSTANCE_ID):
+        self.holder = holder
+        self._ready = False
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        from . import sql_manager
+        sql_manager.execute_query(_LEASES_DDL, fetch=False)
+        self._ready = True
+
+    def try_acquire(self, name, ttl_seconds):
+        """Pega (ou renova) o lease se estiver livre, expirado ou já for nosso."""
+        if _backend() == 'local':
+            return True
+        from . import sql_manager
+
+        self._ensure_table()
+        rows = sql_manager.execute_query("""
+            MERGE dbo.app_leases WITH (HOLDLOCK) AS t
+            USING (SELECT ? AS name) AS s ON t.name = s.name
+            WHEN MATCHED AND (t.holder = ? OR t.expires_at < SYSUTCDATETIME()) THEN
+                UPDATE SET acquired_at = CASE WHEN t.holder = ? THEN t.acquired_at ELSE SYSUTCDATETIME() END,
+                           holder = ?,
+                           expires_at = DATEADD(second, ?, SYSUTCDATETIME())
+            WHEN NOT MATCHED THEN
+                INSERT (name, holder, acquired_at, expires_at)
+                VALUES (?, ?, SYSUTCDATETIME(), DATEADD(second, ?, SYSUTCDATETIME()));
+        """, params=(name, self.holder, self.holder, self.holder, int(ttl_seconds),
+                     name, self.holder, int(ttl_seconds)), fetch=False)
+        return rows == 1
+
+    def release(self, name):
+        if _backend() == 'local':
+            return
+        from . import sql_manager
+
+        self._ensure_table()
+        sql_manager.execute_query("DELETE FROM dbo.app_leases WHERE name = ? AND holder = ?",
+                                  params=(name, self.holder), fetch=False)
+
+    def holder_of(self, name):
+        if _backend() == 'local':
+            return self.holder
+        from . import sql_manager
+
+        self._ensure_table()
+        rows = sql_manager.execute_query(
+            "SELECT holder FROM dbo.app_leases WHERE name = ? AND expires_at >= SYSUTCDATETIME()", params=(name,))
+        return rows[0]['holder'] if rows else None
+
+
+class LeaderElector:
+    """Mantém o lease de líder dos agendadores renovado em background."""
+
+    LEASE_NAME = 'scheduler-leader'
+
+    def __init__(self, leases):
+        self.leases = leases
+        self.ttl = float(os.getenv('LEASE_TTL_SECONDS', '60'))
+        self._is_leader = False
+        self._decided = threading.Event()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self):
+        if _backend() == 'local':
+            return True
+        self.start()
+        return self._is_leader
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='leader-elector', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._is_leader:
+            try:
+                self.leases.release(self.LEASE_NAME)
+            except Exception:
+                logger.debug('Falha ao liberar lease de líder', exc_info=True)
+        self._is_leader = False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                leader = self.leases.try_acquire(self.LEASE_NAME, self.ttl)
+            except Exception as e:
+                logger.warning(f'Falha ao renovar lease de líder: {e}')
+                leader = False
+            if leader != self._is_leader:
+                logger.info(f"{INSTANCE_ID} {'assumiu' if leader else 'perdeu'} a liderança dos agendadores")
+            self._is_leader = leader
+            self._decided.set()
+            # Renova com folga: 3 tentativas antes do lease expirar
+            self._stop.wait(self.ttl / 3)
+
+    def wait_for_decision(self, timeout=5.0):
+        """Bloqueia até a primeira tentativa de eleição (útil no início dos loops)."""
+        if _backend() == 'local':
+            return True
+        self.start()
+        self._decided.wait(timeout)
+        return self._is_leader
+
+
+class JobStore:
+    """Snapshot central dos jobs em `dbo.app_jobs`; o estado vivo continua no worker dono."""
+
+    def __init__(self, owner=INSTANCE_ID):
+        self.owner = owner
+        self.flush_seconds = float(os.getenv('JOB_STATE_FLUSH_SECONDS', '2'))
+        # Jobs ativos sem atualização há mais que isso são considerados órfãos (worker morreu)
+        self.stale_seconds = float(os.getenv('JOB_STATE_STALE_SECONDS', '300'))
+        self._ready = False
+        self._last_flush = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return _backend() != 'local'
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        from . import sql_manager
+        sql_manager.execute_query(_JOBS_DDL, fetch=False)
+        self._ready = True
+
+    def save(self, job_id, kind, state, force=False):
+        """Grava o snapshot (throttle de JOB_STATE_FLUSH_SECONDS, exceto estados finais).
+
+        Retorna True se outro worker pediu cancelamento do job. Falhas de SQL
+        não derrubam o job: só são registradas.
+        """
+        if not self.enabled:
+            return False
+        status = state.get('status') or 'pending'
+        now = time.monotonic()
+        with self._lock:
+            if not force and status not in _TERMINAL_STATUSES and \
+                    now - self._last_flush.get(job_id, 0) < self.flush_seconds:
+                return False
+            self._last_flush[job_id] = now
+            if status in _TERMINAL_STATUSES:
+                self._last_flush.pop(job_id, None)
+        try:
+            from . import sql_manager
+
+            self._ensure_table()
+            rows = sql_manager.execute_query("""
+                MERGE dbo.app_jobs WITH (HOLDLOCK) AS t
+                USING (SELECT ? AS id) AS s ON t.id = s.id
+                WHEN MATCHED THEN
+                    UPDATE SET status = ?, state = ?, owner = ?, updated_at = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (id, kind, status, owner, state) VALUES (?, ?, ?, ?, ?)
+                OUTPUT inserted.cancel_requested;
+            """, params=(job_id, status, json.dumps(state, default=str), self.owner,
+                         job_id, kind, status, self.owner, json.dumps(state, default=str)))
+            return bool(rows and rows[0].get('cancel_requested'))
+        except Exception as e:
+            logger.warning(f'Falha ao gravar estado do job {job_id}: {e}')
+            return False
+
+    def _row_to_job(self, row):
+        job = json.loads(row['state']) if row.get('state') else {}
+        job.setdefault('id', row['id'])
+        job['status'] = row['status']
+        job['owner'] = row['owner']
+        job['cancel_requested'] = bool(row.get('cancel_requested'))
+        job['stale'] = row['status'] not in _TERMINAL_STATUSES and (row.get('age_seconds') or 0) > self.stale_seconds
+        return job
+
+    def get(self, job_id, kind):
+        if not self.enabled:
+            return None
+        from . import sql_manager
+
+        self._ensure_table()
+        rows = sql_manager.execute_query("""
+            SELECT id, status, owner, state, cancel_requested,
+                   DATEDIFF(second, updated_at, SYSUTCDATETIME()) AS age_seconds
+            FROM dbo.app_jobs WHERE id = ? AND kind = ?
+        """, params=(job_id, kind))
+        return self._row_to_job(rows[0]) if rows else None
+
+    def list_active(self, kind):
+        """Jobs não finalizados e não órfãos do tipo `kind`, de todos os workers."""
+        if not self.enabled:
+            return []
+        from . import sql_manager
+
+        self._ensure_table()
+        rows = sql_manager.execute_query("""
+            SELECT id, status, owner, state, cancel_requested,
+                   DATEDIFF(second, updated_at, SYSUTCDATETIME()) AS age_seconds
+            FROM dbo.app_jobs
+            WHERE kind = ? AND status NOT IN ('completed', 'failed', 'cancelled')
+        """, params=(kind,))
+        return [j for j in (self._row_to_job(r) for r in rows) if not j['stale']]
+
+    def request_cancel(self, job_id):
+        """Marca o pedido de cancelamento; o worker dono o recebe no próximo save()."""
+        if not self.enabled:
+            return False
+        from . import sql_manager
+
+        self._ensure_table()
+        return sql_manager.execute_query(
+            "UPDATE dbo.app_jobs SET cancel_requested = 1 WHERE id = ? AND status NOT IN ('completed', 'failed', 'cancelled')",
+            params=(job_id,), fetch=False) > 0
+
+
+# Singletons
+leases = LeaseManager()
+leader_elector = LeaderElector(leases)
+job_store = JobStore()
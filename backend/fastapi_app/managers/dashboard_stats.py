@@ -0,0 +1,242 @@
+"""
+Agregados do dashboard materializados em `dbo.dashboard_stats`.
+
+A tabela guarda uma linha por (métrica, bucket): total, habilitados, OU por
+prefixo do nome, sistema operacional, status de garantia, faixas de último
+login e inventário (spare / em uso). O recálculo é um único batch set-based no
+SQL Server; ele roda em background quando algum escritor (sync, garantias,
+detecção de usuários, vincular/desvincular) marca os dados como sujos, com
+debounce, e o líder recalcula pelo menos a cada DASHBOARD_STATS_MAX_AGE_SECONDS
+porque as faixas de último login dependem do relógio. Os outros workers
+consultam só o MAX(refreshed_at) a cada DASHBOARD_STATS_POLL_SECONDS e releem a
+tabela quando ele muda. A rota só lê o snapshot em memória; o
+primeiro snapshot é carregado (ou calculado) em background no startup, e até
+ele ficar pronto a rota responde zeros com `refreshing: true`.
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# OU derivada do prefixo do nome, igual ao getOUFromComputerName do frontend
+_OU_CASE = """
+    CASE
+        WHEN LEFT(c.name, 3) = 'SHQ' THEN 'ONSHORE'
+        WHEN LEFT(c.name, 3) = 'CLO' THEN 'CLOUD'
+        WHEN LEFT(c.name, 3) IN ('DIA', 'ONI', 'TOP', 'JAD', 'ESM', 'RUB') THEN LEFT(c.name, 3)
+        ELSE 'ONSHORE'
+    END
+"""
+
+# Mesmas faixas do getLastLoginStatus do frontend
+_LAST_LOGIN_CASE = """
+    CASE
+        WHEN c.last_logon_timestamp IS NULL THEN 'never'
+        WHEN DATEDIFF(day, c.last_logon_timestamp, GETDATE()) <= 7 THEN 'recent'
+        WHEN DATEDIFF(day, c.last_logon_timestamp, GETDATE()) <= 30 THEN 'moderate'
+        WHEN DATEDIFF(day, c.last_logon_timestamp, GETDATE()) <= 90 THEN 'old'
+        ELSE 'possible_removal'
+    END
+"""
+
+REFRESH_SQL = f"""
+SET NOCOUNT ON;
+IF OBJECT_ID('dbo.dashboard_stats', 'U') IS NULL
+    CREATE TABLE dbo.dashboard_stats (
+        metric NVARCHAR(50) NOT NULL,
+        bucket NVARCHAR(255) NOT NULL,
+        value INT NOT NULL,
+        refreshed_at DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT PK_dashboard_stats PRIMARY KEY (metric, bucket)
+    );
+
+BEGIN TRAN;
+DELETE FROM dbo.dashboard_stats;
+
+INSERT INTO dbo.dashboard_stats (metric, bucket, value)
+SELECT 'total', 'all', COUNT(*) FROM computers c WHERE c.is_domain_controller = 0
+UNION ALL
+SELECT 'enabled', CASE WHEN c.is_enabled = 1 THEN 'enabled' ELSE 'disabled' END, COUNT(*)
+FROM computers c WHERE c.is_domain_controller = 0
+GROUP BY CASE WHEN c.is_enabled = 1 THEN 'enabled' ELSE 'disabled' END
+UNION ALL
+SELECT 'ou', {_OU_CASE}, COUNT(*)
+FROM computers c WHERE c.is_domain_controller = 0
+GROUP BY {_OU_CASE}
+UNION ALL
+SELECT 'os', COALESCE(os.name, 'N/A'), COUNT(*)
+FROM computers c LEFT JOIN operating_systems os ON c.operating_system_id = os.id
+WHERE c.is_domain_controller = 0
+GROUP BY COALESCE(os.name, 'N/A')
+UNION ALL
+SELECT 'last_login', {_LAST_LOGIN_CASE}, COUNT(*)
+FROM computers c WHERE c.is_domain_controller = 0
+GROUP BY {_LAST_LOGIN_CASE}
+UNION ALL
+SELECT 'inventory',
+       CASE WHEN c.Status = 'spare' THEN 'spare' WHEN c.Status = 'Em uso' THEN 'in_use' ELSE 'other' END,
+       COUNT(*)
+FROM computers c WHERE c.is_domain_controller = 0
+GROUP BY CASE WHEN c.Status = 'spare' THEN 'spare' WHEN c.Status = 'Em uso' THEN 'in_use' ELSE 'other' END;
+
+IF OBJECT_ID('dbo.dell_warranty', 'U') IS NOT NULL
+    INSERT INTO dbo.dashboard_stats (metric, bucket, value)
+    SELECT 'warranty', COALESCE(dw.warranty_status, 'Unknown'), COUNT(*)
+    FROM computers c LEFT JOIN dell_warranty dw ON c.id = dw.computer_id
+    WHERE c.is_domain_controller = 0
+    GROUP BY COALESCE(dw.warranty_status, 'Unknown');
+
+COMMIT;
+"""
+
+
+def _build_stats(rows, refreshed_at):
+    """Converte as linhas (metric, bucket, value) no formato usado pelo Dashboard.jsx."""
+    metrics = {}
+    for r in rows:
+        metrics.setdefault(r['metric'], {})[r['bucket']] = r['value']
+
+    last_login = metrics.get('last_login', {})
+    by_desc = lambda d: sorted(({'name': k, 'value': v} for k, v in d.items()), key=lambda x: -x['value'])
+    return {
+        'totalComputers': metrics.get('total', {}).get('all', 0),
+        'recentLogins': last_login.get('recent', 0),
+        'inactiveComputers': last_login.get('old', 0) + last_login.get('possible_removal', 0) + last_login.get('never', 0),
+        'osDistribution': by_desc(metrics.get('os', {})),
+        'ouDistribution': by_desc(metrics.get('ou', {})),
+        'warrantyDistribution': by_desc(metrics.get('warranty', {})),
+        'lastLoginBuckets': {k: last_login.get(k, 0) for k in ('recent', 'moderate', 'old', 'possible_removal', 'never')},
+        'enabledComputers': metrics.get('enabled', {}).get('enabled', 0),
+        'disabledComputers': metrics.get('enabled', {}).get('disabled', 0),
+        'inventory': {k: metrics.get('inventory', {}).get(k, 0) for k in ('spare', 'in_use', 'other')},
+        'refreshedAt': refreshed_at.isoformat() if refreshed_at else None,
+    }
+
+
+class DashboardStatsService:
+    def __init__(self):
+        self.debounce_seconds = float(os.getenv('DASHBOARD_STATS_DEBOUNCE_SECONDS', '30'))
+        self.max_age_seconds = float(os.getenv('DASHBOARD_STATS_MAX_AGE_SECONDS', '3600'))
+        self.poll_seconds = float(os.getenv('DASHBOARD_STATS_POLL_SECONDS', str(self.debounce_seconds)))
+        self._stats = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def mark_dirty(self, *_):
+        """Chamado pelos escritores; barato, o recálculo acontece no background."""
+        self._dirty.set()
+        self._ensure_worker()
+
+    def start(self):
+        """Sobe o worker, que já carrega o primeiro snapshot (chamado no startup)."""
+        self._ensure_worker()
+
+    def stop(self):
+        self._stop.set()
+        self._dirty.set()
+
+    def _ensure_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker, name='dashboard-stats', daemon=True)
+            self._thread.start()
+
+    def _is_stale(self):
+        refreshed_at = self._refreshed_at
+        return refreshed_at is None or (datetime.now() - refreshed_at).total_seconds() > self.max_age_seconds
+
+    def _initial_load(self):
+        """Snapshot da tabela; recalcula se ela não existe, está vazia ou velha demais."""
+        try:
+            self._load()
+        except Exception:
+            pass
+        if self._is_stale():
+            self.refresh()
+
+    def _reload_if_changed(self):
+        """Lê só o MAX(refreshed_at) (uma linha) e relê a tabela se outro worker recalculou."""
+        from . import sql_manager
+
+        rows = sql_manager.execute_query("SELECT MAX(refreshed_at) AS refreshed_at FROM dbo.dashboard_stats")
+        latest = rows[0]['refreshed_at'] if rows else None
+        if latest is not None and latest != self._refreshed_at:
+            self._load()
+
+    def _worker(self):
+        try:
+            self._initial_load()
+        except Exception:
+            logger.exception('Falha ao carregar dashboard_stats')
+        while not self._stop.is_set():
+            woke = self._dirty.wait(timeout=self.poll_seconds)
+            if woke:
+                # Agrupa rajadas de escrita (ex.: sync de milhares de máquinas) num único recálculo
+                self._stop.wait(self.debounce_seconds)
+            if self._stop.is_set():
+                return
+            self._dirty.clear()
+            try:
+                from .coordination import leader_elector
+                # Escritas deste worker recalculam aqui; o recálculo por idade fica com
+                # o líder e os demais workers só acompanham o refreshed_at da tabela
+                if woke or (leader_elector.is_leader and self._is_stale()):
+                    self.refresh()
+                else:
+                    self._reload_if_changed()
+            except Exception:
+                logger.exception('Falha ao recalcular dashboard_stats')
+
+    def refresh(self):
+        """Recalcula a tabela de agregados e atualiza o snapshot em memória."""
+        from . import sql_manager
+
+        t0 = time.time()
+        sql_manager.execute_query(REFRESH_SQL, fetch=False)
+        stats = self._load()
+        logger.info(f'📊 dashboard_stats recalculado em {time.time() - t0:.2f}s')
+        return stats
+
+    def _load(self):
+        from . import sql_manager
+
+        rows = sql_manager.execute_query("SELECT metric, bucket, value, refreshed_at FROM dbo.dashboard_stats")
+        refreshed_at = max((r['refreshed_at'] for r in rows if r.get('refreshed_at')), default=None)
+        stats = _build_stats(rows, refreshed_at)
+        with self._lock:
+            self._stats = stats
+            self._refreshed_at = refreshed_at
+        return stats
+
+    def get_stats(self):
+        """Snapshot atual, sem esperar o SQL; antes do primeiro, zeros com `refreshing: true`."""
+        self._ensure_worker()
+        with self._lock:
+            stats = self._stats
+        if stats is not None:
+            return stats
+        return dict(_build_stats([], None), refreshing=True)
+
+
+# Singleton
+dashboard_stats = DashboardStatsService()
+
+
+def _register_listeners():
+    from .event_bus import event_bus
+
+    event_bus.listen(dashboard_stats.mark_dirty, {'sync', 'warranty', 'detect'})
+
+
+_register_listeners()
@@ -0,0 +1,244 @@
+"""
+Escolha do controlador de domínio para as conexões LDAP.
+
+AD_SERVERS (lista separada por vírgula; padrão: AD_SERVER) define os DCs.
+Para cada um guardamos a latência de bind/probe (média móvel exponencial,
+LDAP_DC_EWMA_ALPHA) e as falhas seguidas. Com LDAP_DC_BREAKER_FAILURES (3)
+falhas seguidas o circuito do DC abre por LDAP_DC_BREAKER_SECONDS (60): ele
+sai da escolha até passar o prazo, quando recebe uma tentativa de teste.
+
+`ordered()` devolve os DCs disponíveis do mais rápido para o mais lento.
+`bind()` corre o bind nos LDAP_DC_RACE (2) melhores candidatos ao mesmo tempo
+e fica com a primeira resposta; as outras conexões são descartadas, mas a
+latência delas também entra na conta. (O `ServerPool` do ldap3 faz o failover
+mas não diz qual DC falhou nem quanto demorou, por isso a escolha é feita aqui.)
+"""
+
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ldap3 import Server, Connection, ALL
+
+from ..metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class _DCState:
+    __slots__ = ('host', 'server', 'latency', 'failures', 'open_until', 'last_error', 'last_ok')
+
+    def __init__(self, host, server):
+        self.host = host
+        self.server = server
+        self.latency = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self.last_ok = None
+
+
+class DCSelector:
+    def __init__(self, hosts=None):
+        self._hosts = hosts
+        self.alpha = float(os.getenv('LDAP_DC_EWMA_ALPHA', '0.3'))
+        self.breaker_failures = max(1, int(os.getenv('LDAP_DC_BREAKER_FAILURES', '3')))
+        self.breaker_seconds = float(os.getenv('LDAP_DC_BREAKER_SECONDS', '60'))
+        self.race = max(1, int(os.getenv('LDAP_DC_RACE', '2')))
+        self.connect_timeout = int(os.getenv('LDAP_CONNECT_TIMEOUT', '10'))
+        self._states = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._probe_executor = None
+        self._probing = set()
+
+    def _load(self):
+        if self._states is None:
+            with self._lock:
+                if self._states is None:
+                    hosts = self._hosts
+                    if hosts is None:
+                        configured = os.getenv('AD_SERVERS', '')
+                        hosts = [h.strip() for h in configured.split(',') if h.strip()]
+                        if not hosts:
+                            from ..config import AD_SERVER
+                            hosts = [AD_SERVER]
+                    self._states = {h: _DCState(h, Server(h, get_info=ALL, connect_timeout=self.connect_timeout))
+                                    for h in hosts}
+        return self._states
+
+    @property
+    def hosts(self):
+        return list(self._load())
+
+    def record_success(self, host, latency):
+        state = self._load().get(host)
+        if state is None:
+            return
+        with self._lock:
+            state.latency = latency if state.latency is None else \
+                self.alpha * latency + (1 - self.alpha) * state.latency
+            if state.open_until:
+                logger.info(f'DC {host} voltou a responder; circuito fechado')
+            state.failures = 0
+            state.open_until = 0.0
+            state.last_ok = time.time()
+
+    def record_failure(self, host, error=None):
+        state = self._load().get(host)
+        if state is None:
+            return
+        registry.inc('ldap_dc_failures_total', server=host)
+        with self._lock:
+            state.failures += 1
+            state.last_error = str(error) if error else 'falha'
+            if state.failures >= self.breaker_failures:
+                if not state.open_until or state.open_until <= time.monotonic():
+                    logger.warning(f'DC {host} com {state.failures} falhas seguidas; fora da escolha por {self.breaker_seconds:.0f}s')
+                state.open_until = time.monotonic() + self.breaker_seconds
+
+    def is_available(self, host):
+        state = self._load().get(host)
+        return state is not None and state.open_until <= time.monotonic()
+
+    def ordered(self):
+        """DCs com circuito fechado (ou com o prazo vencido), do mais rápido ao mais lento.
+
+        Sem medição ainda, o DC mantém a posição de AD_SERVERS. Se todos estão
+        com o circuito aberto, devolve todos (melhor tentar do que falhar direto).
+        """
+        states = list(self._load().values())
+        now = time.monotonic()
+        with self._lock:
+            available = [s for s in states if s.open_until <= now] or states
+            rank = {s.host: i for i, s in enumerate(states)}
+            available.sort(key=lambda s: (s.latency is None, s.latency or 0.0, rank[s.host]))
+        return [s.host for s in available]
+
+    def host_of(self, conn):
+        """DC (como configurado em AD_SERVERS) ao qual a conexão está ligada."""
+        for state in self._load().values():
+            if state.server is conn.server:
+                return state.host
+        return None
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=max(2, self.race * 2), thread_name_prefix='ldap-dc')
+        return self._executor
+
+    def _get_probe_executor(self):
+        # Separado do executor de bind: DCs lentos na sonda não atrasam os binds das rotas
+        if self._probe_executor is None:
+            size = max(2, len(self._load()))
+            with self._lock:
+                if self._probe_executor is None:
+                    self._probe_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='ldap-dc-probe')
+        return self._probe_executor
+
+    def _try_bind(self, host, user, password, receive_timeout):
+        t0 = time.perf_counter()
+        try:
+            conn = Connection(self._load()[host].server, user=user, password=password,
+                              auto_bind=True, receive_timeout=receive_timeout)
+        except Exception as e:
+            self.record_failure(host, e)
+            raise
+        self.record_success(host, time.perf_counter() - t0)
+        return conn
+
+    def bind(self, user, password, receive_timeout=60):
+        """Conexão autenticada no DC que responder primeiro entre os melhores candidatos."""
+        candidates = self.ordered()
+        last_error = None
+        while candidates:
+            batch, candidates = candidates[:self.race], candidates[self.race:]
+            if len(batch) == 1:
+                try:
+                    conn = self._try_bind(batch[0], user, password, receive_timeout)
+                    registry.inc('ldap_dc_binds_total', server=batch[0])
+                    return conn
+                except Exception as e:
+                    last_error = e
+                    continue
+            futures = {self._get_executor().submit(self._try_bind, h, user, password, receive_timeout): h for h in batch}
+            pending = set(futures)
+            winner = None
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        last_error = future.exception()
+                    elif winner is None:
+                        winner = future
+                    else:
+                        _discard(future.result())
+            for future in pending:
+                # Perdedores ainda em andamento: a latência é registrada e a conexão fechada ao terminar
+                future.add_done_callback(lambda f: f.exception() is None and _discard(f.result()))
+            if winner is not None:
+                registry.inc('ldap_dc_binds_total', server=futures[winner])
+                return winner.result()
+        raise last_error or RuntimeError('Nenhum controlador de domínio configurado')
+
+    def probe(self, user, password, timeout=10):
+        """Bind em todos os DCs ao mesmo tempo (inclusive com circuito aberto) para atualizar as métricas.
+
+        Chamado periodicamente pelo health prober. Volta assim que um DC responde
+        ou quando `timeout` segundos se passam, o que vier antes; as outras
+        sondas terminam em background e também entram na conta. Um DC cuja
+        sonda anterior ainda não terminou não recebe outra.
+        Devolve (DC que respondeu ou None, estado por DC).
+        """
+        executor = self._get_probe_executor()
+        futures = {}
+        for host in self.hosts:
+            with self._lock:
+                if host in self._probing:
+                    continue
+                self._probing.add(host)
+            future = executor.submit(self._try_bind, host, user, password, timeout)
+            future.add_done_callback(lambda f, host=host: self._probe_done(host, f))
+            futures[future] = host
+
+        deadline = time.monotonic() + timeout
+        pending = set(futures)
+        answered = None
+        while pending and answered is None:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            answered = next((futures[f] for f in done if f.exception() is None), None)
+        return answered, self.snapshot()
+
+    def _probe_done(self, host, future):
+        with self._lock:
+            self._probing.discard(host)
+        if future.exception() is None:
+            _discard(future.result())
+
+    def snapshot(self):
+        states = list(self._load().values())
+        now = time.monotonic()
+        with self._lock:
+            return {s.host: {
+                'available': s.open_until <= now,
+                'latency_ms': round(s.latency * 1000, 1) if s.latency is not None else None,
+                'consecutive_failures': s.failures,
+                'last_error': s.last_error,
+            } for s in states}
+
+
+def _discard(conn):
+    try:
+        conn.unbind()
+    except Exception:
+        pass
+
+
+# Singleton
+dc_selector = DCSelector()
@@ -2,6 +2,8 @@ import requests
 from datetime import datetime, timedelta, timezone
 import logging
 from ..config import DELL_CLIENT_ID, DELL_CLIENT_SECRET
+from .lazy import LazyManager
+from ..metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,7 @@ class DellWarrantyAPI:
         self.token = None
         self.token_expires_at = None
 
+    @timed('dell')
     def get_access_token(self):
         try:
             url = f"{self.base_url}/auth/oauth/v2/token"
@@ -58,6 +61,7 @@ class DellWarrantyAPI:
                 
         return service_tag
 
+    @timed('dell')
     def get_warranty_info(self, service_tag):
         if not service_tag or len(service_tag.strip()) < 4:
             return {'error': 'Service tag inválido', 'code': 'INVALID_SERVICE_TAG'}
@@ -161,9 +165,9 @@ class DellWarrantyManager:
     
     def __init__(self):
         self.dell_api = DellWarrantyAPI()
-        # Import here to avoid circular imports
-        from .sql import SQLManager
-        self.sql_manager = SQLManager()
+        # Import here to avoid circular imports; reuse the shared singleton
+        from .sql import sql_manager
+        self.sql_manager = sql_manager
         
     def get_warranty_info_with_database_save(self, service_tag, force_api=False):
         """
@@ -303,4 +307,4 @@ class DellWarrantyManager:
         return await loop.run_in_executor(None, self.get_warranty_info_with_database_save, service_tag)
 
 
-dell_warranty_manager = DellWarrantyManager()
+dell_warranty_manager = LazyManager(DellWarrantyManager, 'dell_warranty_manager')
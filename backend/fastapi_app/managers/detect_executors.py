@@ -0,0 +1,216 @@
+"""
+Executores de comando usados pela detecção de usuário logado.
+
+`LocalExecutor` roda os comandos de verdade (ping / query user / PsExec) e
+funciona tanto no Windows quanto no Linux. `SimulatedExecutor` reproduz saídas
+gravadas de quser/PsExec com latência e falhas configuráveis, para rodar e
+medir o pipeline de detecção sem rede (CI, benchmarks).
+
+Seleção via env USER_DETECT_EXECUTOR=local|simulated (padrão: local).
+"""
+
+import json
+import os
+import random
+import signal
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+IS_WINDOWS = os.name == 'nt'
+
+
+class LocalExecutor:
+    """Roda processos locais com kill da árvore inteira em caso de timeout."""
+
+    name = 'local'
+
+    def _popen_kwargs(self):
+        if IS_WINDOWS:
+            return {'creationflags': subprocess.CREATE_NO_WINDOW}
+        # Grupo de processos próprio para conseguir matar os filhos no timeout
+        return {'start_new_session': True}
+
+    def _kill_tree(self, proc):
+        try:
+            if IS_WINDOWS:
+                subprocess.run(
+                    ['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                    capture_output=True, timeout=5,
+                    creationflags=subprocess.CREATE_NO_WINDOW
+                )
+            else:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except Exception:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def run(self, args, timeout=8):
+        """Retorna (stdout, stderr, returncode) ou (None, None, 'TIMEOUT'|'NOT_FOUND'|erro)."""
+        proc = None
+        try:
+            proc = subprocess.Popen(
+                args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, **self._popen_kwargs()
+            )
+            stdout, stderr = proc.communicate(timeout=timeout)
+            return (stdout or '', stderr or '', proc.returncode)
+        except subprocess.TimeoutExpired:
+            if proc:
+                self._kill_tree(proc)
+            return (None, None, 'TIMEOUT')
+        except FileNotFoundError:
+            return (None, None, 'NOT_FOUND')
+        except Exception as e:
+            if proc:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+            return (None, None, str(e))
+
+    def ping(self, computer_name, timeout_ms=1500):
+        if IS_WINDOWS:
+            args = ['ping', '-n', '1', '-w', str(timeout_ms), computer_name]
+        else:
+            args = ['ping', '-c', '1', '-W', str(max(1, round(timeout_ms / 1000))), computer_name]
+        try:
+            r = subprocess.run(args, capture_output=True, timeout=4, **self._popen_kwargs())
+            return r.returncode == 0
+        except Exception:
+            return False
+
+
+class SimulatedExecutor:
+    """Reproduz saídas gravadas de quser/PsExec sem tocar na rede.
+
+    `recordings` mapeia hostname -> {'online': bool, 'query_user': {...},
+    'psexec': {...}}, onde cada comando tem stdout/stderr/rc. Hosts sem
+    gravação recebem uma sessão ativa sintética. `latency_ms`/`jitter_ms`
+    atrasam cada comando; `offline_rate`, `error_rate` e `timeout_rate`
+    sorteiam falhas (timeouts dormem o timeout do comando, como o real).
+    """
+
+    name = 'simulated'
+
+    def __init__(self, recordings=None, latency_ms=50, jitter_ms=0,
+                 offline_rate=0.0, error_rate=0.0, timeout_rate=0.0, seed=None):
+        self.recordings = {k.upper(): v for k, v in (recordings or {}).items()}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.offline_rate = offline_rate
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls):
+        recordings = None
+        path = os.getenv('USER_DETECT_SIM_FILE')
+        if path:
+            with open(path, encoding='utf-8') as f:
+                recordings = json.load(f)
+        seed = os.getenv('USER_DETECT_SIM_SEED')
+        return cls(
+            recordings=recordings,
+            latency_ms=float(os.getenv('USER_DETECT_SIM_LATENCY_MS', '50')),
+            jitter_ms=float(os.getenv('USER_DETECT_SIM_JITTER_MS', '0')),
+            offline_rate=float(os.getenv('USER_DETECT_SIM_OFFLINE_RATE', '0')),
+            error_rate=float(os.getenv('USER_DETECT_SIM_ERROR_RATE', '0')),
+            timeout_rate=float(os.getenv('USER_DETECT_SIM_TIMEOUT_RATE', '0')),
+            seed=int(seed) if seed else None,
+        )
+
+    def _random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _sleep(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._random() * self.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    @staticmethod
+    def _synthetic_quser(computer_name):
+        user = f'user.{computer_name.lower()}'
+        return (
+            ' USERNAME              SESSIONNAME        ID  STATE   IDLE TIME  LOGON TIME\n'
+            f'>{user:<21} console             1  Active      none   1/6/2026 8:01 AM\n'
+        )
+
+    @staticmethod
+    def _target(args):
+        """Extrai (comando, host) dos argumentos de query user / PsExec."""
+        for a in args:
+            if a.lower().startswith('/server:'):
+                return 'query_user', a.split(':', 1)[1]
+            if a.startswith('\\\\'):
+                return 'psexec', a.lstrip('\\')
+        return None, None
+
+    def run(self, args, timeout=8):
+        self.calls += 1
+        command, host = self._target(args)
+        self._sleep()
+        if command is None:
+            return (None, None, 'NOT_FOUND')
+
+        roll = self._random()
+        if roll < self.timeout_rate:
+            time.sleep(timeout)
+            return (None, None, 'TIMEOUT')
+        if roll < self.timeout_rate + self.error_rate:
+            return ('', 'Error 5: Access is denied.', 1)
+
+        recorded = self.recordings.get(host.upper(), {}).get(command)
+        if recorded is None:
+            if command == 'psexec' or host.upper() in self.recordings:
+                return ('', 'No User exists for *', 1)
+            return (self._synthetic_quser(host), '', 0)
+        rc = recorded.get('rc', 0)
+        if isinstance(rc, str):
+            return (None, None, rc)
+        return (recorded.get('stdout', ''), recorded.get('stderr', ''), rc)
+
+    def ping(self, computer_name, timeout_ms=1500):
+        self._sleep()
+        recorded = self.recordings.get(computer_name.upper())
+        if recorded is not None and 'online' in recorded:
+            return bool(recorded['online'])
+        return self._random() >= self.offline_rate
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Executor ativo, criado na primeira chamada conforme USER_DETECT_EXECUTOR."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                kind = os.getenv('USER_DETECT_EXECUTOR', 'local').strip().lower()
+                if kind == 'simulated':
+                    _executor = SimulatedExecutor.from_env()
+                    logger.info('[detect-users] Usando executor simulado')
+                else:
+                    _executor = LocalExecutor()
+    return _executor
+
+
+def set_executor(executor):
+    """Troca o executor (testes e benchmarks). Retorna o anterior."""
+    global _executor
+    with _executor_lock:
+        previous, _executor = _executor, executor
+    return previous
@@ -1,11 +1,30 @@
-from pypsrp.client import Client
+import contextvars
+import json
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
 from ..config import AD_USERNAME, AD_PASSWORD
+from .lazy import LazyManager
+from ..metrics import timed
 
 logger = logging.getLogger(__name__)
 
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor():
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                size = max(1, int(os.getenv('DHCP_SEARCH_THREADS', '12')))
+                _search_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='dhcp-search')
+    return _search_executor
+
 
 class DHCPManager:
     """Simplified DHCP manager extracted from legacy app.py."""
@@ -43,7 +62,11 @@ class DHCPManager:
     def get_organization_from_prefix(self, prefix):
         return self.prefix_to_org.get(prefix.upper(), prefix.upper())
 
+    @timed('winrm')
     def testar_conexao_servidor(self, servidor):
+        # pypsrp custa ~0.2s para importar; só carrega quando o DHCP é usado
+        from pypsrp.client import Client
+
         try:
             client = Client(
                 server=servidor,
@@ -64,6 +87,42 @@ class DHCPManager:
             logger.warning(f"Falha ao conectar em {servidor}: {str(e)[:100]}")
             return None
 
+    @timed('winrm')
+    def listar_filtros_servidor(self, servidor):
+        """Lista completa de filtros (Allow e Deny) do servidor, numa única chamada WinRM."""
+        client = self.testar_conexao_servidor(servidor)
+        if not client:
+            raise ConnectionError(f'Não foi possível conectar em {servidor}')
+
+        script = """
+        $filters = @(Get-DhcpServerv4Filter | Select-Object MacAddress, Description, @{n='List';e={"$($_.List)"}})
+        ConvertTo-Json -InputObject $filters -Compress
+        """
+        output, streams, had_errors = client.execute_ps(script)
+        if had_errors:
+            raise RuntimeError('; '.join(str(error) for error in streams.error))
+        data = json.loads(output) if output and output.strip() else []
+        if isinstance(data, dict):
+            data = [data]
+        return [{
+            'mac_address': f.get('MacAddress') or '',
+            'description': f.get('Description') or '',
+            'filter_type': f.get('List') or 'Allow',
+        } for f in data]
+
+    def service_tag_patterns(self, service_tag):
+        """Padrões usados para casar a service tag na descrição (com e sem prefixo do navio)."""
+        patterns = [service_tag]
+        for prefixo in self.prefixos:
+            patterns.extend([
+                f"{prefixo}-{service_tag}",
+                f"{prefixo}_{service_tag}",
+                f"{prefixo} {service_tag}",
+                f"{prefixo}{service_tag}",
+            ])
+        return patterns
+
+    @timed('winrm')
     def buscar_service_tag_servidor(self, servidor, service_tag):
         resultado = {'servidor': servidor, 'status': 'erro', 'macs': [], 'erro': None, 'tempo': 0}
         inicio = time.time()
@@ -74,15 +133,7 @@ class DHCPManager:
                 resultado['erro'] = 'Não foi possível conectar'
                 return resultado
 
-            patterns = [service_tag]
-            for prefixo in self.prefixos:
-                patterns.extend([
-                    f"{prefixo}-{service_tag}",
-                    f"{prefixo}_{service_tag}",
-                    f"{prefixo} {service_tag}",
-                    f"{prefixo}{service_tag}",
-                ])
-
+            patterns = self.service_tag_patterns(service_tag)
             patterns_str = "', '".join(patterns)
             script = f"""
             $patterns = @('{patterns_str}')
@@ -137,6 +188,39 @@ class DHCPManager:
             resultado['tempo'] = time.time() - inicio
         return resultado
 
+    def buscar_service_tag_paralelo(self, servidores, service_tag, deadline=None, buscar=None):
+        """Busca em todos os servidores ao mesmo tempo; gera cada resultado assim que ele chega.
+
+        O tempo total fica no do servidor mais lento, e não na soma de todos.
+        Servidores que não responderem dentro de `deadline` segundos
+        (DHCP_SEARCH_DEADLINE_SECONDS, 45) saem com status 'timeout'; a thread
+        deles termina sozinha quando o WinRM desistir. `buscar(servidor, tag)`
+        troca a busca ao vivo (padrão: `buscar_service_tag_servidor`).
+        """
+        deadline = float(deadline or os.getenv('DHCP_SEARCH_DEADLINE_SECONDS', '45'))
+        buscar = buscar or self.buscar_service_tag_servidor
+        servidores = list(dict.fromkeys(servidores))
+        executor = _get_search_executor()
+        # Cada tarefa leva uma cópia do contexto: os sub-timers de métricas seguem a requisição
+        futures = {executor.submit(contextvars.copy_context().run, buscar, s, service_tag): s
+                   for s in servidores}
+        inicio = time.time()
+        pendentes = set(futures)
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                pendentes.discard(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {'servidor': futures[future], 'status': 'erro', 'macs': [], 'erro': str(e),
+                           'tempo': time.time() - inicio}
+        except FuturesTimeout:
+            for future in pendentes:
+                future.cancel()
+                logger.warning(f'DHCP {futures[future]}: sem resposta em {deadline:.0f}s')
+                yield {'servidor': futures[future], 'status': 'timeout', 'macs': [],
+                       'erro': f'Sem resposta em {deadline:.0f}s', 'tempo': time.time() - inicio}
+
 
 # Singleton
-dhcp_manager = DHCPManager()
+dhcp_manager = LazyManager(DHCPManager, 'dhcp_manager')
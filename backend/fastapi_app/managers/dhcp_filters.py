@@ -0,0 +1,351 @@
+"""
+Snapshot local dos filtros DHCP (Allow/Deny) de cada servidor dos navios.
+
+A busca por service tag baixava a lista inteira de filtros via WinRM a cada
+consulta e filtrava no PowerShell (~33 padrões `-like`). Agora cada servidor
+tem um `DHCPFilterIndex` em memória, montado a partir de uma única chamada
+`listar_filtros_servidor`:
+
+- por MAC normalizado (só os dígitos hexadecimais);
+- por service tag normalizada: tokens alfanuméricos da descrição, também sem
+  o prefixo do navio (ESM-ABC1234, ESMABC1234 e ABC1234 caem todos em ABC1234);
+- por trigramas da descrição, para busca por substring (mesma semântica do
+  `-like "*padrão*"` antigo, sem varrer a lista).
+
+O líder dos agendadores atualiza todos os servidores a cada
+DHCP_FILTERS_REFRESH_SECONDS (900) e grava o snapshot em
+`dbo.dhcp_filter_snapshots`; os demais workers só releem a tabela. Um
+snapshot ausente ou mais velho que DHCP_FILTERS_MAX_AGE_SECONDS (3600) é
+atualizado na hora, e `refresh(servidor)` força a atualização de um servidor.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOTS_DDL = """
+IF OBJECT_ID('dbo.dhcp_filter_snapshots', 'U') IS NULL
+    CREATE TABLE dbo.dhcp_filter_snapshots (
+        server NVARCHAR(100) NOT NULL PRIMARY KEY,
+        etag NVARCHAR(64) NOT NULL,
+        fetched_at DATETIME2 NOT NULL,
+        filters NVARCHAR(MAX) NOT NULL
+    );
+"""
+
+_FORCE = object()
+_NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+_NON_HEX = re.compile(r'[^0-9A-F]+')
+
+
+def normalize_mac(mac):
+    return _NON_HEX.sub('', (mac or '').upper())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class DHCPFilterIndex:
+    """Filtros de um servidor num instante, com índices por MAC, service tag e substring."""
+
+    def __init__(self, server, filters, fetched_at, prefixes=()):
+        self.server = server
+        self.filters = filters
+        self.fetched_at = fetched_at
+        payload = json.dumps(filters, sort_keys=True, ensure_ascii=False)
+        self.etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        self._upper = [(f.get('description') or '').upper() for f in filters]
+        self._by_mac = {}
+        self._by_tag = {}
+        self._trigrams = {}
+        for i, f in enumerate(filters):
+            self._by_mac.setdefault(normalize_mac(f.get('mac_address')), []).append(i)
+            desc = self._upper[i]
+            for token in _NON_ALNUM.split(desc):
+                if len(token) < 5:
+                    continue
+                keys = {token}
+                for prefix in prefixes:
+                    if token.startswith(prefix) and len(token) - len(prefix) >= 5:
+                        keys.add(token[len(prefix):])
+                for key in keys:
+                    self._by_tag.setdefault(key, []).append(i)
+            for gram in _trigrams(desc):
+                self._trigrams.setdefault(gram, set()).add(i)
+
+    def __len__(self):
+        return len(self.filters)
+
+    def age_seconds(self):
+        return (datetime.now(timezone.utc) - self.fetched_at).total_seconds()
+
+    def counts(self):
+        allow = sum(1 for f in self.filters if f.get('filter_type') == 'Allow')
+        return {'total': len(self.filters), 'allow_count': allow, 'deny_count': len(self.filters) - allow}
+
+    def _select(self, indexes, filter_type):
+        return [self.filters[i] for i in sorted(set(indexes))
+                if filter_type is None or self.filters[i].get('filter_type') == filter_type]
+
+    def by_mac(self, mac, filter_type=None):
+        return self._select(self._by_mac.get(normalize_mac(mac), ()), filter_type)
+
+    def by_service_tag(self, service_tag, filter_type=None):
+        """Filtros cuja descrição tem a service tag como token (com ou sem prefixo do navio)."""
+        return self._select(self._by_tag.get(_NON_ALNUM.sub('', (service_tag or '').upper()), ()), filter_type)
+
+    def search(self, term, filter_type=None):
+        """Filtros cuja descrição contém `term` (sem diferenciar maiúsculas)."""
+        term = (term or '').upper()
+        if not term:
+            return self._select(range(len(self.filters)), filter_type)
+        if len(term) < 3:
+            candidates = range(len(self.filters))
+        else:
+            sets = sorted((self._trigrams.get(g, set()) for g in _trigrams(term)), key=len)
+            candidates = set.intersection(*sets) if sets else set()
+        return self._select([i for i in candidates if term in self._upper[i]], filter_type)
+
+
+class DHCPFilterStore:
+    def __init__(self, manager=None):
+        self._manager = manager
+        self.refresh_seconds = float(os.getenv('DHCP_FILTERS_REFRESH_SECONDS', '900'))
+        self.max_age_seconds = float(os.getenv('DHCP_FILTERS_MAX_AGE_SECONDS', '3600'))
+        self._indexes = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._server_locks = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._table_ready = False
+
+    @property
+    def manager(self):
+        if self._manager is not None:
+            return self._manager
+        from ..connections import require_dhcp_manager
+        return require_dhcp_manager()
+
+    def _server_lock(self, server):
+        with self._lock:
+            return self._server_locks.setdefault(server, threading.Lock())
+
+    def _build(self, server, filters, fetched_at):
+        return DHCPFilterIndex(server, filters, fetched_at, prefixes=self.manager.prefixos)
+
+    def peek(self, server):
+        """Snapshot em memória (ou None), sem WinRM nem SQL."""
+        with self._lock:
+            return self._indexes.get(server)
+
+    def get(self, server, refresh=False):
+        """Snapshot do servidor; atualiza na hora se pedido, ausente ou velho demais.
+
+        Se a atualização falhar e houver um snapshot anterior, ele é devolvido.
+        """
+        index = self.peek(server)
+        if not refresh and index is not None and index.age_seconds() < self.max_age_seconds:
+            return index
+        try:
+            return self.refresh(server) if refresh else self.refresh(server, seen=index)
+        except Exception:
+            if index is not None:
+                logger.warning(f'DHCP {server}: atualização falhou, usando snapshot de {index.age_seconds():.0f}s', exc_info=True)
+                return index
+            raise
+
+    def refresh(self, server, seen=_FORCE):
+        """Baixa a lista de filtros do servidor e troca o snapshot.
+
+        Chamadas simultâneas para o mesmo servidor esperam a que já está em
+        andamento; com `seen` (o snapshot que o chamador viu, ou None), se outra
+        thread já o trocou nesse meio-tempo, o novo é devolvido sem nova ida ao servidor.
+        """
+        with self._server_lock(server):
+            current = self.peek(server)
+            if seen is not _FORCE and current is not None and current is not seen:
+                return current
+            t0 = time.time()
+            try:
+                filters = self.manager.listar_filtros_servidor(server)
+            except Exception as e:
+                with self._lock:
+                    self._errors[server] = str(e)
+                raise
+            index = self._build(server, filters, datetime.now(timezone.utc))
+            with self._lock:
+                self._indexes[server] = index
+                self._errors.pop(server, None)
+            logger.info(f'DHCP {server}: snapshot com {len(index)} filtros em {time.time() - t0:.1f}s')
+            self._persist(index)
+            return index
+
+    def refresh_all(self, servers=None):
+        servers = list(servers or self.manager.all_servers)
+        with ThreadPoolExecutor(max_workers=max(1, len(servers)), thread_name_prefix='dhcp-filters') as pool:
+            futures = {s: pool.submit(self.refresh, s) for s in servers}
+        failed = [s for s, f in futures.items() if f.exception() is not None]
+        if failed:
+            logger.warning(f'DHCP: falha ao atualizar snapshot de {", ".join(failed)}')
+        return {s: f.exception() is None for s, f in futures.items()}
+
+    def buscar_service_tag(self, servidor, service_tag, refresh=False):
+        """Mesmo resultado de `DHCPManager.buscar_service_tag_servidor`, servido pelo snapshot."""
+        resultado = {'servidor': servidor, 'status': 'erro', 'macs': [], 'erro': None, 'tempo': 0, 'source': 'snapshot'}
+        inicio = time.time()
+        try:
+            index = self.get(servidor, refresh=refresh)
+            patterns = self.manager.service_tag_patterns(service_tag)
+            macs = []
+            for f in index.search(service_tag, filter_type='Allow'):
+                desc = f['description']
+                pattern_encontrado = next((p for p in patterns if p.upper() in desc.upper()), 'sem_prefixo')
+                macs.append({'mac': f['mac_address'], 'description': desc, 'pattern_found': pattern_encontrado,
+                             'server': servidor, 'filter_type': f['filter_type'], 'mac_address': f['mac_address'],
+                             'match_field': 'description', 'name': ''})
+            resultado['macs'] = macs
+            resultado['status'] = 'encontrado' if macs else 'nao_encontrado'
+            resultado['snapshot_at'] = index.fetched_at.isoformat()
+        except Exception as e:
+            resultado['status'] = 'conexao_falhou' if isinstance(e, ConnectionError) else 'erro'
+            resultado['erro'] = str(e)
+        finally:
+            resultado['tempo'] = time.time() - inicio
+        return resultado
+
+    def match_service_tags(self, server, service_tags, refresh=False):
+        """Casa muitas service tags (ou nomes com prefixo do navio) com o snapshot de um servidor.
+
+        Cada tag vira uma consulta ao índice por token, com e sem o prefixo do
+        navio; só as que não casarem caem na busca por substring. Devolve
+        {tag: [filtros]} apenas com as tags encontradas.
+        """
+        index = self.get(server, refresh=refresh)
+        prefixes = self.manager.prefixos
+        found = {}
+        for tag in service_tags:
+            key = _NON_ALNUM.sub('', (tag or '').upper())
+            if len(key) < 5:
+                continue
+            # ESMABC1234 também casa "ESM-ABC1234" e "ABC1234" na descrição
+            bare = next((key[len(p):] for p in prefixes if key.startswith(p) and len(key) - len(p) >= 5), None)
+            matches = index.by_service_tag(key)
+            if bare:
+                seen = {id(f) for f in matches}
+                matches += [f for f in index.by_service_tag(bare) if id(f) not in seen]
+            if not matches:
+                matches = index.search(tag)
+            if matches:
+                found[tag] = matches
+        return found
+
+    def status(self):
+        with self._lock:
+            indexes, errors = dict(self._indexes), dict(self._errors)
+        servers = set(indexes) | set(errors)
+        return {s: {
+            'filters': len(indexes[s]) if s in indexes else None,
+            'fetched_at': indexes[s].fetched_at.isoformat() if s in indexes else None,
+            'etag': indexes[s].etag if s in indexes else None,
+            'error': errors.get(s),
+        } for s in sorted(servers)}
+
+    # ── Persistência (compartilha o snapshot entre workers) ─────────────────
+
+    def _ensure_table(self):
+        if self._table_ready:
+            return
+        from . import sql_manager
+        sql_manager.execute_query(_SNAPSHOTS_DDL, fetch=False)
+        self._table_ready = True
+
+    def _persist(self, index):
+        try:
+            from . import sql_manager
+
+            self._ensure_table()
+            sql_manager.execute_query("""
+                MERGE dbo.dhcp_filter_snapshots WITH (HOLDLOCK) AS t
+                USING (SELECT ? AS server) AS s ON t.server = s.server
+                WHEN MATCHED THEN UPDATE SET etag = ?, fetched_at = ?, filters = ?
+                WHEN NOT MATCHED THEN INSERT (server, etag, fetched_at, filters) VALUES (?, ?, ?, ?);
+            """, params=(index.server, index.etag, index.fetched_at.replace(tzinfo=None), json.dumps(index.filters),
+                         index.server, index.etag, index.fetched_at.replace(tzinfo=None), json.dumps(index.filters)),
+                fetch=False)
+        except Exception as e:
+            logger.warning(f'DHCP {index.server}: falha ao gravar snapshot no SQL: {e}')
+
+    def load_persisted(self):
+        """Carrega da tabela os snapshots mais novos que os da memória."""
+        from . import sql_manager
+
+        self._ensure_table()
+        with self._lock:
+            known = {s: i.etag for s, i in self._indexes.items()}
+        rows = sql_manager.execute_query("SELECT server, etag, fetched_at FROM dbo.dhcp_filter_snapshots")
+        loaded = 0
+        for row in rows:
+            if known.get(row['server']) == row['etag']:
+                continue
+            full = sql_manager.execute_query("SELECT filters FROM dbo.dhcp_filter_snapshots WHERE server = ?",
+                                             params=(row['server'],))
+            if not full:
+                continue
+            fetched_at = row['fetched_at'].replace(tzinfo=timezone.utc)
+            current = self.peek(row['server'])
+            if current is not None and current.fetched_at >= fetched_at:
+                continue
+            index = self._build(row['server'], json.loads(full[0]['filters']), fetched_at)
+            with self._lock:
+                self._indexes[row['server']] = index
+            loaded += 1
+        return loaded
+
+    # ── Atualização em background ───────────────────────────────────────────
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='dhcp-filters', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        try:
+            self.load_persisted()
+        except Exception as e:
+            logger.warning(f'DHCP: snapshots do SQL indisponíveis: {e}')
+        while not self._stop.is_set():
+            try:
+                from .coordination import leader_elector
+
+                if leader_elector.is_leader:
+                    stale = [s for s in self.manager.all_servers
+                             if (self.peek(s) is None or self.peek(s).age_seconds() >= self.refresh_seconds)]
+                    if stale:
+                        self.refresh_all(stale)
+                else:
+                    self.load_persisted()
+            except Exception:
+                logger.exception('DHCP: falha no ciclo de atualização dos snapshots')
+            self._stop.wait(min(self.refresh_seconds, 60))
+
+
+# Singleton
+dhcp_filter_store = DHCPFilterStore()
@@ -0,0 +1,118 @@
+"""
+Barramento de eventos em memória para progresso de jobs (garantias, sync,
+detecção de usuários).
+
+Os publicadores rodam em threads de background; `publish` guarda o evento num
+ring buffer com id crescente e entrega para os assinantes async (SSE) via
+`loop.call_soon_threadsafe`. Clientes que reconectam mandam o último id visto
+(`Last-Event-ID`) e recebem o que ainda estiver no buffer.
+"""
+
+import itertools
+import os
+import threading
+import time
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, loop, topics=None, max_queue=1000):
+        self.loop = loop
+        self.topics = set(topics) if topics else None
+        self.queue = asyncio.Queue()
+        self.max_queue = max_queue
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.topics is None or event['topic'] in self.topics
+
+    def _deliver(self, event):
+        # Roda no loop do assinante
+        if self.queue.qsize() >= self.max_queue:
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    def __init__(self, capacity=None):
+        self.capacity = capacity or int(os.getenv('EVENT_BUS_CAPACITY', '2000'))
+        self._buffer = deque(maxlen=self.capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._listeners = []
+        self.last_id = 0
+
+    def publish(self, topic, data):
+        """Registra um evento e o entrega aos assinantes. Seguro de qualquer thread."""
+        with self._lock:
+            event = {'id': next(self._ids), 'topic': topic, 'ts': time.time(), 'data': data}
+            self._buffer.append(event)
+            self.last_id = event['id']
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+            listeners = [cb for cb, topics in self._listeners if topics is None or topic in topics]
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception(f'Listener de {topic} falhou')
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:
+                # loop já fechado: assinante morto
+                self.unsubscribe(sub)
+        return event
+
+    def events_since(self, last_id, topics=None):
+        """Eventos do buffer com id > last_id e se houve lacuna (buffer já descartou parte)."""
+        with self._lock:
+            events = list(self._buffer)
+            current = self.last_id
+        if last_id is None:
+            return [], False
+        if last_id > current:
+            # id de antes de um restart do processo: reenvia tudo que houver
+            last_id = 0
+        first_id = events[0]['id'] if events else current + 1
+        gap = last_id + 1 < first_id and last_id < current
+        selected = [e for e in events if e['id'] > last_id and (not topics or e['topic'] in topics)]
+        return selected, gap
+
+    def subscribe(self, topics=None):
+        """Cria uma assinatura ligada ao loop atual (chamar de dentro de uma corrotina)."""
+        sub = Subscription(asyncio.get_running_loop(), topics)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def listen(self, callback, topics=None):
+        """Registra um callback síncrono chamado na thread do publicador (deve ser rápido)."""
+        with self._lock:
+            self._listeners.append((callback, set(topics) if topics else None))
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Singleton
+event_bus = EventBus()
+
+
+def publish(topic, data):
+    """Atalho tolerante a falhas para os publicadores (nunca derruba o job)."""
+    try:
+        return event_bus.publish(topic, data)
+    except Exception:
+        logger.exception(f'Falha ao publicar evento {topic}')
+        return None
@@ -0,0 +1,178 @@
+"""
+Status das dependências (SQL, LDAP, Dell, WinRM, CorporeRM) em cache.
+
+Um thread em background sonda todas as dependências em paralelo a cada
+HEALTH_PROBE_INTERVAL_SECONDS, com timeout por sonda
+(HEALTH_PROBE_TIMEOUT_SECONDS) e latência medida. As rotas /health/* só leem
+o snapshot em memória, então o balanceador pode consultar a cada segundo sem
+gerar carga no CLOSQL02 nem nos DCs.
+
+`ready` exige que as dependências críticas (HEALTH_CRITICAL, padrão "sql")
+estejam ok; falhas nas demais deixam o status "degraded".
+"""
+
+import os
+import socket
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _check_sql():
+    from . import sql_manager
+
+    rows = sql_manager.execute_query('SELECT 1 AS ok')
+    if not rows or rows[0].get('ok') != 1:
+        raise RuntimeError('SELECT 1 sem resultado')
+
+
+def _check_ldap():
+    from ..config import AD_USERNAME, AD_PASSWORD
+    from .dc_selector import dc_selector
+
+    # Bind próprio em cada DC (não usa as conexões do pool); de quebra atualiza
+    # latência e circuito de cada um no dc_selector. Basta um DC responder; a
+    # espera fica abaixo do prazo do prober para não virar 'timeout'
+    timeout = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '10')) * 0.9
+    answered, dcs = dc_selector.probe(AD_USERNAME, AD_PASSWORD, timeout=timeout)
+    if answered is None:
+        raise RuntimeError('nenhum controlador de domínio respondeu: ' +
+                           '; '.join(f"{h}: {dc['last_error'] or 'sem resposta'}" for h, dc in dcs.items()))
+
+
+def _check_dell():
+    from .dell import dell_api
+
+    # Token é reaproveitado até expirar, então a sonda normalmente não sai da máquina
+    if not dell_api.ensure_valid_token():
+        raise RuntimeError('token OAuth Dell indisponível')
+
+
+def _check_winrm():
+    # Só o handshake TCP na porta WinRM do DC: abrir uma sessão PowerShell a cada
+    # sonda custaria mais ao DC do que a própria verificação vale
+    server = os.getenv('WINRM_SERVER', 'CLODC02')
+    port = int(os.getenv('WINRM_PORT', '5985'))
+    timeout = int(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '10'))
+    with socket.create_connection((server, port), timeout=timeout):
+        pass
+
+
+def _check_corporerm():
+    from .corpore_db import DatabaseConfig
+
+    conn = DatabaseConfig.get_pyodbc_connection('corporerm')
+    try:
+        conn.cursor().execute('SELECT 1').fetchone()
+    finally:
+        conn.close()
+
+
+CHECKS = {
+    'sql': _check_sql,
+    'ldap': _check_ldap,
+    'dell': _check_dell,
+    'winrm': _check_winrm,
+    'corporerm': _check_corporerm,
+}
+
+
+class HealthProber:
+    def __init__(self, checks=None):
+        self.checks = dict(checks or CHECKS)
+        self.interval = float(os.getenv('HEALTH_PROBE_INTERVAL_SECONDS', '30'))
+        self.timeout = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '10'))
+        self.critical = {c.strip() for c in os.getenv('HEALTH_CRITICAL', 'sql').split(',') if c.strip()}
+        self.started_at = time.time()
+        self._status = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        # Uma thread por dependência: uma sonda travada não atrasa as outras
+        self._executor = ThreadPoolExecutor(max_workers=len(self.checks), thread_name_prefix='health-probe')
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='health-prober', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_probe(self):
+        """Antecipa a próxima rodada (ex.: após falha detectada numa rota)."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.probe_once()
+            except Exception:
+                logger.exception('Falha na rodada de health check')
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+    def _timed(self, name, check):
+        t0 = time.perf_counter()
+        try:
+            check()
+            return {'ok': True, 'latency_ms': round((time.perf_counter() - t0) * 1000, 1)}
+        except Exception as e:
+            return {'ok': False, 'latency_ms': round((time.perf_counter() - t0) * 1000, 1), 'error': str(e)[:200]}
+
+    def probe_once(self):
+        """Roda todas as sondas em paralelo e atualiza o snapshot."""
+        futures = {name: self._executor.submit(self._timed, name, check) for name, check in self.checks.items()}
+        deadline = time.monotonic() + self.timeout
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                results[name] = {'ok': False, 'latency_ms': self.timeout * 1000, 'error': 'timeout'}
+        now = datetime.now().isoformat()
+        for name, result in results.items():
+            result['checked_at'] = now
+            result['critical'] = name in self.critical
+            if not result['ok']:
+                logger.warning(f"Health check {name} falhou: {result.get('error')}")
+        with self._lock:
+            self._status = results
+            self._checked_at = now
+        return results
+
+    def snapshot(self):
+        with self._lock:
+            deps = {k: dict(v) for k, v in self._status.items()}
+            checked_at = self._checked_at
+        if checked_at is None:
+            status, ready = 'starting', False
+        else:
+            ready = all(deps.get(name, {}).get('ok') for name in self.critical)
+            if not ready:
+                status = 'down'
+            elif all(d['ok'] for d in deps.values()):
+                status = 'healthy'
+            else:
+                status = 'degraded'
+        return {
+            'status': status,
+            'ready': ready,
+            'checked_at': checked_at,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'dependencies': deps,
+        }
+
+
+# Singleton
+health_prober = HealthProber()
@@ -0,0 +1,53 @@
+"""Construção preguiçosa dos singletons de manager.
+
+`LazyManager(SQLManager)` se comporta como a instância: o construtor só roda
+no primeiro acesso a um atributo (thread-safe), então importar os módulos de
+manager não abre conexões nem enumera drivers. Atribuições e
+`mock.patch.object` são repassados para a instância real.
+"""
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LazyManager:
+    __slots__ = ('_factory', '_name', '_instance', '_lock')
+
+    def __init__(self, factory, name=None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__name__', 'manager'))
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get(self):
+        instance = object.__getattribute__(self, '_instance')
+        if instance is not None:
+            return instance
+        with object.__getattribute__(self, '_lock'):
+            instance = object.__getattribute__(self, '_instance')
+            if instance is None:
+                name = object.__getattribute__(self, '_name')
+                logger.debug(f'Inicializando {name} no primeiro uso')
+                instance = object.__getattribute__(self, '_factory')()
+                object.__setattr__(self, '_instance', instance)
+        return instance
+
+    @property
+    def is_initialized(self):
+        return object.__getattribute__(self, '_instance') is not None
+
+    def __getattr__(self, attr):
+        return getattr(object.__getattribute__(self, '_get')(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._get(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._get(), attr)
+
+    def __repr__(self):
+        name = object.__getattribute__(self, '_name')
+        state = 'initialized' if self.is_initialized else 'pending'
+        return f'<LazyManager {name} ({state})>'
@@ -0,0 +1,172 @@
+"""
+Pool de conexões ldap3 já autenticadas, compartilhado por ADManager e
+ADComputerManager.
+
+Antes cada busca fazia bind + unbind, e alterações (ativar/desativar,
+descrição) chegavam a três binds. Agora as operações pegam uma conexão do
+pool, fazem busca e modify nela, usando o DN encontrado, e a devolvem. Uma
+conexão só é recriada quando não existe nenhuma livre ou quando a atual morreu.
+
+- LDAP_POOL_SIZE (4): conexões simultâneas no máximo.
+- LDAP_POOL_MAX_IDLE_SECONDS (300): conexões paradas há mais tempo são
+  descartadas (o DC derruba sessões ociosas).
+- LDAP_POOL_CHECK_AFTER_SECONDS (30): conexões ociosas há mais que isso passam
+  por uma busca barata no rootDSE antes de serem reutilizadas.
+- `run(fn)` repete a operação uma vez com uma conexão nova se a primeira
+  falhar por erro de comunicação (sessão encerrada pelo DC, socket caído).
+- Com vários DCs (AD_SERVERS), o bind vai para o mais rápido disponível
+  segundo o `dc_selector`; conexões ociosas de um DC com circuito aberto são
+  descartadas, e falhas de comunicação contam contra o DC da conexão.
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+from ldap3 import Server, Connection, ALL, BASE
+from ldap3.core.exceptions import LDAPCommunicationError
+
+from ..metrics import registry, timer
+from .dc_selector import dc_selector
+
+logger = logging.getLogger(__name__)
+
+
+class LDAPConnectionPool:
+    def __init__(self, server_address=None, user=None, password=None, selector=None):
+        self._server_address = server_address
+        self._user = user
+        self._password = password
+        # Endereço explícito = um único DC, sem seleção; senão AD_SERVERS via dc_selector
+        self.selector = selector or (None if server_address else dc_selector)
+        self.size = max(1, int(os.getenv('LDAP_POOL_SIZE', '4')))
+        self.max_idle = float(os.getenv('LDAP_POOL_MAX_IDLE_SECONDS', '300'))
+        self.check_after = float(os.getenv('LDAP_POOL_CHECK_AFTER_SECONDS', '30'))
+        self.acquire_timeout = float(os.getenv('LDAP_POOL_ACQUIRE_TIMEOUT', '30'))
+        self.connect_timeout = int(os.getenv('LDAP_CONNECT_TIMEOUT', '10'))
+        self.receive_timeout = int(os.getenv('LDAP_RECEIVE_TIMEOUT', '60'))
+        self._server = None
+        self._idle = deque()                      # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _credentials(self):
+        if self._user is None:
+            from ..config import AD_SERVER, AD_USERNAME, AD_PASSWORD
+            self._server_address = self._server_address or AD_SERVER
+            self._user, self._password = AD_USERNAME, AD_PASSWORD
+        return self._server_address, self._user, self._password
+
+    def _get_server(self):
+        if self._server is None:
+            address, _, _ = self._credentials()
+            self._server = Server(address, get_info=ALL, connect_timeout=self.connect_timeout)
+        return self._server
+
+    def _bind(self):
+        _, user, password = self._credentials()
+        with timer('ldap'):
+            if self.selector is not None:
+                conn = self.selector.bind(user, password, receive_timeout=self.receive_timeout)
+            else:
+                conn = Connection(self._get_server(), user=user, password=password, auto_bind=True,
+                                  receive_timeout=self.receive_timeout)
+        registry.inc('ldap_pool_binds_total')
+        return conn
+
+    def _host_of(self, conn):
+        return self.selector.host_of(conn) if self.selector is not None else None
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn, idle_for):
+        if conn.closed or not conn.bound:
+            return False
+        host = self._host_of(conn)
+        if host is not None and not self.selector.is_available(host):
+            # DC saiu da escolha (circuito aberto): reconecta no melhor disponível
+            return False
+        if idle_for < self.check_after:
+            return True
+        t0 = time.perf_counter()
+        try:
+            alive = conn.search('', '(objectClass=*)', search_scope=BASE, attributes=['currentTime'])
+        except Exception as e:
+            alive = False
+            if host is not None:
+                self.selector.record_failure(host, e)
+        if alive and host is not None:
+            self.selector.record_success(host, time.perf_counter() - t0)
+        return alive
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for <= self.max_idle and self._is_alive(conn, idle_for):
+                registry.inc('ldap_pool_reused_total')
+                return conn
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Conexão autenticada exclusiva durante o bloco; devolvida ao pool no final."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError('Pool LDAP esgotado: nenhuma conexão livre')
+        conn = None
+        try:
+            conn = self._take_idle() or self._bind()
+            yield conn
+        except LDAPCommunicationError as e:
+            # Conexão quebrada: não volta para o pool e conta contra o DC
+            if conn is not None:
+                host = self._host_of(conn)
+                if host is not None:
+                    self.selector.record_failure(host, e)
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            self._slots.release()
+
+    def run(self, operation):
+        """Executa `operation(conn)`; repete uma vez com conexão nova se a sessão caiu."""
+        try:
+            with self.connection() as conn:
+                return operation(conn)
+        except LDAPCommunicationError as e:
+            logger.warning(f'Conexão LDAP perdida ({e}); refazendo bind e repetindo a operação')
+            registry.inc('ldap_pool_retries_total')
+            with self.connection() as conn:
+                return operation(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = {'size': self.size, 'idle': len(self._idle)}
+        if self.selector is not None:
+            stats['domain_controllers'] = self.selector.snapshot()
+        return stats
+
+
+# Singleton
+ldap_pool = LDAPConnectionPool()
@@ -0,0 +1,107 @@
+"""
+Atualização do lastLogon vinda do AD fora do caminho da requisição.
+
+A página de detalhes respondia só depois de um bind + busca no DC e do UPDATE
+no SQL. Agora a rota responde direto do SQL e chama `schedule(name)`: se o
+computador foi consultado há menos de LASTLOGON_REFRESH_SECONDS (300), nada é
+feito; se já existe uma atualização em andamento para ele, a nova chamada se
+junta a ela; senão uma tarefa vai para um pool pequeno de threads
+(LASTLOGON_REFRESH_THREADS, 2), para que uma rajada de visualizações não
+ocupe todas as conexões LDAP.
+"""
+
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LastLogonRefresher:
+    def __init__(self, find=None, store=None):
+        self._find = find
+        self._store = store
+        self.window = float(os.getenv('LASTLOGON_REFRESH_SECONDS', '300'))
+        self.threads = max(1, int(os.getenv('LASTLOGON_REFRESH_THREADS', '2')))
+        self.max_entries = int(os.getenv('LASTLOGON_REFRESH_MAX_ENTRIES', '10000'))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+        self._checked = {}      # nome (minúsculo) -> (monotonic, iso UTC da consulta, lastLogon do AD)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='lastlogon')
+        return self._executor
+
+    def _find_computer(self, name):
+        if self._find is not None:
+            return self._find(name)
+        from . import ad_computer_manager
+        return ad_computer_manager.find_computer(name)
+
+    def _update_sql(self, name, last_logon):
+        if self._store is not None:
+            return self._store(name, last_logon)
+        from . import sql_manager
+        return sql_manager.update_last_logon(name, last_logon)
+
+    def status(self, computer_name):
+        """Estado da última consulta ao AD para o computador, sem disparar nada."""
+        key = computer_name.lower()
+        with self._lock:
+            checked = self._checked.get(key)
+            pending = key in self._pending
+        result = {'refreshing': pending, 'checked_at': None, 'ad_last_logon': None, 'fresh': False}
+        if checked:
+            at, checked_at, last_logon = checked
+            result.update(checked_at=checked_at, ad_last_logon=last_logon,
+                          fresh=time.monotonic() - at < self.window)
+        return result
+
+    def schedule(self, computer_name):
+        """Agenda a atualização se o dado estiver vencido; devolve `status()`."""
+        key = computer_name.lower()
+        with self._lock:
+            checked = self._checked.get(key)
+            stale = not checked or time.monotonic() - checked[0] >= self.window
+            if stale and key not in self._pending:
+                self._pending.add(key)
+                self._get_executor().submit(self._refresh, computer_name, key)
+        return self.status(computer_name)
+
+    def _refresh(self, computer_name, key):
+        last_logon = None
+        try:
+            ad_data = self._find_computer(computer_name)
+            last_logon = ad_data.get('lastLogon') if ad_data else None
+            if last_logon:
+                self._update_sql(computer_name, last_logon)
+        except Exception:
+            logger.warning(f'Could not refresh lastLogon from AD for {computer_name}', exc_info=True)
+        finally:
+            # Falhas também contam como consulta: o DC fora não deve ser martelado a cada visualização
+            with self._lock:
+                self._pending.discard(key)
+                self._checked[key] = (time.monotonic(), datetime.now(timezone.utc).isoformat(), last_logon)
+                if len(self._checked) > self.max_entries:
+                    self._prune()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window
+        for name in [n for n, (at, _, _) in self._checked.items() if at < cutoff]:
+            del self._checked[name]
+        while len(self._checked) > self.max_entries:
+            self._checked.pop(next(iter(self._checked)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Singleton
+lastlogon_refresher = LastLogonRefresher()
@@ -4,11 +4,13 @@ Handles authentication and remote PowerShell execution for user detection
 """
 
 import os
+import json
 import logging
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List
 from pypsrp.client import Client
 from pypsrp.exceptions import AuthenticationError, WinRMError
 from dotenv import load_dotenv
+from ..metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +31,18 @@ class PowerShellManager:
         # Connection settings
         self.connection_timeout = int(os.getenv('WINRM_CONNECTION_TIMEOUT', '15'))
         self.operation_timeout = int(os.getenv('WINRM_OPERATION_TIMEOUT', '30'))
-        
+
+        # Bulk detection settings (one script fans out to many hosts)
+        self.bulk_throttle_limit = int(os.getenv('WINRM_BULK_THROTTLE_LIMIT', '32'))
+        self.bulk_host_timeout_ms = int(os.getenv('WINRM_BULK_HOST_TIMEOUT_MS', '15000'))
+
         # Validate configuration
         if not self.admin_password:
             logger.warning("⚠️ WINRM_PASSWORD não configurada no .env")
         
         logger.info(f"🔧 PowerShell Manager configurado - Servidor: {self.primary_dc}, Usuário: {self.admin_username}")
     
+    @timed('winrm')
     def create_client(self, server: str = None) -> Optional[Client]:
         """Create a WinRM client connection to the specified server"""
         target_server = server or self.primary_dc
@@ -75,6 +82,7 @@ class PowerShellManager:
             logger.error(f"❌ Erro geral na conexão WinRM {target_server}: {e}")
             return None
     
+    @timed('winrm')
     def execute_user_detection_script(self, computer_name: str, client: Client = None) -> Dict[str, Any]:
         """Execute PowerShell script to detect current user on a remote computer"""
         
@@ -166,6 +174,153 @@ class PowerShellManager:
                 'computer_name': computer_name
             }
     
+    @timed('winrm')
+    def execute_bulk_user_detection_script(self, computer_names: List[str], client: Client = None,
+                                           throttle_limit: int = None) -> List[Dict[str, Any]]:
+        """Detect current users on many computers with a single remote script.
+
+        The DC resolves every name in AD, then fans out with
+        ``Invoke-Command -ThrottleLimit`` and writes one ``RESULT:{json}`` line
+        per host. Returns one result dict per requested name, in the same shape
+        as ``execute_user_detection_script``.
+        """
+        names = [str(n).strip() for n in (computer_names or []) if n and str(n).strip()]
+        if not names:
+            return []
+
+        if client is None:
+            client = self.create_client()
+            if not client:
+                return [{
+                    'status': 'connection_failed',
+                    'message': 'Could not establish WinRM connection to domain controller',
+                    'computer_name': name
+                } for name in names]
+
+        throttle = int(throttle_limit or self.bulk_throttle_limit)
+        # Names come from our own SQL inventory, but quote defensively for PowerShell
+        names_ps = ', '.join("'" + name.replace("'", "''") + "'" for name in names)
+
+        script = f"""
+        $names = @({names_ps})
+        $targets = @()
+        foreach ($n in $names) {{
+            try {{
+                $computer = Get-ADComputer -Identity $n -Properties OperatingSystem -ErrorAction Stop
+                if ($computer.OperatingSystem -like "*Server*" -or $computer.Name -like "*DC*" -or $computer.Name -like "*SVR*") {{
+                    Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $n; status = 'skipped' }} | ConvertTo-Json -Compress))
+                }} else {{
+                    $targets += $computer.Name
+                }}
+            }} catch [Microsoft.ActiveDirectory.Management.ADIdentityNotFoundException] {{
+                Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $n; status = 'not_found' }} | ConvertTo-Json -Compress))
+            }} catch {{
+                Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $n; status = 'error'; error = $_.Exception.Message }} | ConvertTo-Json -Compress))
+            }}
+        }}
+
+        if ($targets.Count -gt 0) {{
+            $seen = @{{}}
+            $options = New-PSSessionOption -OpenTimeout {self.bulk_host_timeout_ms} -OperationTimeout {self.bulk_host_timeout_ms}
+            Invoke-Command -ComputerName $targets -ThrottleLimit {throttle} -SessionOption $options `
+                -ErrorAction SilentlyContinue -ErrorVariable remoteErrors -ScriptBlock {{
+                    [pscustomobject]@{{ user = (Get-CimInstance Win32_ComputerSystem -ErrorAction Stop).UserName }}
+                }} | ForEach-Object {{
+                    $seen[$_.PSComputerName.ToUpper()] = $true
+                    Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $_.PSComputerName; status = 'ok'; user = [string]$_.user }} | ConvertTo-Json -Compress))
+                }}
+
+            foreach ($e in $remoteErrors) {{
+                $host_name = if ($e.OriginInfo) {{ $e.OriginInfo.PSComputerName }} else {{ [string]$e.TargetObject }}
+                if ($host_name -and -not $seen.ContainsKey($host_name.ToUpper())) {{
+                    $seen[$host_name.ToUpper()] = $true
+                    Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $host_name; status = 'offline'; error = $e.Exception.Message }} | ConvertTo-Json -Compress))
+                }}
+            }}
+
+            foreach ($t in $targets) {{
+                if (-not $seen.ContainsKey($t.ToUpper())) {{
+                    Write-Output ("RESULT:" + ([pscustomobject]@{{ name = $t; status = 'offline' }} | ConvertTo-Json -Compress))
+                }}
+            }}
+        }}
+        """
+
+        try:
+            output, streams, had_errors = client.execute_ps(script)
+            return self._parse_bulk_script_output(output, names)
+        except Exception as e:
+            logger.error(f"❌ Erro ao executar script PowerShell em lote ({len(names)} máquinas): {e}")
+            return [{
+                'status': 'script_error',
+                'message': f'Error executing PowerShell script: {str(e)}',
+                'computer_name': name
+            } for name in names]
+
+    def _parse_bulk_script_output(self, output: str, computer_names: List[str]) -> List[Dict[str, Any]]:
+        """Parse ``RESULT:{json}`` lines emitted by the bulk detection script."""
+        by_name: Dict[str, Dict[str, Any]] = {}
+
+        for line in (output or '').splitlines():
+            line = line.strip()
+            if not line.startswith('RESULT:'):
+                continue
+            try:
+                item = json.loads(line[len('RESULT:'):])
+            except ValueError:
+                logger.warning(f"⚠️ Linha de resultado inválida no script em lote: {line[:120]}")
+                continue
+
+            name = str(item.get('name') or '').strip()
+            if not name:
+                continue
+
+            result = {
+                'status': 'error',
+                'computer_name': name,
+                'usuario_atual': None,
+                'message': item.get('error') or 'Unknown error'
+            }
+            status = item.get('status')
+            if status == 'ok':
+                user = (item.get('user') or '').strip()
+                if user:
+                    result['status'] = 'ok'
+                    result['raw_user'] = user
+                    result['usuario_atual'] = self._format_username(user)
+                    result['message'] = 'OK'
+                else:
+                    result['status'] = 'no_user'
+                    result['usuario_atual'] = 'Nenhum usuário logado'
+                    result['message'] = 'No user logged in'
+            elif status == 'skipped':
+                result['status'] = 'skipped'
+                result['message'] = 'Machine is server or domain controller - skipped'
+            elif status == 'offline':
+                result['status'] = 'unreachable'
+                result['message'] = item.get('error') or 'Computer is offline or unreachable'
+            elif status == 'not_found':
+                result['status'] = 'not_found'
+                result['message'] = 'Computer not found in Active Directory'
+
+            by_name[name.upper()] = result
+
+        results = []
+        for name in computer_names:
+            result = by_name.get(name.upper())
+            if result is None:
+                result = {
+                    'status': 'error',
+                    'computer_name': name,
+                    'usuario_atual': None,
+                    'message': 'No result returned by bulk script'
+                }
+            else:
+                # Keep the caller's spelling of the name (PSComputerName may differ in case)
+                result['computer_name'] = name
+            results.append(result)
+        return results
+
     def _parse_script_output(self, output: str, computer_name: str) -> Dict[str, Any]:
         """Parse PowerShell script output and return structured result"""
         result = {
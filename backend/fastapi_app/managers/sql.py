@@ -1,19 +1,36 @@
 import pyodbc
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 from ..config import SQL_SERVER, SQL_DATABASE, SQL_USERNAME, SQL_PASSWORD, USE_WINDOWS_AUTH
 import os
+from .lazy import LazyManager
+from ..metrics import timed, timer
 
 logger = logging.getLogger(__name__)
 
 
+def _utc_naive(value):
+    """datetime or ISO string -> naive UTC datetime, as stored in the UTC DATETIME columns."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class SQLManager:
     def __init__(self):
         self.connection_string = self._build_connection_string()
-        try:
-            self._test_connection()
-        except Exception:
-            logger.exception('SQL test connection failed on init')
+        # Set once the tables exist; the lock keeps concurrent first writers from racing the DDL
+        self._ddl_lock = threading.Lock()
+        self._user_history_ready = False
+        self._logon_events_ready = False
+        self._logon_events_pruned_at = None
+        self.logon_events_retention_days = int(os.getenv('LOGON_EVENTS_RETENTION_DAYS', '180'))
+        # Same user seen again inside this window does not add a new event
+        self.logon_events_coalesce_minutes = int(os.getenv('LOGON_EVENTS_COALESCE_MINUTES', '60'))
+        # Sem teste de conexão aqui: o status é verificado em background (connections.start_connection_tests)
 
     def _build_connection_string(self):
         """Build a connection string.
@@ -77,9 +94,11 @@ class SQLManager:
             cursor.execute('SELECT 1')
             logger.info(f"✅ Conexão SQL Server estabelecida: {SQL_SERVER}/{SQL_DATABASE}")
 
+    @timed('sql')
     def get_connection(self):
         return pyodbc.connect(self.connection_string)
 
+    @timed('sql')
     def execute_query(self, query, params=None, fetch=True):
         try:
             with self.get_connection() as conn:
@@ -105,169 +124,137 @@ class SQLManager:
             logger.exception('SQL execute_query failed')
             raise
 
+    @timed('sql')
+    def fetch_rows(self, query, params=None):
+        """Run a SELECT and return (columns, rows) with the raw cursor tuples."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            columns = [column[0] for column in cursor.description]
+            return columns, cursor.fetchall()
+
+    def iter_query(self, query, params=None, chunk_size=1000):
+        """Stream a SELECT in `fetchmany` chunks: yields (columns, rows) per chunk.
+
+        The connection stays open until the generator is exhausted or closed,
+        so memory is bounded by `chunk_size` regardless of the result size.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            with timer('sql'):
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                with timer('sql'):
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finally:
+            conn.close()
+
     # Minimal compatibility methods used by routers
-    def get_computers_from_sql(self, inventory_filter=None):
-        # Build a resilient select that only references columns that exist in the computers table
+    def _table_columns(self, table):
+        """Lower-cased column names of `table` (empty list if it does not exist)."""
         try:
-            # helper to format datetime-like values safely
-            def _format_dt(v):
-                if v is None:
-                    return None
-                # already a datetime
-                if isinstance(v, datetime):
-                    return v.isoformat()
-                # strings: try parsing common SQL datetime formats to isoformat, otherwise return as-is
-                if isinstance(v, str):
-                    try:
-                        # try ISO-like strings first (replace space with T)
-                        return datetime.fromisoformat(v.replace(' ', 'T')).isoformat()
-                    except Exception:
-                        try:
-                            return datetime.strptime(v, '%Y-%m-%d %H:%M:%S.%f').isoformat()
-                        except Exception:
-                            try:
-                                return datetime.strptime(v, '%Y-%m-%d %H:%M:%S').isoformat()
-                            except Exception:
-                                # leave the original string if we can't parse it
-                                return v
-                # numeric timestamps
-                if isinstance(v, (int, float)):
-                    try:
-                        return datetime.fromtimestamp(v).isoformat()
-                    except Exception:
-                        return str(v)
-                # fallback to string representation
-                try:
-                    return str(v)
-                except Exception:
-                    return None
-            # Inspect available columns from computers table
-            try:
-                cols_info = self.execute_query("SELECT TOP 0 * FROM computers")
-                # execute_query returns [] for top 0 rows, but cursor.description was used earlier to build columns
-                # Fallback to using a direct connection when needed
-                with self.get_connection() as conn:
-                    cur = conn.cursor()
-                    cur.execute("SELECT TOP 0 * FROM computers")
-                    columns = [c[0].lower() for c in cur.description] if cur.description else []
-            except Exception:
-                logger.exception('Failed to inspect computers columns; falling back to minimal query')
-                columns = []
+            with self.get_connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"SELECT TOP 0 * FROM {table}")
+                return [c[0].lower() for c in cur.description] if cur.description else []
+        except Exception:
+            return []
 
-            # Inspect dell_warranty table columns (optional)
-            try:
-                with self.get_connection() as conn:
-                    cur = conn.cursor()
-                    cur.execute("SELECT TOP 0 * FROM dell_warranty")
-                    dell_columns = [c[0].lower() for c in cur.description] if cur.description else []
-            except Exception:
-                dell_columns = []
+    def _computers_select(self):
+        """SELECT list and FROM clause of the inventory listing.
 
-            has = lambda name: name.lower() in columns
-            has_dw = lambda name: name.lower() in dell_columns
+        Aliases, defaults and booleans are resolved in SQL so rows can be
+        serialised straight from the cursor (no per-row Python formatting).
+        Optional columns that do not exist in this schema become literals.
+        """
+        columns = self._table_columns('computers')
+        if not columns:
+            logger.warning('Failed to inspect computers columns; optional fields will be empty')
+        dell_columns = self._table_columns('dell_warranty')
+        has = lambda name: name.lower() in columns
+        opt = lambda col, alias: f'c.{col} AS {alias}' if has(col) else f"'' AS {alias}"
 
-            select_cols = [
-                'c.id', 'c.name', 'c.dns_hostname', 'c.distinguished_name as dn',
-                'c.is_enabled', 'c.is_domain_controller', 'c.description',
-                'c.last_logon_timestamp as lastLogon', 'c.created_date as created',
-                'c.user_account_control', 'c.primary_group_id', 'c.last_sync_ad'
+        model_cols = [f"NULLIF(c.{m}, '')" for m in ('model', 'product_model', 'system_model', 'modelo') if has(m)]
+        select_cols = [
+            'c.id AS id', 'c.name AS name', 'c.distinguished_name AS dn',
+            'c.last_logon_timestamp AS lastLogon',
+            "COALESCE(NULLIF(os.name, ''), 'N/A') AS os",
+            "COALESCE(NULLIF(os.version, ''), 'N/A') AS osVersion",
+            'c.created_date AS created',
+            "COALESCE(c.description, '') AS description",
+            'CAST(CASE WHEN c.is_enabled = 1 THEN 0 ELSE 1 END AS BIT) AS disabled',
+            'COALESCE(c.user_account_control, 0) AS userAccountControl',
+            'COALESCE(NULLIF(c.primary_group_id, 0), 515) AS primaryGroupID',
+            "COALESCE(c.dns_hostname, '') AS dnsHostName",
+            opt('ip_address', 'ipAddress'),
+            opt('mac_address', 'macAddress'),
+            f"COALESCE({', '.join(model_cols)}, '') AS model" if model_cols else "'' AS model",
+            opt('usuario_atual', 'usuarioAtual'),
+            opt('usuario_anterior', 'usuarioAnterior'),
+            opt('status', 'inventoryStatus'),
+            opt('location', 'location'),
+            "'' AS organizationName", "'' AS organizationCode",
+        ]
+        if dell_columns:
+            select_cols += [
+                'dw.product_line_description AS product_line_description',
+                'dw.warranty_end_date AS warranty_end_date',
+                'dw.warranty_status AS warranty_status',
             ]
+        else:
+            select_cols += ["'' AS product_line_description", 'NULL AS warranty_end_date', "'' AS warranty_status"]
 
-            if has('ip_address'):
-                select_cols.append('c.ip_address')
-            if has('mac_address'):
-                select_cols.append('c.mac_address')
-            # Possible columns that store hardware model information in different schemas
-            if has('model'):
-                select_cols.append('c.model')
-            if has('product_model'):
-                select_cols.append('c.product_model')
-            if has('system_model'):
-                select_cols.append('c.system_model')
-            if has('modelo'):
-                select_cols.append('c.modelo')
-            if has('usuario_atual'):
-                select_cols.append('c.usuario_atual')
-            if has('usuario_anterior'):
-                select_cols.append('c.usuario_anterior')
-            if has('status'):
-                select_cols.append('c.status')
-            if has('location'):
-                select_cols.append('c.location')
-
-            # OS and organization joins are optional but safe to include; OS fields come from separate table
-            select_cols.append('os.name as os')
-            select_cols.append('os.version as osVersion')
-            # If the warranty table exists, include a few useful warranty columns
-            if dell_columns:
-                select_cols.append('dw.product_line_description as product_line_description')
-                select_cols.append('dw.warranty_end_date as warranty_end_date')
-                select_cols.append('dw.warranty_status as warranty_status')
-            select_clause = ',\n            '.join(select_cols)
-
-            base_query = f"""
-            SELECT TOP 1000
-            {select_clause}
+        from_clause = f"""
             FROM computers c
-            LEFT JOIN organizations o ON c.organization_id = o.id
             LEFT JOIN operating_systems os ON c.operating_system_id = os.id
-            { 'LEFT JOIN dell_warranty dw ON c.id = dw.computer_id' if dell_columns else '' }
+            {'LEFT JOIN dell_warranty dw ON c.id = dw.computer_id' if dell_columns else ''}
             WHERE c.is_domain_controller = 0
-            """
+        """
+        return ',\n            '.join(select_cols), from_clause
 
-            if inventory_filter == 'spare':
-                query = base_query + " AND c.status = 'Spare' ORDER BY c.name"
-            else:
-                query = base_query + " ORDER BY c.name"
+    def get_computers_rows(self, inventory_filter=None, top=1000):
+        """Inventory listing as (columns, row tuples), ready for FastJSONResponse."""
+        select_clause, from_clause = self._computers_select()
+        query = f"SELECT TOP {int(top)}\n            {select_clause}\n{from_clause}"
+        if inventory_filter == 'spare':
+            query += " AND c.status = 'Spare'"
+        query += " ORDER BY c.name"
+        return self.fetch_rows(query)
 
+    def iter_computers(self, inventory_filter=None, chunk_size=1000):
+        """Full inventory (no TOP) streamed in `fetchmany` chunks of (columns, rows)."""
+        select_clause, from_clause = self._computers_select()
+        query = f"SELECT\n            {select_clause}\n{from_clause}"
+        if inventory_filter == 'spare':
+            query += " AND c.status = 'Spare'"
+        query += " ORDER BY c.name"
+        return self.iter_query(query, chunk_size=chunk_size)
+
+    def get_computers_from_sql(self, inventory_filter=None):
+        """Inventory listing as a list of dicts (datetimes are left as datetime objects)."""
+        try:
             try:
-                rows = self.execute_query(query)
+                columns, rows = self.get_computers_rows(inventory_filter=inventory_filter)
             except Exception:
                 logger.exception('Primary computers query failed; falling back to minimal list')
                 # Fallback: return a minimal list of computers (id, name)
                 try:
-                    rows = self.execute_query('SELECT id, name FROM computers ORDER BY name')
-                    # normalize to expected structure
-                    return [{'id': r.get('id'), 'name': r.get('name')} for r in rows]
+                    columns, rows = self.fetch_rows('SELECT id, name FROM computers ORDER BY name')
                 except Exception:
                     logger.exception('Fallback minimal computers query also failed')
                     return []
-            computers = []
-            for r in rows:
-                try:
-                    computers.append({
-                        'id': r.get('id'),
-                        'name': r.get('name'),
-                        'dn': r.get('dn'),
-                        'lastLogon': _format_dt(r.get('lastLogon')),
-                        'os': r.get('os') or 'N/A',
-                        'osVersion': r.get('osVersion') or 'N/A',
-                        'created': _format_dt(r.get('created')),
-                        'description': r.get('description') or '',
-                        'disabled': not bool(r.get('is_enabled')),
-                        'userAccountControl': r.get('user_account_control') or 0,
-                        'primaryGroupID': r.get('primary_group_id') or 515,
-                        'dnsHostName': r.get('dns_hostname') or '',
-                            'ipAddress': r.get('ip_address') if has('ip_address') else '',
-                            'macAddress': r.get('mac_address') if has('mac_address') else '',
-                            # Normalize model field from multiple possible column names
-                            'model': (r.get('model') or r.get('product_model') or r.get('system_model') or r.get('modelo') or '') if any([has('model'), has('product_model'), has('system_model'), has('modelo')]) else '',
-                        'usuarioAtual': r.get('usuario_atual') if has('usuario_atual') else '',
-                        'usuarioAnterior': r.get('usuario_anterior') if has('usuario_anterior') else '',
-                        'inventoryStatus': r.get('status') if has('status') else '',
-                        'location': r.get('location') if has('location') else '',
-                        'organizationName': r.get('organization_name') or '',
-                        'organizationCode': r.get('organization_code') or ''
-                        ,
-                        # include warranty/product line fields if present
-                        'product_line_description': r.get('product_line_description') if dell_columns else '',
-                        'warranty_end_date': _format_dt(r.get('warranty_end_date')) if (dell_columns and r.get('warranty_end_date')) else None,
-                        'warranty_status': r.get('warranty_status') if dell_columns else ''
-                    })
-                except Exception:
-                    logger.exception('Error processing computer row')
-                    continue
-            return computers
+            return [dict(zip(columns, row)) for row in rows]
         except Exception:
             logger.exception('get_computers_from_sql failed')
             return []
@@ -522,24 +509,28 @@ class SQLManager:
             logger.exception(f'update_os_for_computer failed for computer_id={computer_id}')
         return False
 
-    def update_os_for_computer_by_name(self, computer_name):
+    def update_os_for_computer_by_name(self, computer_name, ad_computer=None):
         """Resolve OS from AD data and update operating_system_id in SQL for a single computer.
         
-        Used after warranty updates to keep OS in sync.
+        Used after warranty updates to keep OS in sync. Callers that already
+        resolved the computer (e.g. via `ad_computer_manager.find_computers`)
+        pass it as `ad_computer` to skip the lookup.
         """
         if not computer_name:
             return False
         try:
-            # Import AD manager lazily to avoid circular imports
-            from . import ad_manager
-            all_computers = ad_manager.get_computers()
-            ad_computer = next((c for c in all_computers if c.get('name') == computer_name), None)
-            if not ad_computer:
-                return False
-            
-            os_name = ad_computer.get('os')
-            os_version = ad_computer.get('osVersion')
-            if not os_name or os_name == 'N/A':
+            if ad_computer is None:
+                # Import AD manager lazily to avoid circular imports; single (cached) lookup
+                # instead of listing every computer in the domain
+                from . import ad_computer_manager
+                try:
+                    ad_computer = ad_computer_manager.find_computer(computer_name)
+                except Exception:
+                    return False
+
+            os_name = ad_computer.get('operatingSystem')
+            os_version = ad_computer.get('operatingSystemVersion') or None
+            if not os_name:
                 return False
             
             # Get computer ID from SQL  
@@ -557,16 +548,23 @@ class SQLManager:
         """Update last_logon_timestamp in SQL for a single computer.
         
         Only updates if the new value is more recent than the stored value.
+        A newer value is also recorded in `computer_logon_events`, attributed
+        to the current user of the machine. Both columns hold UTC, like the
+        rest of `observed_at` (SYSUTCDATETIME()).
         """
         if not computer_name or not last_logon_iso:
             return False
         try:
+            last_logon = _utc_naive(last_logon_iso)
+            self._ensure_logon_events_table()
             self.execute_query(
                 """UPDATE computers 
                    SET last_logon_timestamp = ?
+                   OUTPUT inserted.id, inserted.Usuario_Atual, 'ad_lastlogon', inserted.last_logon_timestamp
+                       INTO dbo.computer_logon_events (computer_id, user_name, source, observed_at)
                    WHERE name = ? 
                      AND (last_logon_timestamp IS NULL OR last_logon_timestamp < ?)""",
-                params=[last_logon_iso, computer_name, last_logon_iso],
+                params=[last_logon, computer_name, last_logon],
                 fetch=False
             )
             return True
@@ -579,11 +577,63 @@ class SQLManager:
             query = "UPDATE computers SET is_enabled = ?, user_account_control = COALESCE(?, user_account_control), last_modified = GETDATE() WHERE name = ?"
             params = (1 if is_enabled else 0, user_account_control, computer_name)
             rows = self.execute_query(query, params, fetch=False)
+            self._mark_dashboard_dirty()
             return rows > 0
         except Exception:
             logger.exception('update_computer_status_in_sql failed')
             return False
 
+    @timed('sql')
+    def apply_ad_changes_bulk(self, changes):
+        """Mirror many AD writes (status and/or description) into `computers` with one UPDATE.
+
+        `changes` is a list of dicts with `name` and any of `is_enabled`,
+        `user_account_control` and `description` (a key that is absent leaves the
+        column untouched). Returns the rows updated.
+        """
+        rows = []
+        for c in changes:
+            has_status = 'is_enabled' in c
+            rows.append((c['name'],
+                         (1 if c['is_enabled'] else 0) if has_status else None,
+                         c.get('user_account_control'),
+                         1 if 'description' in c else 0,
+                         c.get('description')))
+        if not rows:
+            return 0
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE #ad_changes (
+                    name NVARCHAR(255) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY,
+                    is_enabled BIT NULL,
+                    user_account_control INT NULL,
+                    set_description BIT NOT NULL,
+                    description NVARCHAR(1024) COLLATE DATABASE_DEFAULT NULL
+                )
+            """)
+            try:
+                cursor.fast_executemany = True
+            except Exception:
+                pass
+            cursor.executemany("INSERT INTO #ad_changes (name, is_enabled, user_account_control, set_description, description) VALUES (?, ?, ?, ?, ?)", rows)
+            cursor.execute("""
+                UPDATE c
+                SET c.is_enabled = COALESCE(d.is_enabled, c.is_enabled),
+                    c.user_account_control = COALESCE(d.user_account_control, c.user_account_control),
+                    c.description = CASE WHEN d.set_description = 1 THEN d.description ELSE c.description END,
+                    c.last_modified = GETDATE()
+                FROM computers c
+                JOIN #ad_changes d ON c.name = d.name
+            """)
+            updated = cursor.rowcount
+            cursor.execute("DROP TABLE #ad_changes")
+            conn.commit()
+
+        self._mark_dashboard_dirty()
+        return updated
+
     def extract_service_tag_from_computer_name(self, computer_name):
         """Extrai service tag do nome da máquina (baseado no debug_c1wsb92.py)"""
         if not computer_name:
@@ -616,6 +666,7 @@ class SQLManager:
             logger.exception(f'Erro ao buscar todos os computadores: {e}')
             return []
 
+    @timed('sql')
     def clear_computers_table(self):
         """Limpa completamente a tabela de computadores"""
         try:
@@ -708,6 +759,245 @@ class SQLManager:
                 'error': str(e)
             }
 
+    def _ensure_user_history_table(self):
+        """Create `computer_user_history` (and its lookup index) on first use."""
+        if self._user_history_ready:
+            return
+        with self._ddl_lock:
+            if not self._user_history_ready:
+                self._create_user_history_table()
+                self._user_history_ready = True
+
+    def _create_user_history_table(self):
+        self.execute_query("""
+        IF OBJECT_ID('dbo.computer_user_history', 'U') IS NULL
+        BEGIN
+            CREATE TABLE dbo.computer_user_history (
+                id BIGINT IDENTITY(1,1) PRIMARY KEY,
+                computer_id INT NOT NULL,
+                computer_name NVARCHAR(255) NOT NULL,
+                previous_user NVARCHAR(255) NULL,
+                new_user NVARCHAR(255) NULL,
+                source NVARCHAR(50) NULL,
+                changed_at DATETIME NOT NULL DEFAULT GETDATE()
+            );
+            CREATE INDEX IX_computer_user_history_computer_changed
+                ON dbo.computer_user_history (computer_id, changed_at DESC)
+                INCLUDE (previous_user, new_user, source);
+        END
+        """, fetch=False)
+
+    @timed('sql')
+    def update_current_users_bulk(self, users, source='detect'):
+        """Apply many detected users with one set-based UPDATE.
+
+        `users` maps computer name -> formatted user. The rows are staged in a
+        temp table and a single UPDATE rotates Usuario_Atual into
+        Usuario_Anterior for the rows that changed. The same statement appends
+        each change to `computer_user_history`, all in one transaction.
+        Returns a dict with the changed rows and the names not found in `computers`.
+        """
+        if not users:
+            return {'changed': [], 'not_found': []}
+
+        self._ensure_user_history_table()
+        self._ensure_logon_events_table()
+        rows = [(name, user, source) for name, user in users.items()]
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE #user_changes (
+                    name NVARCHAR(255) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY,
+                    usuario NVARCHAR(255) COLLATE DATABASE_DEFAULT NULL,
+                    source NVARCHAR(50) NULL
+                )
+            """)
+            try:
+                cursor.fast_executemany = True
+            except Exception:
+                pass
+            cursor.executemany("INSERT INTO #user_changes (name, usuario, source) VALUES (?, ?, ?)", rows)
+
+            # Every detected user is an observation, changed or not; repeats
+            # inside the coalesce window are skipped to keep the table compact.
+            cursor.execute("""
+                INSERT INTO dbo.computer_logon_events (computer_id, user_name, source, observed_at)
+                SELECT c.id, d.usuario, d.source, SYSUTCDATETIME()
+                FROM #user_changes d
+                JOIN computers c ON c.name = d.name
+                WHERE d.usuario IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM dbo.computer_logon_events e
+                      WHERE e.computer_id = c.id
+                        AND e.observed_at >= DATEADD(minute, -?, SYSUTCDATETIME())
+                        AND e.user_name = d.usuario
+                  )
+            """, (self.logon_events_coalesce_minutes,))
+
+            cursor.execute("""
+                UPDATE c
+                SET c.Usuario_Anterior = c.Usuario_Atual,
+                    c.Usuario_Atual = d.usuario,
+                    c.updated_at = GETDATE()
+                OUTPUT inserted.id, inserted.name, deleted.Usuario_Atual, inserted.Usuario_Atual, d.source, GETDATE()
+                    INTO dbo.computer_user_history (computer_id, computer_name, previous_user, new_user, source, changed_at)
+                OUTPUT inserted.name, deleted.Usuario_Atual, inserted.Usuario_Atual
+                FROM computers c
+                JOIN #user_changes d ON c.name = d.name
+                WHERE c.Usuario_Atual IS NULL OR c.Usuario_Atual <> d.usuario
+            """)
+            changed = [{'name': name, 'previous': previous, 'current': current}
+                       for name, previous, current in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT d.name FROM #user_changes d
+                LEFT JOIN computers c ON c.name = d.name
+                WHERE c.id IS NULL
+            """)
+            not_found = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute("DROP TABLE #user_changes")
+            conn.commit()
+
+        self._maybe_prune_logon_events()
+        return {'changed': changed, 'not_found': not_found}
+
+    def set_current_user(self, computer_name, new_user, status=None, source='manual'):
+        """Set (or clear, with new_user=None) the current user of one computer.
+
+        The old Usuario_Atual moves to Usuario_Anterior and the change is
+        appended to `computer_user_history` by the same statement. `status`,
+        when given, also updates the inventory Status column.
+        Returns the number of rows updated.
+        """
+        self._ensure_user_history_table()
+        rows = self.execute_query("""
+            UPDATE c
+            SET c.Usuario_Anterior = COALESCE(c.Usuario_Atual, c.Usuario_Anterior),
+                c.Usuario_Atual = ?,
+                c.Status = COALESCE(?, c.Status),
+                c.updated_at = GETDATE()
+            OUTPUT inserted.id, inserted.name, deleted.Usuario_Atual, inserted.Usuario_Atual, ?, GETDATE()
+                INTO dbo.computer_user_history (computer_id, computer_name, previous_user, new_user, source, changed_at)
+            FROM computers c
+            WHERE c.name = ?
+        """, params=(new_user, status, source, computer_name), fetch=False)
+        self._mark_dashboard_dirty()
+        return rows
+
+    def _mark_dashboard_dirty(self):
+        """Pede recálculo (debounced) dos agregados do dashboard após escritas manuais
+        e avisa (tópico 'inventory') quem guarda respostas da lista em cache."""
+        try:
+            from .dashboard_stats import dashboard_stats
+            dashboard_stats.mark_dirty()
+        except Exception:
+            logger.debug('dashboard_stats indisponível', exc_info=True)
+        from .event_bus import publish
+        publish('inventory', {'type': 'changed'})
+
+    def get_user_history(self, computer_name, limit=50):
+        """Most recent user changes of a computer (index seek on computer_id, changed_at)."""
+        self._ensure_user_history_table()
+        try:
+            top_n = int(limit)
+        except Exception:
+            top_n = 50
+        return self.execute_query(f"""
+            SELECT TOP {top_n} h.previous_user, h.new_user, h.source, h.changed_at
+            FROM dbo.computer_user_history h
+            WHERE h.computer_id = (SELECT id FROM computers WHERE name = ?)
+            ORDER BY h.changed_at DESC
+        """, params=(computer_name,))
+
+    def _ensure_logon_events_table(self):
+        """Create `computer_logon_events`, clustered on (computer_id, observed_at).
+
+        `observed_at` is UTC for every source: AD lastLogon comes in UTC, so
+        detections use SYSUTCDATETIME() rather than the server's local GETDATE().
+        """
+        if self._logon_events_ready:
+            return
+        with self._ddl_lock:
+            if not self._logon_events_ready:
+                self._create_logon_events_table()
+                self._logon_events_ready = True
+
+    def _create_logon_events_table(self):
+        self.execute_query("""
+        IF OBJECT_ID('dbo.computer_logon_events', 'U') IS NULL
+        BEGIN
+            CREATE TABLE dbo.computer_logon_events (
+                id BIGINT IDENTITY(1,1) NOT NULL,
+                computer_id INT NOT NULL,
+                user_name NVARCHAR(255) NULL,
+                source NVARCHAR(50) NULL,
+                observed_at DATETIME NOT NULL DEFAULT SYSUTCDATETIME(),
+                CONSTRAINT PK_computer_logon_events PRIMARY KEY NONCLUSTERED (id)
+            );
+            CREATE CLUSTERED INDEX IX_computer_logon_events_computer_observed
+                ON dbo.computer_logon_events (computer_id, observed_at DESC);
+        END
+        """, fetch=False)
+
+    def prune_logon_events(self, retention_days=None, batch_size=5000):
+        """Delete logon events older than the retention window, in small batches."""
+        self._ensure_logon_events_table()
+        days = int(retention_days or self.logon_events_retention_days)
+        total = 0
+        while True:
+            deleted = self.execute_query(f"""
+                DELETE TOP ({int(batch_size)}) FROM dbo.computer_logon_events
+                WHERE observed_at < DATEADD(day, -?, SYSUTCDATETIME())
+            """, params=(days,), fetch=False)
+            total += max(deleted or 0, 0)
+            if not deleted or deleted < batch_size:
+                break
+        if total:
+            logger.info(f'🧹 {total} eventos de logon removidos (retenção {days} dias)')
+        return total
+
+    def _maybe_prune_logon_events(self):
+        """Run the retention prune at most every 6 hours, piggybacking on writers."""
+        now = datetime.now()
+        if self._logon_events_pruned_at and now - self._logon_events_pruned_at < timedelta(hours=6):
+            return
+        self._logon_events_pruned_at = now
+        try:
+            self.prune_logon_events()
+        except Exception:
+            logger.exception('prune_logon_events failed')
+
+    def get_last_logon_event(self, computer_name, days=30):
+        """Most recent user observed on a computer within `days` (one index seek)."""
+        self._ensure_logon_events_table()
+        rows = self.execute_query("""
+            SELECT TOP 1 e.user_name, e.source, e.observed_at
+            FROM dbo.computer_logon_events e
+            WHERE e.computer_id = (SELECT id FROM computers WHERE name = ?)
+              AND e.observed_at >= DATEADD(day, -?, SYSUTCDATETIME())
+              AND e.user_name IS NOT NULL
+            ORDER BY e.observed_at DESC
+        """, params=(computer_name, int(days)))
+        return rows[0] if rows else None
+
+    def get_computer_users(self, computer_name, days=30):
+        """Users observed on a computer within `days`, most recent first (one range scan)."""
+        self._ensure_logon_events_table()
+        return self.execute_query("""
+            SELECT e.user_name,
+                   MIN(e.observed_at) AS first_seen,
+                   MAX(e.observed_at) AS last_seen,
+                   COUNT(*) AS observations
+            FROM dbo.computer_logon_events e
+            WHERE e.computer_id = (SELECT id FROM computers WHERE name = ?)
+              AND e.observed_at >= DATEADD(day, -?, SYSUTCDATETIME())
+              AND e.user_name IS NOT NULL
+            GROUP BY e.user_name
+            ORDER BY MAX(e.observed_at) DESC
+        """, params=(computer_name, int(days)))
+
     def get_computers_for_warranty_update(self):
         """Get computers that need warranty updates (baseado no debug_c1wsb92.py) - Optimized"""
         try:
@@ -779,6 +1069,7 @@ class SQLManager:
             logger.exception('get_computers_for_warranty_update failed')
             return []
 
+    @timed('sql')
     def save_warranty_to_database(self, computer_id_or_service_tag, warranty_data):
         """Save warranty information to database.
 
@@ -966,5 +1257,5 @@ class SQLManager:
             return False
 
 
-# Singleton instance for use throughout FastAPI
-sql_manager = SQLManager()
+# Singleton instance for use throughout FastAPI (built on first use)
+sql_manager = LazyManager(SQLManager, 'sql_manager')
@@ -1,17 +1,23 @@
+import os
 import threading
 import time
 from datetime import datetime
 import logging
 from ..managers import ad_manager, sql_manager
+from .event_bus import publish
 
 logger = logging.getLogger(__name__)
 
 
 class BackgroundSyncService:
+    PROGRESS_EVERY = 100  # computadores entre eventos de progresso
+
     def __init__(self):
         self.sync_thread = None
         self.sync_running = False
         self.last_sync = None
+        self.interval = float(os.getenv('AD_SYNC_INTERVAL_SECONDS', '3600'))
+        self._stop = threading.Event()
     
     def _update_operating_systems_for_all_computers(self):
         """Função helper para atualizar sistemas operacionais de todos os computadores"""
@@ -85,33 +91,57 @@ class BackgroundSyncService:
                 }
             }
 
+    def _publish(self, mode, status, **data):
+        publish('sync', {'mode': mode, 'status': status, **data})
+
+    def _publish_progress(self, mode, index, total, stats):
+        if index % self.PROGRESS_EVERY == 0 or index == total:
+            self._publish(mode, 'running', processed=index, total=total, stats=dict(stats))
+
     def start_background_sync(self):
         if not self.sync_running:
             self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
             self.sync_thread.start()
             logger.info('🔄 Serviço de sincronização iniciado')
 
+    def stop_background_sync(self):
+        self.sync_running = False
+        self._stop.set()
+
     def _sync_loop(self):
+        from .coordination import leader_elector
+
         self.sync_running = True
+        self._stop.clear()
+        # Logo após o restart o lease do líder anterior ainda pode valer; espera a
+        # primeira eleição e revê a liderança a cada ttl/3, para que um worker que
+        # assume não fique até uma hora sem sincronizar
+        leader_elector.wait_for_decision()
+        last_run = None
         while self.sync_running:
             try:
-                self.sync_ad_to_sql()
-                time.sleep(3600)
+                # Com vários workers só o líder sincroniza
+                if leader_elector.is_leader and (last_run is None or time.monotonic() - last_run >= self.interval):
+                    last_run = time.monotonic()
+                    self.sync_ad_to_sql()
+                self._stop.wait(leader_elector.ttl / 3)
             except Exception as e:
                 logger.exception('Erro na sincronização background')
-                time.sleep(300)
+                self._stop.wait(300)
 
     def sync_ad_to_sql(self):
         try:
             logger.info('🔄 Iniciando sincronização AD → SQL')
             start_time = datetime.now()
+            self._publish('background', 'started')
             ad_computers = ad_manager.get_computers()
             if not ad_computers:
                 logger.warning('Nenhum computador encontrado no AD')
+                self._publish('background', 'completed', stats={'found': 0})
                 return
 
             stats = {'found': len(ad_computers), 'added': 0, 'updated': 0, 'errors': 0}
-            for computer in ad_computers:
+            for i, computer in enumerate(ad_computers, 1):
                 try:
                     result = sql_manager.sync_computer_to_sql(computer)
                     if result:
@@ -120,27 +150,32 @@ class BackgroundSyncService:
                         stats['added'] += 1
                 except Exception:
                     stats['errors'] += 1
+                self._publish_progress('background', i, len(ad_computers), stats)
 
             sql_manager.log_sync_operation('incremental', 'completed', stats)
             self.last_sync = datetime.now()
             duration = (self.last_sync - start_time).total_seconds()
             logger.info(f'Sincronização concluída em {duration:.1f}s - encontrados {stats["found"]}')
-        except Exception:
+            self._publish('background', 'completed', stats=stats, duration=duration)
+        except Exception as e:
             logger.exception('Erro na sincronização')
+            self._publish('background', 'failed', error=str(e))
 
     def sync_ad_to_sql_incremental(self):
         """Sincronização incremental - apenas adiciona/atualiza sem remoções"""
         try:
             logger.info('🔄 Iniciando sincronização incremental AD → SQL')
             start_time = datetime.now()
+            self._publish('incremental', 'started')
             ad_computers = ad_manager.get_computers()
             if not ad_computers:
                 logger.warning('Nenhum computador encontrado no AD')
+                self._publish('incremental', 'completed', stats={'computers_found': 0})
                 return {'computers_found': 0, 'computers_added': 0, 'computers_updated': 0}
 
             stats = {'computers_found': len(ad_computers), 'computers_added': 0, 'computers_updated': 0, 'errors': 0}
             
-            for computer in ad_computers:
+            for i, computer in enumerate(ad_computers, 1):
                 try:
                     result = sql_manager.sync_computer_to_sql(computer)
                     if result and result > 0:  # Se retornou um ID, foi inserção ou atualização bem-sucedida
@@ -151,6 +186,7 @@ class BackgroundSyncService:
                 except Exception as e:
                     stats['errors'] += 1
                     logger.error(f'Erro ao sincronizar computador {computer.get("name", "desconhecido")}: {e}')
+                self._publish_progress('incremental', i, len(ad_computers), stats)
 
             sql_manager.log_sync_operation('incremental', 'completed', stats)
             self.last_sync = datetime.now()
@@ -167,9 +203,11 @@ class BackgroundSyncService:
                 stats['os_updated'] = 0
                 logger.warning('⚠️ Erro na atualização automática de OS')
             
+            self._publish('incremental', 'completed', stats=stats)
             return stats
         except Exception as e:
             logger.exception('Erro na sincronização incremental')
+            self._publish('incremental', 'failed', error=str(e))
             raise
 
     def sync_ad_to_sql_complete(self):
@@ -177,6 +215,7 @@ class BackgroundSyncService:
         try:
             logger.info('🔄 Iniciando sincronização completa AD → SQL (limpeza total)')
             start_time = datetime.now()
+            self._publish('complete', 'started')
             
             # 1. Obter dados atuais do SQL para estatísticas
             current_computers = sql_manager.get_all_computers()
@@ -190,6 +229,7 @@ class BackgroundSyncService:
             ad_computers = ad_manager.get_computers()
             if not ad_computers:
                 logger.warning('Nenhum computador encontrado no AD')
+                self._publish('complete', 'completed', stats={'computers_added': 0})
                 return {'computers_before_sync': computers_before, 'computers_deleted': computers_before, 'computers_added': 0, 'computers_after_sync': 0}
 
             # 4. Inserir todos os computadores do AD
@@ -201,13 +241,14 @@ class BackgroundSyncService:
                 'errors': 0
             }
             
-            for computer in ad_computers:
+            for i, computer in enumerate(ad_computers, 1):
                 try:
                     sql_manager.sync_computer_to_sql(computer)
                     stats['computers_added'] += 1
                 except Exception as e:
                     stats['errors'] += 1
                     logger.error(f'Erro ao inserir computador {computer.get("name", "desconhecido")}: {e}')
+                self._publish_progress('complete', i, len(ad_computers), stats)
 
             stats['computers_after_sync'] = stats['computers_added']
             
@@ -226,9 +267,11 @@ class BackgroundSyncService:
                 stats['os_updated'] = 0
                 logger.warning('⚠️ Erro na atualização automática de OS')
             
+            self._publish('complete', 'completed', stats=stats)
             return stats
         except Exception as e:
             logger.exception('Erro na sincronização completa')
+            self._publish('complete', 'failed', error=str(e))
             raise
 
 
@@ -7,13 +7,19 @@ Também expõe funções para uso manual via API.
 
 import os
 import re
-import subprocess
 import threading
 import time
+import uuid
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
+from .detect_executors import get_executor
+from .event_bus import publish
+from .coordination import job_store, leader_elector
+
 logger = logging.getLogger(__name__)
 
 # Caminho para o diretório backend/
@@ -25,50 +31,12 @@ _backend_dir = Path(__file__).resolve().parent.parent.parent
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def _run_cmd(args, timeout=8):
-    """Roda comando com kill forçado da árvore inteira via taskkill."""
-    proc = None
-    try:
-        proc = subprocess.Popen(
-            args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            text=True, creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        stdout, stderr = proc.communicate(timeout=timeout)
-        return (stdout or '', stderr or '', proc.returncode)
-    except subprocess.TimeoutExpired:
-        if proc:
-            try:
-                subprocess.run(
-                    ['taskkill', '/F', '/T', '/PID', str(proc.pid)],
-                    capture_output=True, timeout=5,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            except Exception:
-                try:
-                    proc.kill()
-                except Exception:
-                    pass
-        return (None, None, 'TIMEOUT')
-    except FileNotFoundError:
-        return (None, None, 'NOT_FOUND')
-    except Exception as e:
-        if proc:
-            try:
-                proc.kill()
-            except Exception:
-                pass
-        return (None, None, str(e))
+    """Roda comando pelo executor ativo (local ou simulado, ver detect_executors)."""
+    return get_executor().run(args, timeout=timeout)
 
 
 def _is_online(computer_name):
-    try:
-        r = subprocess.run(
-            ['ping', '-n', '1', '-w', '1500', computer_name],
-            capture_output=True, timeout=4,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        return r.returncode == 0
-    except Exception:
-        return False
+    return get_executor().ping(computer_name)
 
 
 def _try_query_user(computer_name):
@@ -156,8 +124,12 @@ def format_detect_username(raw_user):
     return ' '.join(p.capitalize() for p in parts if p)
 
 
-def detect_user(computer_name):
-    """Ping → query user → PsExec. Retorna dict com resultado."""
+def detect_user(computer_name, persist=True):
+    """Ping → query user → PsExec. Retorna dict com resultado.
+
+    Com persist=False o resultado não é gravado no SQL; varreduras coletam os
+    resultados e gravam tudo de uma vez com `save_detected_users`.
+    """
     t0 = time.time()
     if not _is_online(computer_name):
         return {'status': 'offline', 'computer_name': computer_name, 'elapsed': round(time.time() - t0, 1)}
@@ -165,14 +137,14 @@ def detect_user(computer_name):
     errors = []
     user, err = _try_query_user(computer_name)
     if user:
-        return _build_detect_result(computer_name, user, 'query_user', t0)
+        return _build_detect_result(computer_name, user, 'query_user', t0, persist)
     if err == 'NO_USER_LOGGED':
         return {'status': 'no_user', 'computer_name': computer_name, 'elapsed': round(time.time() - t0, 1)}
     errors.append(f'quser:{err}')
 
     user, err = _try_psexec(computer_name)
     if user:
-        return _build_detect_result(computer_name, user, 'psexec', t0)
+        return _build_detect_result(computer_name, user, 'psexec', t0, persist)
     if err == 'NO_USER_LOGGED':
         return {'status': 'no_user', 'computer_name': computer_name, 'elapsed': round(time.time() - t0, 1)}
     errors.append(f'psexec:{err}')
@@ -185,24 +157,15 @@ def detect_user(computer_name):
     }
 
 
-def _build_detect_result(computer_name, raw_user, method, t0):
-    from ..managers import sql_manager
-
+def _build_detect_result(computer_name, raw_user, method, t0, persist=True):
     formatted = format_detect_username(raw_user)
-    try:
-        rows = sql_manager.execute_query(
-            "SELECT Usuario_Atual FROM computers WHERE name = ?",
-            params=(computer_name,)
-        )
-        if rows:
-            db_current = rows[0].get('Usuario_Atual')
-            if db_current != formatted:
-                sql_manager.execute_query(
-                    "UPDATE computers SET Usuario_Atual = ?, Usuario_Anterior = ?, updated_at = GETDATE() WHERE name = ?",
-                    params=(formatted, db_current, computer_name)
-                )
-    except Exception as e:
-        logger.warning(f'Erro ao salvar usuario {formatted} para {computer_name}: {e}')
+    saved = False
+    if persist:
+        try:
+            save_detected_users({computer_name: formatted}, source=f'detect_{method}')
+            saved = True
+        except Exception as e:
+            logger.warning(f'Erro ao salvar usuario {formatted} para {computer_name}: {e}')
 
     return {
         'status': 'ok',
@@ -210,13 +173,91 @@ def _build_detect_result(computer_name, raw_user, method, t0):
         'raw_user': raw_user,
         'usuario_atual': formatted,
         'method': method,
-        'saved': True,
+        'saved': saved,
         'elapsed': round(time.time() - t0, 1)
     }
 
 
-def run_bulk_detect_onshore():
-    """Detecta usuários de todas as máquinas onshore (SHQ*). Pode ser chamada como task ou agendada."""
+def save_detected_users(users, source='detect'):
+    """Grava {máquina: usuário} com um único UPDATE set-based + histórico."""
+    from ..managers import sql_manager
+
+    return sql_manager.update_current_users_bulk(users, source=source)
+
+
+def detect_users_batched(computer_names, client, batch_size=200, throttle_limit=None):
+    """Detecta usuários de muitas máquinas enviando listas de hostnames ao DC.
+
+    Cada lote vira um único script remoto (Invoke-Command -ThrottleLimit) em vez
+    de um script por máquina. Retorna a lista de resultados por máquina.
+    """
+    from .powershell_manager import powershell_manager
+
+    results = []
+    for i in range(0, len(computer_names), batch_size):
+        chunk = computer_names[i:i + batch_size]
+        t0 = time.time()
+        chunk_results = powershell_manager.execute_bulk_user_detection_script(
+            chunk, client=client, throttle_limit=throttle_limit
+        )
+        logger.info(f'[detect-users] Lote {i // batch_size + 1}: {len(chunk)} máquinas em {time.time() - t0:.1f}s')
+        results.extend(chunk_results)
+    return results
+
+
+def apply_detected_users(results):
+    """Grava em lote os usuários detectados (status ok) e anota cada resultado.
+
+    Adiciona `db_status` em cada item: updated / no_change / not_found_in_db.
+    """
+    users = {r['computer_name']: r['usuario_atual'] for r in results if r.get('status') == 'ok' and r.get('usuario_atual')}
+    if not users:
+        return {'changed': [], 'not_found': []}
+
+    outcome = save_detected_users(users, source='bulk_powershell')
+    changed = {c['name'].upper(): c for c in outcome['changed']}
+    not_found = {n.upper() for n in outcome['not_found']}
+    for r in results:
+        if r.get('status') != 'ok':
+            continue
+        key = r['computer_name'].upper()
+        if key in changed:
+            r['db_status'] = 'updated'
+            r['previous_user'] = changed[key]['previous']
+        elif key in not_found:
+            r['db_status'] = 'not_found_in_db'
+        else:
+            r['db_status'] = 'no_change'
+    return outcome
+
+
+def _skip_disabled_in_ad(names):
+    """Tira da varredura máquinas desativadas ou removidas do AD desde o último sync.
+
+    Opcional (USER_DETECT_AD_PREFILTER=1; desligado por padrão, quando a lista
+    do SQL é usada como está). Uma busca em lote (`find_computers`, poucas idas
+    ao DC) economiza os timeouts de WinRM/quser nessas máquinas. Se o AD
+    falhar, segue com a lista do SQL.
+    """
+    if not names or os.getenv('USER_DETECT_AD_PREFILTER', '0') != '1':
+        return names
+    try:
+        from ..managers import ad_computer_manager
+        found = ad_computer_manager.find_computers(names)
+    except Exception as e:
+        logger.warning(f'[detect-users] Pré-filtro do AD indisponível, usando lista do SQL: {e}')
+        return names
+    kept = [n for n in names if n in found and not found[n].get('disabled')]
+    if len(kept) != len(names):
+        logger.info(f'[detect-users] {len(names) - len(kept)} máquinas ignoradas (desativadas ou fora do AD)')
+    return kept
+
+
+def run_bulk_detect_onshore(max_workers=None):
+    """Detecta usuários de todas as máquinas onshore (SHQ*). Pode ser chamada como task ou agendada.
+
+    As máquinas são consultadas em paralelo (USER_DETECT_SWEEP_WORKERS, padrão 8).
+    """
     from ..managers import sql_manager
 
     try:
@@ -227,32 +268,339 @@ def run_bulk_detect_onshore():
             "AND name NOT LIKE '%DC%' AND name NOT LIKE '%SVR%' "
             "ORDER BY name"
         )
-        total = len(rows)
+        names = _skip_disabled_in_ad([row['name'] for row in rows])
+        total = len(names)
         ok = offline = no_user = errors = 0
-        logger.info(f'[detect-users] Iniciando para {total} máquinas onshore...')
-
-        for i, row in enumerate(rows, 1):
-            name = row['name']
-            result = detect_user(name)
-            s = result.get('status')
-            if s == 'ok':
-                ok += 1
-                logger.info(f'  [{i}/{total}] OK {name}: {result.get("usuario_atual")} [{result.get("method")}] ({result.get("elapsed")}s)')
-            elif s == 'offline':
-                offline += 1
-            elif s == 'no_user':
-                no_user += 1
-            else:
-                errors += 1
-                logger.warning(f'  [{i}/{total}] FAIL {name}: {result.get("error")} ({result.get("elapsed")}s)')
+        workers = max(1, int(max_workers or os.getenv('USER_DETECT_SWEEP_WORKERS', '8')))
+        logger.info(f'[detect-users] Iniciando para {total} máquinas onshore ({workers} workers)...')
+        publish('detect', {'kind': 'onshore_sweep', 'status': 'running', 'total': total})
+
+        detected = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(detect_user, name, False) for name in names]
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                name = result['computer_name']
+                s = result.get('status')
+                if s == 'ok':
+                    ok += 1
+                    detected[name] = result['usuario_atual']
+                    logger.info(f'  [{i}/{total}] OK {name}: {result.get("usuario_atual")} [{result.get("method")}] ({result.get("elapsed")}s)')
+                elif s == 'offline':
+                    offline += 1
+                elif s == 'no_user':
+                    no_user += 1
+                else:
+                    errors += 1
+                    logger.warning(f'  [{i}/{total}] FAIL {name}: {result.get("error")} ({result.get("elapsed")}s)')
 
-        logger.info(f'[detect-users] DONE — {total} máquinas: ok={ok} offline={offline} sem_user={no_user} erros={errors}')
-        return {'total': total, 'ok': ok, 'offline': offline, 'no_user': no_user, 'errors': errors}
+        changed = 0
+        if detected:
+            try:
+                changed = len(save_detected_users(detected, source='detect_sweep')['changed'])
+            except Exception:
+                logger.exception(f'[detect-users] Falha ao gravar {len(detected)} usuários detectados')
+
+        logger.info(f'[detect-users] DONE — {total} máquinas: ok={ok} offline={offline} sem_user={no_user} erros={errors} alterados={changed}')
+        summary = {'total': total, 'ok': ok, 'offline': offline, 'no_user': no_user, 'errors': errors, 'changed': changed}
+        publish('detect', {'kind': 'onshore_sweep', 'status': 'completed', **summary})
+        return summary
     except Exception:
         logger.exception('[detect-users] Erro crítico')
         return None
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# Jobs de atualização em massa (bulk-update-current-users)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BULK_UPDATE_QUERY = """
+    SELECT name
+    FROM computers
+    WHERE is_enabled = 1
+    AND is_domain_controller = 0
+    AND (description NOT LIKE '%server%' OR description IS NULL)
+    AND (name NOT LIKE '%DC%' AND name NOT LIKE '%SVR%')
+    ORDER BY name
+"""
+
+# In-memory job store (job_id -> status dict) for the jobs this worker runs, same
+# model as the warranty jobs; snapshots go to coordination.job_store so any
+# worker can report status and request cancellation
+_BULK_JOB_KIND = 'detect_bulk'
+_bulk_jobs = {}
+_bulk_jobs_lock = threading.Lock()
+_bulk_cancel_events = {}
+
+_TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+_RECENT_RESULTS_LIMIT = 50
+# Jobs finalizados continuam consultáveis por este tempo; depois saem da memória
+BULK_UPDATE_JOB_RETENTION_SECONDS = float(os.getenv('BULK_UPDATE_JOB_RETENTION_SECONDS', '86400'))
+
+
+def _prune_finished_jobs(now):
+    """Remove jobs terminados há mais de BULK_UPDATE_JOB_RETENTION_SECONDS (chamar com o lock)."""
+    expired = [job_id for job_id, job in _bulk_jobs.items()
+               if job['status'] in _TERMINAL_STATUSES
+               and now - (job.get('ended_at') or job['created_at']) >= BULK_UPDATE_JOB_RETENTION_SECONDS]
+    for job_id in expired:
+        del _bulk_jobs[job_id]
+        _bulk_cancel_events.pop(job_id, None)
+
+
+def _job_snapshot(job):
+    snapshot = dict(job)
+    snapshot['recent_results'] = list(job.get('recent_results', []))
+    total = snapshot.get('total') or 0
+    processed = snapshot.get('processed') or 0
+    snapshot['progress_percent'] = int((processed / total) * 100) if total > 0 else (
+        100 if snapshot.get('status') == 'completed' else 0
+    )
+    return snapshot
+
+
+def _remote_job(job_id):
+    try:
+        return job_store.get(job_id, _BULK_JOB_KIND)
+    except Exception:
+        logger.warning(f'[bulk-update-users] Falha ao ler job {job_id} do estado central', exc_info=True)
+        return None
+
+
+def _remote_active_jobs():
+    try:
+        return job_store.list_active(_BULK_JOB_KIND)
+    except Exception:
+        logger.warning('[bulk-update-users] Falha ao listar jobs do estado central', exc_info=True)
+        return []
+
+
+def _persist_job(snapshot, force=False):
+    """Grava o snapshot no estado central; aplica pedido de cancelamento vindo de outro worker."""
+    if job_store.save(snapshot['id'], _BULK_JOB_KIND, snapshot, force=force):
+        event = _bulk_cancel_events.get(snapshot['id'])
+        if event and not event.is_set():
+            logger.info(f"[bulk-update-users] Cancelamento do job {snapshot['id']} pedido por outro worker")
+            cancel_bulk_update_job(snapshot['id'])
+
+
+def get_bulk_update_job(job_id):
+    with _bulk_jobs_lock:
+        job = _bulk_jobs.get(job_id)
+        if job:
+            return _job_snapshot(job)
+    # Job de outro worker: snapshot central (atualizado a cada JOB_STATE_FLUSH_SECONDS)
+    return _remote_job(job_id)
+
+
+def list_bulk_update_jobs(active_only=False):
+    with _bulk_jobs_lock:
+        jobs = [_job_snapshot(j) for j in _bulk_jobs.values()]
+    local_ids = {j['id'] for j in jobs}
+    jobs += [j for j in _remote_active_jobs() if j['id'] not in local_ids]
+    if active_only:
+        jobs = [j for j in jobs if j['status'] not in _TERMINAL_STATUSES]
+    return jobs
+
+
+def cancel_bulk_update_job(job_id):
+    """Sinaliza cancelamento; lotes em andamento terminam, os pendentes não iniciam."""
+    with _bulk_jobs_lock:
+        job = _bulk_jobs.get(job_id)
+        if job:
+            if job['status'] not in _TERMINAL_STATUSES:
+                job['status'] = 'cancelling'
+                job['version'] += 1
+                event = _bulk_cancel_events.get(job_id)
+                if event:
+                    event.set()
+            snapshot = _job_snapshot(job)
+    if not job:
+        # Rodando em outro worker: o dono recebe o pedido na próxima gravação de estado
+        remote = _remote_job(job_id)
+        if remote and remote['status'] not in _TERMINAL_STATUSES:
+            job_store.request_cancel(job_id)
+            remote['cancel_requested'] = True
+        return remote
+    publish('detect', _progress_event(snapshot))
+    return snapshot
+
+
+def start_bulk_update_job(batch_size=200, throttle_limit=None, max_workers=4):
+    """Cria o job e dispara a execução em uma thread. Retorna (snapshot, created).
+
+    Se já existe um job ativo, retorna esse job com created=False em vez de
+    iniciar uma segunda varredura concorrente.
+    """
+    # Varredura ativa em outro worker também conta
+    remote_active = _remote_active_jobs()
+    with _bulk_jobs_lock:
+        for job in _bulk_jobs.values():
+            if job['status'] not in _TERMINAL_STATUSES:
+                return _job_snapshot(job), False
+        if remote_active:
+            return remote_active[0], False
+
+        _prune_finished_jobs(time.time())
+        job_id = str(uuid.uuid4())
+        _bulk_jobs[job_id] = {
+            'id': job_id,
+            'status': 'pending',
+            'total': 0,
+            'processed': 0,
+            'updated': 0,
+            'no_change': 0,
+            'skipped': 0,
+            'offline_or_no_user': 0,
+            'errors': 0,
+            'total_batches': 0,
+            'completed_batches': 0,
+            'batch_size': batch_size,
+            'max_workers': max_workers,
+            'created_at': time.time(),
+            'started_at': None,
+            'ended_at': None,
+            'error': None,
+            'recent_results': deque(maxlen=_RECENT_RESULTS_LIMIT),
+            'version': 0,
+        }
+        _bulk_cancel_events[job_id] = threading.Event()
+        snapshot = _job_snapshot(_bulk_jobs[job_id])
+    _persist_job(snapshot, force=True)
+
+    thread = threading.Thread(
+        target=_run_bulk_update_job,
+        args=(job_id, batch_size, throttle_limit, max_workers),
+        daemon=True
+    )
+    thread.start()
+    return snapshot, True
+
+
+_PROGRESS_FIELDS = (
+    'status', 'total', 'processed', 'updated', 'no_change', 'skipped', 'offline_or_no_user',
+    'errors', 'total_batches', 'completed_batches', 'started_at', 'ended_at', 'error', 'version'
+)
+
+
+def _progress_event(job, items=None):
+    """Evento incremental para o event bus: contadores + itens do lote recém-gravado."""
+    data = {'job_id': job['id'], 'kind': 'bulk_update'}
+    data.update({k: job.get(k) for k in _PROGRESS_FIELDS})
+    if items is not None:
+        data['items'] = items
+    return data
+
+
+def _update_job(job_id, **fields):
+    with _bulk_jobs_lock:
+        job = _bulk_jobs[job_id]
+        job.update(fields)
+        job['version'] += 1
+        event = _progress_event(job)
+        snapshot = _job_snapshot(job)
+    publish('detect', event)
+    _persist_job(snapshot, force='status' in fields)
+
+
+def _record_batch(job_id, batch_results):
+    items = []
+    with _bulk_jobs_lock:
+        job = _bulk_jobs[job_id]
+        for r in batch_results:
+            job['processed'] += 1
+            status = r.get('status')
+            item = {'computer': r['computer_name']}
+            if status == 'skipped':
+                job['skipped'] += 1
+                item['status'] = 'skipped'
+            elif status == 'ok':
+                db_status = r.get('db_status') or 'no_change'
+                item.update({'status': db_status, 'current_user': r.get('usuario_atual')})
+                if db_status == 'updated':
+                    job['updated'] += 1
+                    item['previous_user'] = r.get('previous_user')
+                elif db_status == 'not_found_in_db':
+                    job['errors'] += 1
+                else:
+                    job['no_change'] += 1
+            elif status in ('no_user', 'unreachable'):
+                job['offline_or_no_user'] += 1
+                item['status'] = 'offline_or_no_user'
+            else:
+                job['errors'] += 1
+                item.update({'status': 'error', 'message': r.get('message')})
+            job['recent_results'].append(item)
+            items.append(item)
+        job['completed_batches'] += 1
+        job['version'] += 1
+        event = _progress_event(job, items)
+        snapshot = _job_snapshot(job)
+    publish('detect', event)
+    _persist_job(snapshot)
+
+
+def _run_bulk_batch(job_id, names, server, throttle_limit):
+    from ..connections import require_dhcp_manager
+
+    if _bulk_cancel_events[job_id].is_set():
+        return
+    try:
+        client = require_dhcp_manager().testar_conexao_servidor(server)
+        if not client:
+            results = [{'computer_name': n, 'status': 'connection_failed', 'message': f'Could not connect to {server}'} for n in names]
+        else:
+            results = detect_users_batched(names, client, batch_size=len(names), throttle_limit=throttle_limit)
+            try:
+                apply_detected_users(results)
+            except Exception as e:
+                logger.exception('[bulk-update-users] Falha ao gravar lote no SQL')
+                for r in results:
+                    if r.get('status') == 'ok':
+                        r['status'] = 'error'
+                        r['message'] = f'SQL: {e}'
+    except Exception as e:
+        logger.exception(f'[bulk-update-users] Lote falhou no job {job_id}')
+        results = [{'computer_name': n, 'status': 'error', 'message': str(e)} for n in names]
+    _record_batch(job_id, results)
+
+
+def _run_bulk_update_job(job_id, batch_size, throttle_limit, max_workers):
+    from ..managers import sql_manager
+    from ..connections import require_dhcp_manager
+
+    try:
+        _update_job(job_id, status='running', started_at=time.time())
+
+        dhcp = require_dhcp_manager()
+        servers = dhcp.all_servers
+        if not servers:
+            raise RuntimeError('No servers available for PowerShell connections')
+        server = servers[0]
+
+        names = _skip_disabled_in_ad([row['name'] for row in sql_manager.execute_query(BULK_UPDATE_QUERY)])
+        batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+        _update_job(job_id, total=len(names), total_batches=len(batches))
+        logger.info(f'[bulk-update-users] Job {job_id}: {len(names)} máquinas em {len(batches)} lotes ({max_workers} em paralelo)')
+
+        cancel_event = _bulk_cancel_events[job_id]
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='bulk-users') as pool:
+            futures = [pool.submit(_run_bulk_batch, job_id, batch, server, throttle_limit) for batch in batches]
+            for future in as_completed(futures):
+                if cancel_event.is_set():
+                    for f in futures:
+                        f.cancel()
+
+        final_status = 'cancelled' if cancel_event.is_set() else 'completed'
+        _update_job(job_id, status=final_status, ended_at=time.time())
+        logger.info(f'[bulk-update-users] Job {job_id} {final_status}')
+    except Exception as e:
+        logger.exception(f'[bulk-update-users] Job {job_id} falhou')
+        _update_job(job_id, status='failed', error=str(e), ended_at=time.time())
+    finally:
+        _bulk_cancel_events.pop(job_id, None)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # Agendamento automático — horário comercial (seg-sex, 7h-19h)
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -261,6 +609,7 @@ class UserDetectScheduler:
     """Executa detecção de usuários a cada 1h durante horário comercial."""
 
     INTERVAL_SECONDS = 3600          # 1 hora entre execuções
+    STARTUP_DELAY_SECONDS = 300      # dá tempo do servidor estabilizar
     BUSINESS_HOUR_START = 7          # 07:00
     BUSINESS_HOUR_END = 19           # 19:00
     BUSINESS_DAYS = range(0, 5)      # seg=0 … sex=4
@@ -268,7 +617,9 @@ class UserDetectScheduler:
     def __init__(self):
         self._thread = None
         self._running = False
+        self._stop = threading.Event()
         self._last_run = None
+        self._last_run_at = None     # monotonic da última varredura deste worker
 
     @property
     def last_run(self):
@@ -288,6 +639,8 @@ class UserDetectScheduler:
     def start(self):
         if self._running:
             return
+        self._running = True
+        self._stop.clear()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
         logger.info(
@@ -298,23 +651,35 @@ class UserDetectScheduler:
 
     def stop(self):
         self._running = False
+        self._stop.set()
+
+    def _due(self):
+        return self._last_run_at is None or time.monotonic() - self._last_run_at >= self.INTERVAL_SECONDS
 
     def _loop(self):
         self._running = True
-        # Espera inicial de 5 min para dar tempo do servidor estabilizar
-        time.sleep(300)
+        if self._stop.wait(self.STARTUP_DELAY_SECONDS):
+            return
+        # A liderança é revista a cada ttl/3: se o líder cai, quem assume o lease
+        # varre na próxima checagem em vez de esperar a hora cheia
         while self._running:
             try:
-                if self._is_business_hours():
+                if not leader_elector.is_leader:
+                    # Com vários workers só o líder (lease no SQL) faz a varredura
+                    logger.debug('[UserDetectScheduler] Outro worker é o líder, pulando.')
+                elif not self._due():
+                    pass
+                elif self._is_business_hours():
                     logger.info('[UserDetectScheduler] Horário comercial — iniciando detecção...')
                     self._last_run = datetime.now()
+                    self._last_run_at = time.monotonic()
                     run_bulk_detect_onshore()
                 else:
                     logger.debug('[UserDetectScheduler] Fora do horário comercial, pulando.')
-                time.sleep(self.INTERVAL_SECONDS)
+                self._stop.wait(leader_elector.ttl / 3)
             except Exception:
                 logger.exception('[UserDetectScheduler] Erro no loop')
-                time.sleep(300)
+                self._stop.wait(300)
 
 
 # Singleton
@@ -0,0 +1,189 @@
+"""Request metrics in Prometheus text format (no extra dependency).
+
+`MetricsMiddleware` records, per route template (e.g. /api/computers/{name}):
+request count by status, a latency histogram and in-flight requests. Code that
+talks to SQL, LDAP, WinRM or the Dell API is wrapped in `timed('<dep>')`; the
+sub-timer adds its elapsed time to the current request through a context
+variable, so each route also reports how much of its time went to each
+dependency. Calls outside a request (background jobs) still feed the
+per-dependency histogram. `render()` produces the /metrics payload.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# dependency -> seconds spent by the current request (shared by the threads it offloads to)
+_request_timers = contextvars.ContextVar('request_timers', default=None)
+# dependencies already being timed in this context (nested calls are not counted twice)
+_active = contextvars.ContextVar('active_timers', default=())
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}           # (method, route, status) -> count
+        self.latency = {}            # (method, route) -> _Histogram
+        self.in_flight = 0
+        self.route_dependency = {}   # (route, dependency) -> [seconds, requests]
+        self.dependency = {}         # dependency -> _Histogram (every call, in or out of requests)
+        self.counters = {}           # (name, labels) -> value, for ad-hoc counters (cache hits, ...)
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status, seconds, timers):
+        with self._lock:
+            self.in_flight -= 1
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((method, route), _Histogram()).observe(seconds)
+            for dep, spent in (timers or {}).items():
+                agg = self.route_dependency.setdefault((route, dep), [0.0, 0])
+                agg[0] += spent
+                agg[1] += 1
+
+    def observe_dependency(self, dependency, seconds, timers=None):
+        """Record one call; also add it to the request's `timers` under the same lock,
+        since the threads a request offloads to share that dict through the copied context."""
+        with self._lock:
+            self.dependency.setdefault(dependency, _Histogram()).observe(seconds)
+            if timers is not None:
+                timers[dependency] = timers.get(dependency, 0.0) + seconds
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self):
+        """Prometheus text exposition format 0.0.4."""
+        def fmt_labels(**labels):
+            parts = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            return '{' + parts + '}' if parts else ''
+
+        def histogram(name, hist, **labels):
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, hist.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{fmt_labels(**labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_bucket{fmt_labels(**labels, le="+Inf")} {hist.count}')
+            lines.append(f'{name}_sum{fmt_labels(**labels)} {hist.sum:.6f}')
+            lines.append(f'{name}_count{fmt_labels(**labels)} {hist.count}')
+
+        lines = []
+        with self._lock:
+            lines += ['# HELP http_requests_in_flight Requests currently being served.',
+                      '# TYPE http_requests_in_flight gauge',
+                      f'http_requests_in_flight {self.in_flight}']
+            lines += ['# HELP http_requests_total Requests by method, route template and status.',
+                      '# TYPE http_requests_total counter']
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{fmt_labels(method=method, route=route, status=status)} {n}')
+            lines += ['# HELP http_request_duration_seconds Request latency by route template.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (method, route), hist in sorted(self.latency.items()):
+                histogram('http_request_duration_seconds', hist, method=method, route=route)
+            lines += ['# HELP http_request_dependency_seconds_total Time requests spent in each dependency.',
+                      '# TYPE http_request_dependency_seconds_total counter']
+            for (route, dep), (spent, _) in sorted(self.route_dependency.items()):
+                lines.append(f'http_request_dependency_seconds_total{fmt_labels(route=route, dependency=dep)} {spent:.6f}')
+            lines += ['# HELP http_request_dependency_requests_total Requests that touched each dependency.',
+                      '# TYPE http_request_dependency_requests_total counter']
+            for (route, dep), (_, n) in sorted(self.route_dependency.items()):
+                lines.append(f'http_request_dependency_requests_total{fmt_labels(route=route, dependency=dep)} {n}')
+            lines += ['# HELP dependency_call_duration_seconds Duration of SQL/LDAP/WinRM/Dell calls.',
+                      '# TYPE dependency_call_duration_seconds histogram']
+            for dep, hist in sorted(self.dependency.items()):
+                histogram('dependency_call_duration_seconds', hist, dependency=dep)
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f'# TYPE {name} counter')
+                    seen.add(name)
+                lines.append(f'{name}{fmt_labels(**dict(labels))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def timer(dependency):
+    if dependency in _active.get():
+        yield
+        return
+    token = _active.set(_active.get() + (dependency,))
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        _active.reset(token)
+        registry.observe_dependency(dependency, elapsed, _request_timers.get())
+
+
+def timed(dependency):
+    """Decorator: count the call's wall time as time spent in `dependency`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(dependency):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timers = {}
+        token = _request_timers.set(timers)
+        status = [500]
+
+        async def _send(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        registry.request_started()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _request_timers.reset(token)
+            # Route template (set by the router on the shared scope) keeps label cardinality bounded
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            registry.request_finished(scope.get('method', ''), route, status[0], time.perf_counter() - t0, timers)
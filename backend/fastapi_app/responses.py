@@ -0,0 +1,114 @@
+"""Fast JSON responses for large list endpoints.
+
+`FastJSONResponse` serialises with orjson when it is installed (optional
+dependency) and falls back to the stdlib encoder otherwise. Both paths handle
+datetime/date/Decimal/UUID natively, so routes can hand over raw SQL rows
+without formatting every value in Python first.
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import tempfile
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+HAS_ORJSON = importlib.util.find_spec('orjson') is not None
+if HAS_ORJSON:
+    import orjson
+
+HAS_OPENPYXL = importlib.util.find_spec('openpyxl') is not None
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.hex()
+    if isinstance(obj, set):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(content) -> bytes:
+    """Serialise `content` to compact UTF-8 JSON bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def rows_as_dicts(columns, rows):
+    """Cursor tuples -> list of dicts keyed by column name (C-level zip, no per-value work)."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# ─── Streaming exports ─────────────────────────────────────────────────────────
+# Each encoder takes an iterable of (columns, rows) chunks from
+# SQLManager.iter_query and yields bytes; memory is bounded by one chunk.
+
+def iter_ndjson(chunks):
+    for columns, rows in chunks:
+        yield b''.join(dumps(dict(zip(columns, row))) + b'\n' for row in rows)
+
+
+def _csv_value(v):
+    if isinstance(v, (datetime, date, time)):
+        return v.isoformat()
+    return v
+
+
+def iter_csv(chunks, delimiter=';'):
+    """CSV with a UTF-8 BOM and ';' so pt-BR Excel opens it with accents intact."""
+    header_written = False
+    for columns, rows in chunks:
+        buf = io.StringIO()
+        writer = csv.writer(buf, delimiter=delimiter, lineterminator='\r\n')
+        if not header_written:
+            buf.write('\ufeff')
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buf.getvalue().encode('utf-8')
+
+
+def iter_xlsx(chunks, sheet_title='Inventario', read_size=64 * 1024):
+    """Write-only workbook spooled to a temp file, then streamed.
+
+    XLSX is a zip that is only valid once closed, so the first byte leaves
+    after the last row; memory still stays flat because rows go to disk as
+    they are appended.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    header_written = False
+    for columns, rows in chunks:
+        if not header_written:
+            ws.append(columns)
+            header_written = True
+        for row in rows:
+            ws.append([float(v) if isinstance(v, Decimal) else v for v in row])
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            data = tmp.read(read_size)
+            if not data:
+                break
+            yield data
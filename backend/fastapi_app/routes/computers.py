@@ -1,23 +1,53 @@
 from fastapi import APIRouter, HTTPException, Request, Response, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import queue
+import threading
 import time
 import re
 import logging
 from ..managers import sql_manager, ad_manager, ad_computer_manager
 from ..connections import require_dhcp_manager
+from ..responses import FastJSONResponse, HAS_OPENPYXL, dumps, iter_ndjson, iter_csv, iter_xlsx
+from ..compression import PrecompressedCache
+from ..managers.event_bus import event_bus
+from ..managers.logon_refresher import lastlogon_refresher
+from ..concurrency import run_blocking
 
 logger = logging.getLogger(__name__)
 computers_router = APIRouter()
 
+# Short-lived: the list is also dropped when a sync/warranty/detect job finishes or a
+# manual write publishes on the event bus
+computers_list_cache = PrecompressedCache(ttl=float(os.getenv('COMPUTERS_LIST_CACHE_SECONDS', '30')))
+_TERMINAL_JOB_STATUSES = {'completed', 'failed', 'cancelled'}
+
+
+def _invalidate_computers_list(event):
+    # Per-item/per-batch progress events are left to the TTL; clearing on each of
+    # them made every list request a miss for as long as a job was running
+    data = event.get('data') or {}
+    if event['topic'] == 'inventory' or data.get('status') in _TERMINAL_JOB_STATUSES:
+        computers_list_cache.clear()
+
+
+event_bus.listen(_invalidate_computers_list, {'sync', 'warranty', 'detect', 'inventory'})
+
 
 @computers_router.get('/')
-def list_computers(source: str = 'sql', inventory_filter: str = None):
+def list_computers(request: Request, source: str = 'sql', inventory_filter: str = None):
     try:
         if source == 'sql':
-            results = sql_manager.get_computers_from_sql(inventory_filter=inventory_filter)
-            # Return a pure list (compatibility with old Flask response)
-            return JSONResponse(content=results)
+            # Serialised body + gzip/br variants are cached together, so repeated loads
+            # (and offshore clients) get precompressed bytes straight from memory
+            cache_key = f'computers:{inventory_filter or ""}'
+            # Pure list (compatibility with old Flask response); datetimes serialised by dumps()
+            entry = computers_list_cache.get_or_build(
+                cache_key, lambda: dumps(sql_manager.get_computers_from_sql(inventory_filter=inventory_filter)))
+            return entry.response(request)
         else:
             results = ad_manager.get_computers()
             return JSONResponse(content=results)
@@ -26,18 +56,54 @@ def list_computers(source: str = 'sql', inventory_filter: str = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+    'csv': ('text/csv; charset=utf-8', iter_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', iter_xlsx),
+}
+
+
+@computers_router.get('/export')
+def export_computers(format: str = 'ndjson', inventory_filter: str = None, chunk_size: int = 1000):
+    """Stream the whole inventory (OS + warranty joined) as NDJSON, CSV or XLSX.
+
+    Rows come from a server-side cursor in `fetchmany` chunks, so memory stays
+    flat whatever the fleet size.
+    """
+    fmt = (format or '').lower()
+    if fmt not in _EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f'Unsupported format {format!r}; use ndjson, csv or xlsx')
+    if fmt == 'xlsx' and not HAS_OPENPYXL:
+        raise HTTPException(status_code=501, detail='XLSX export requires openpyxl on the server')
+
+    media_type, encoder = _EXPORT_FORMATS[fmt]
+    chunks = sql_manager.iter_computers(inventory_filter=inventory_filter, chunk_size=max(100, min(chunk_size, 10000)))
+    try:
+        # Run the query before sending headers so SQL errors still become a 500
+        first = next(chunks, None)
+    except Exception as e:
+        logger.exception('Error starting inventory export')
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def _chunks():
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    filename = f"inventario_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+    return StreamingResponse(encoder(_chunks()), media_type=media_type, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+
+
 @computers_router.get('/details/{computer_name}')
 def computer_details(computer_name: str):
     try:
-        # Refresh lastLogon from AD in background so it's always fresh
-        ad_last_logon = None
-        try:
-            ad_data = ad_computer_manager.find_computer(computer_name)
-            ad_last_logon = ad_data.get('lastLogon') if ad_data else None
-            if ad_last_logon:
-                sql_manager.update_last_logon(computer_name, ad_last_logon)
-        except Exception:
-            logger.warning(f'Could not refresh lastLogon from AD for {computer_name}')
+        # Answer from SQL right away; lastLogon is refreshed from AD in the background
+        # (coalesced per computer and skipped while the last check is still fresh)
+        refresh = lastlogon_refresher.schedule(computer_name)
+        ad_last_logon = refresh['ad_last_logon']
 
         # Use a richer query (join OS and organization) similar to the legacy Flask app
         q = """
@@ -80,6 +146,11 @@ def computer_details(computer_name: str):
             # If SQL still has no lastLogon but AD returned one, inject it directly
             if not computer.get('lastLogon') and ad_last_logon:
                 computer['lastLogon'] = ad_last_logon
+            computer['lastLogonRefresh'] = {
+                'refreshed': refresh['fresh'],
+                'refreshing': refresh['refreshing'],
+                'checked_at': refresh['checked_at'],
+            }
             return computer
         raise HTTPException(status_code=404, detail='Computer not found')
     except HTTPException:
@@ -216,6 +287,109 @@ def update_computer_description(computer_name: str, payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+BULK_AD_MAX_OPERATIONS = int(os.getenv('BULK_AD_MAX_OPERATIONS', '1000'))
+# Applied changes are mirrored to SQL every N computers (and always at the end)
+BULK_AD_MIRROR_EVERY = max(1, int(os.getenv('BULK_AD_MIRROR_EVERY', '50')))
+_BULK_AD_DONE = object()
+
+
+def _run_bulk_ad_operations(operations, results):
+    """Apply `operations` in AD and mirror them to SQL, putting each result on `results`.
+
+    Runs on its own thread, so a client that disconnects or reads slowly neither
+    stops the batch half way nor holds the pooled LDAP connection between items.
+    """
+    mirrored = {}   # name (lower) -> SQL change, merged when the same computer appears twice
+    summary = {'total': len(operations), 'succeeded': 0, 'failed': 0, 'unchanged': 0, 'sql_updated': 0}
+
+    def _mirror():
+        if not mirrored:
+            return
+        changes = list(mirrored.values())
+        mirrored.clear()
+        try:
+            summary['sql_updated'] += sql_manager.apply_ad_changes_bulk(changes)
+        except Exception as e:
+            logger.exception('bulk_ad_operations: SQL mirror failed')
+            summary['sql_error'] = str(e)
+
+    try:
+        for index, result in enumerate(ad_computer_manager.bulk_modify(operations)):
+            result['index'] = index
+            if not result.get('success'):
+                summary['failed'] += 1
+            elif result.get('already_in_desired_state'):
+                summary['unchanged'] += 1
+            else:
+                summary['succeeded'] += 1
+                status = result['new_status']
+                change = mirrored.setdefault(result['name'].lower(), {'name': result['name']})
+                if 'userAccountControl' in result['changed']:
+                    change.update(is_enabled=not status['disabled'], user_account_control=status['userAccountControl'])
+                if 'description' in result['changed']:
+                    change['description'] = status['description']
+            results.put(result)
+            if len(mirrored) >= BULK_AD_MIRROR_EVERY:
+                _mirror()
+    except Exception as e:
+        logger.exception('bulk_ad_operations failed')
+        summary['error'] = str(e)
+    finally:
+        _mirror()
+        summary['timestamp'] = datetime.now().isoformat()
+        results.put({'summary': summary})
+        results.put(_BULK_AD_DONE)
+
+
+@computers_router.post('/bulk')
+def bulk_ad_operations(payload: dict):
+    """Enable/disable and/or set the description of many computers in one call.
+
+    Body: {"operations": [{"name": "SHQ1234567", "action": "disable", "description": "..."}, ...]}
+    (each item needs `action` and/or `description`). DNs are resolved with one
+    OR-filter search and every modify goes over the same pooled LDAP session.
+    Streams one NDJSON line per item as it is applied, then a final
+    {"summary": ...} line. The batch runs on a background thread and is
+    mirrored to SQL in chunks of BULK_AD_MIRROR_EVERY, so it completes (and
+    SQL follows AD) even if the client goes away mid-stream.
+    """
+    operations = (payload or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise HTTPException(status_code=400, detail='Campo "operations" (lista não vazia) é obrigatório no body')
+    if len(operations) > BULK_AD_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f'Máximo de {BULK_AD_MAX_OPERATIONS} operações por chamada')
+
+    normalized = []
+    for i, op in enumerate(operations):
+        name = (op.get('name') or '').strip() if isinstance(op, dict) else ''
+        if not name:
+            raise HTTPException(status_code=400, detail=f'operations[{i}]: "name" é obrigatório')
+        action = (op.get('action') or '').lower() or None
+        if action not in (None, 'enable', 'disable'):
+            raise HTTPException(status_code=400, detail=f'operations[{i}]: ação deve ser "enable" ou "disable"')
+        if action is None and 'description' not in op:
+            raise HTTPException(status_code=400, detail=f'operations[{i}]: informe "action" e/ou "description"')
+        item = {'name': name}
+        if action:
+            item['action'] = action
+        if 'description' in op:
+            item['description'] = op['description']
+        normalized.append(item)
+
+    results = queue.Queue()
+    threading.Thread(target=_run_bulk_ad_operations, args=(normalized, results),
+                     name='bulk-ad', daemon=True).start()
+
+    def _stream():
+        while True:
+            item = results.get()
+            if item is _BULK_AD_DONE:
+                return
+            yield dumps(item) + b'\n'
+
+    return StreamingResponse(_stream(), media_type='application/x-ndjson')
+
+
 @computers_router.get('/{computer_name}/warranty')
 def get_computer_warranty(computer_name: str, force: bool = False):
     """Get warranty information for a specific computer by computer name.
@@ -584,24 +758,15 @@ def get_current_user(computer_name: str, force: bool = False):
         # Update database if successful and not forced check
         if result['status'] in ['ok', 'no_user'] and not force:
             try:
-                current_user = result.get('raw_user')
+                current_user = result.get('usuario_atual') if result.get('raw_user') else None
                 if current_user:
-                    # Get current data from database to check for changes
-                    q = "SELECT TOP 1 usuario_atual, usuario_anterior FROM computers WHERE name = ?"
-                    rows = sql_manager.execute_query(q, params=(computer_name,))
-                    
-                    if rows:
-                        db_current = rows[0].get('usuario_atual')
-                        db_previous = rows[0].get('usuario_anterior')
-                        
-                        # Update logic: if current user is different, move current to previous
-                        if db_current != current_user:
-                            update_q = "UPDATE computers SET usuario_atual = ?, usuario_anterior = ? WHERE name = ?"
-                            sql_manager.execute_query(update_q, params=(current_user, db_current, computer_name))
-                            result['updated'] = True
-                            result['previous_user'] = db_current
-                        else:
-                            result['updated'] = False
+                    # One set-based UPDATE: rotates atual -> anterior only if it changed and logs the history
+                    outcome = sql_manager.update_current_users_bulk({computer_name: current_user}, source='current_user')
+                    if outcome['changed']:
+                        result['updated'] = True
+                        result['previous_user'] = outcome['changed'][0]['previous']
+                    else:
+                        result['updated'] = False
                 
                 result['saved'] = True
             except Exception as e:
@@ -620,15 +785,38 @@ def get_current_user(computer_name: str, force: bool = False):
         }, status_code=500)
 
 
+def _utc_iso(value):
+    # computer_logon_events.observed_at is naive UTC
+    if not value:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
 @computers_router.get('/{computer_name}/last-user')
 def get_last_user(computer_name: str, days: int = 30):
     """Get last user information for a specific computer"""
     try:
-        # This is a placeholder implementation
-        # The actual last-user functionality would require Windows Event Log access
-        # which is more complex and might need dedicated WinRM connections
-        
-        # For now, return the current user data from the database
+        start = time.time()
+        days = max(1, min(days, 3650))
+
+        # Index seek on computer_logon_events (computer_id, observed_at)
+        event = sql_manager.get_last_logon_event(computer_name, days=days)
+        if event:
+            return JSONResponse(content={
+                'success': True,
+                'computer_name': computer_name,
+                'last_user': event.get('user_name'),
+                'last_logon_time': _utc_iso(event.get('observed_at')),
+                'logon_type': 'Interactive',
+                'source': event.get('source'),
+                'search_method': 'logon_events',
+                'days': days,
+                'total_time': round(time.time() - start, 3)
+            })
+
+        # No event in the window yet: fall back to the current columns
         q = """
         SELECT TOP 1 
             usuario_atual, 
@@ -644,7 +832,6 @@ def get_last_user(computer_name: str, days: int = 30):
         
         row = rows[0]
         
-        # Simulate last user response format
         result = {
             'success': True,
             'computer_name': computer_name,
@@ -652,7 +839,8 @@ def get_last_user(computer_name: str, days: int = 30):
             'last_logon_time': row.get('last_logon').isoformat() if row.get('last_logon') else None,
             'logon_type': 'Interactive',
             'search_method': 'database_cache',
-            'total_time': 0.1
+            'days': days,
+            'total_time': round(time.time() - start, 3)
         }
         
         if not result['last_user']:
@@ -671,6 +859,41 @@ def get_last_user(computer_name: str, days: int = 30):
         }, status_code=500)
 
 
+@computers_router.get('/{computer_name}/users')
+def get_computer_users(computer_name: str, days: int = 30):
+    """Users observed on a computer in the last `days` days"""
+    try:
+        days = max(1, min(days, 3650))
+        rows = sql_manager.get_computer_users(computer_name, days=days)
+        users = [{
+            'user': r.get('user_name'),
+            'first_seen': _utc_iso(r.get('first_seen')),
+            'last_seen': _utc_iso(r.get('last_seen')),
+            'observations': r.get('observations')
+        } for r in rows]
+        return JSONResponse(content={'computer_name': computer_name, 'days': days, 'users': users, 'count': len(users)})
+    except Exception as e:
+        logger.exception(f'Erro ao buscar usuários de {computer_name}')
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@computers_router.get('/{computer_name}/user-history')
+def get_user_history(computer_name: str, limit: int = 50):
+    """List the most recent user changes recorded for a computer"""
+    try:
+        rows = sql_manager.get_user_history(computer_name, limit=max(1, min(limit, 500)))
+        history = [{
+            'previous_user': r.get('previous_user'),
+            'new_user': r.get('new_user'),
+            'source': r.get('source'),
+            'changed_at': r.get('changed_at').isoformat() if r.get('changed_at') else None
+        } for r in rows]
+        return JSONResponse(content={'computer_name': computer_name, 'history': history, 'count': len(history)})
+    except Exception as e:
+        logger.exception(f'Erro ao buscar histórico de usuários de {computer_name}')
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @computers_router.post('/initialize-user-columns')
 def initialize_user_columns():
     """Initialize user columns in the computers table if they don't exist"""
@@ -711,180 +934,81 @@ def initialize_user_columns():
 
 
 @computers_router.post('/bulk-update-current-users')
-def bulk_update_current_users():
-    """Update current users for all computers (excluding servers and DCs)"""
+def bulk_update_current_users(batch_size: int = 200, throttle_limit: int = None, max_workers: int = 4):
+    """Start a background job that updates current users for all computers (excluding servers and DCs)
+
+    Returns immediately with a job id. Hostnames are sent to the DC in batches
+    of ``batch_size`` (one PowerShell script per batch) and up to
+    ``max_workers`` batches run concurrently. Poll
+    ``/bulk-update-current-users/{job_id}`` or follow ``.../stream``.
+    If a sweep is already running its job is returned instead of starting another.
+    """
     try:
-        # Get all computers excluding servers and DCs
-        q = """
-        SELECT name 
-        FROM computers 
-        WHERE is_enabled = 1 
-        AND is_domain_controller = 0
-        AND (description NOT LIKE '%server%' OR description IS NULL)
-        AND (name NOT LIKE '%DC%' AND name NOT LIKE '%SVR%')
-        ORDER BY name
-        """
-        
-        computers = sql_manager.execute_query(q)
-        
-        if not computers:
-            return JSONResponse(content={
-                'status': 'success',
-                'message': 'No computers found to update',
-                'total': 0,
-                'processed': 0,
-                'updated': 0,
-                'errors': 0
-            })
-        
-        total = len(computers)
-        processed = 0
-        updated = 0
-        errors = 0
-        results = []
-        
-        # Get DHCP manager for connections
-        dhcp = require_dhcp_manager()
-        servers = dhcp.all_servers
-        
-        if not servers:
-            raise HTTPException(status_code=503, detail='No servers available for PowerShell connections')
-        
-        server = servers[0]
-        
-        for computer_row in computers:
-            computer_name = computer_row['name']
-            processed += 1
-            
-            try:
-                # Get current user via the same method as individual endpoint
-                client = dhcp.testar_conexao_servidor(server)
-                
-                if not client:
-                    results.append({
-                        'computer': computer_name,
-                        'status': 'connection_failed',
-                        'message': 'Could not connect to server'
-                    })
-                    errors += 1
-                    continue
-                
-                # Same PowerShell script as individual endpoint
-                script = f"""
-                try {{
-                    $computer = Get-ADComputer -Identity "{computer_name}" -Properties OperatingSystem -ErrorAction Stop
-                    if ($computer.OperatingSystem -like "*Server*" -or $computer.Name -like "*DC*" -or $computer.Name -like "*SVR*") {{
-                        Write-Output "SKIP_SERVER_DC"
-                        exit
-                    }}
-                    
-                    $user = (Get-CimInstance Win32_ComputerSystem -ComputerName "{computer_name}" -ErrorAction Stop).UserName
-                    
-                    if ($user) {{
-                        Write-Output "USER:$user"
-                    }} else {{
-                        Write-Output "USER:NONE"
-                    }}
-                    Write-Output "STATUS:OK"
-                }} catch {{
-                    Write-Output "STATUS:OFFLINE"
-                }}
-                """
-                
-                output, streams, had_errors = client.execute_ps(script)
-                lines = output.strip().split('\n') if output else []
-                
-                current_user = None
-                status = 'error'
-                
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('USER:'):
-                        user = line.replace('USER:', '').strip()
-                        if user and user != 'NONE':
-                            current_user = user
-                    elif line.startswith('STATUS:'):
-                        status = line.replace('STATUS:', '').strip().lower()
-                    elif line == 'SKIP_SERVER_DC':
-                        status = 'skipped'
-                        break
-                
-                if status == 'skipped':
-                    results.append({
-                        'computer': computer_name,
-                        'status': 'skipped',
-                        'message': 'Server or DC - skipped'
-                    })
-                    continue
-                elif status == 'ok' and current_user:
-                    # Update database
-                    q_select = "SELECT TOP 1 usuario_atual, usuario_anterior FROM computers WHERE name = ?"
-                    existing = sql_manager.execute_query(q_select, params=(computer_name,))
-                    
-                    if existing:
-                        db_current = existing[0].get('usuario_atual')
-                        
-                        if db_current != current_user:
-                            # User changed - update
-                            q_update = "UPDATE computers SET usuario_atual = ?, usuario_anterior = ? WHERE name = ?"
-                            sql_manager.execute_query(q_update, params=(current_user, db_current, computer_name))
-                            updated += 1
-                            results.append({
-                                'computer': computer_name,
-                                'status': 'updated',
-                                'current_user': current_user,
-                                'previous_user': db_current
-                            })
-                        else:
-                            # No change
-                            results.append({
-                                'computer': computer_name,
-                                'status': 'no_change',
-                                'current_user': current_user
-                            })
-                    else:
-                        # Computer not found in DB
-                        results.append({
-                            'computer': computer_name,
-                            'status': 'not_found_in_db'
-                        })
-                        errors += 1
-                else:
-                    # Offline or no user
-                    results.append({
-                        'computer': computer_name,
-                        'status': 'offline_or_no_user'
-                    })
-                
-            except Exception as e:
-                results.append({
-                    'computer': computer_name,
-                    'status': 'error',
-                    'message': str(e)
-                })
-                errors += 1
-            
-            # Add small delay to avoid overwhelming the servers
-            time.sleep(0.1)
-        
-        return JSONResponse(content={
-            'status': 'success',
-            'total': total,
-            'processed': processed,
-            'updated': updated,
-            'errors': errors,
-            'results': results[:50]  # Limit results to first 50 for response size
+        job, created = _start_bulk_update_job(
+            batch_size=max(1, batch_size),
+            throttle_limit=throttle_limit,
+            max_workers=max(1, min(max_workers, 16))
+        )
+        return JSONResponse(status_code=202, content={
+            'status': 'started' if created else 'already_running',
+            'job_id': job['id'],
+            'job': job,
+            'status_url': f"/api/computers/bulk-update-current-users/{job['id']}",
+            'stream_url': f"/api/computers/bulk-update-current-users/{job['id']}/stream",
         })
-        
-    except HTTPException:
-        raise
     except Exception as e:
+        logger.exception('Erro ao iniciar bulk-update-current-users')
         return JSONResponse(content={
             'status': 'error',
             'message': str(e)
         }, status_code=500)
 
 
+@computers_router.get('/bulk-update-current-users/jobs')
+def list_bulk_update_current_users_jobs(active_only: bool = False):
+    jobs = _list_bulk_update_jobs(active_only=active_only)
+    return JSONResponse(content={'jobs': jobs, 'total': len(jobs)})
+
+
+@computers_router.get('/bulk-update-current-users/{job_id}')
+def bulk_update_current_users_status(job_id: str):
+    job = _get_bulk_update_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return JSONResponse(content=job)
+
+
+@computers_router.get('/bulk-update-current-users/{job_id}/stream')
+async def bulk_update_current_users_stream(job_id: str):
+    """Stream job progress as NDJSON: one line per change, ending at a terminal status."""
+    # Jobs of other workers are read from SQL, so keep the lookups off the loop
+    if not await run_blocking(_get_bulk_update_job, job_id):
+        raise HTTPException(status_code=404, detail='Job not found')
+
+    async def _progress():
+        last_version = None
+        while True:
+            job = await run_blocking(_get_bulk_update_job, job_id)
+            if job is None:
+                return
+            if job['version'] != last_version:
+                last_version = job['version']
+                yield json.dumps(job, default=str) + '\n'
+            if job['status'] in ('completed', 'failed', 'cancelled'):
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(_progress(), media_type='application/x-ndjson')
+
+
+@computers_router.post('/bulk-update-current-users/{job_id}/cancel')
+def cancel_bulk_update_current_users(job_id: str):
+    job = _cancel_bulk_update_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return JSONResponse(content=job)
+
+
 @computers_router.get('/user-by-service-tag/{service_tag}')
 def get_user_by_service_tag(service_tag: str):
     """Busca o usuário atual de uma máquina usando o service tag"""
@@ -930,7 +1054,14 @@ def get_user_by_service_tag(service_tag: str):
 # Detecção de usuário logado (delegado ao user_detect_service)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-from ..managers.user_detect_service import detect_user as _detect_user, run_bulk_detect_onshore as _run_bulk_detect_onshore
+from ..managers.user_detect_service import (
+    detect_user as _detect_user,
+    run_bulk_detect_onshore as _run_bulk_detect_onshore,
+    start_bulk_update_job as _start_bulk_update_job,
+    get_bulk_update_job as _get_bulk_update_job,
+    list_bulk_update_jobs as _list_bulk_update_jobs,
+    cancel_bulk_update_job as _cancel_bulk_update_job,
+)
 
 
 @computers_router.post('/{computer_name}/detect-user')
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+import logging
+
+from ..managers.dashboard_stats import dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+dashboard_router = APIRouter()
+
+
+@dashboard_router.get('/stats')
+def get_dashboard_stats():
+    """Agregados do dashboard (tamanho constante, lidos do snapshot de dashboard_stats)"""
+    try:
+        return JSONResponse(content=dashboard_stats.get_stats())
+    except Exception as e:
+        logger.exception('Erro ao obter estatísticas do dashboard')
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@dashboard_router.post('/stats/refresh')
+def refresh_dashboard_stats():
+    """Força o recálculo imediato dos agregados"""
+    try:
+        return JSONResponse(content=dashboard_stats.refresh())
+    except Exception as e:
+        logger.exception('Erro ao recalcular estatísticas do dashboard')
+        raise HTTPException(status_code=500, detail=str(e))
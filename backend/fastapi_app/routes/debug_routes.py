@@ -1,13 +1,23 @@
 from fastapi import APIRouter
-from ..connections import test_all_connections
+from ..connections import test_all_connections, get_connection_statuses, start_connection_tests
 
 debug_router = APIRouter()
 
 
 @debug_router.get('/connections')
-def debug_connections():
-    """Return a summary of connection availability for SQL, DHCP, Dell API, etc."""
+def debug_connections(refresh: bool = False, wait: bool = False):
+    """Return a summary of connection availability for SQL, DHCP, Dell API, etc.
+
+    Served from the cached background check; `refresh=true` starts a new
+    check and `wait=true` runs it inline (slow: binds LDAP, Dell OAuth, WinRM).
+    """
     try:
-        return test_all_connections()
+        if wait:
+            return test_all_connections()
+        statuses = get_connection_statuses()
+        if refresh or statuses['checked_at'] is None:
+            start_connection_tests()
+            statuses = get_connection_statuses()
+        return statuses
     except Exception as e:
         return {'error': str(e)}
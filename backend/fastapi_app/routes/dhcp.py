@@ -1,6 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+import functools
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from ..connections import require_dhcp_manager
+from ..responses import dumps
+from ..managers.dhcp_filters import dhcp_filter_store
 
 dhcp_router = APIRouter()
 
@@ -19,19 +27,99 @@ def get_servers():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@dhcp_router.get('/snapshots')
+def get_filter_snapshots():
+    """Age, size and ETag of each server's local DHCP filter snapshot."""
+    return JSONResponse(content={'servers': dhcp_filter_store.status()})
+
+
+@dhcp_router.post('/snapshots/{server}/refresh')
+def refresh_filter_snapshot(server: str):
+    """Re-download one server's filter list now (one WinRM call)."""
+    dhcp = require_dhcp_manager()
+    server = server.upper()
+    if server not in dhcp.all_servers:
+        raise HTTPException(status_code=404, detail=f'Servidor DHCP desconhecido: {server}')
+    try:
+        index = dhcp_filter_store.refresh(server)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f'Falha ao atualizar {server}: {e}')
+    return JSONResponse(content={'server': server, 'etag': index.etag,
+                                 'fetched_at': index.fetched_at.isoformat(), **index.counts()})
+
+
+def _filter_row(f, service_tag=None):
+    return {
+        'filter_type': f['filter_type'],
+        'mac_address': f['mac_address'],
+        'match_field': 'description',
+        'description': f['description'],
+        'name': service_tag or '',
+    }
+
+
 @dhcp_router.get('/filters/{ship_name}')
-def get_dhcp_filters_by_ship(ship_name: str, service_tag: str = None, include_filters: bool = True):
-    """Get DHCP filters for a specific ship/organization"""
+def get_dhcp_filters_by_ship(ship_name: str, request: Request, service_tag: str = None, include_filters: bool = True,
+                             filter_type: str = None, page: int = 1, page_size: int = 100, refresh: bool = False):
+    """DHCP allow/deny filters of a ship (prefix like ESM or organization like ESMERALDA).
+
+    Served from the local filter snapshots, so no WinRM call per view. `service_tag`
+    narrows the list to filters whose description contains it (same match as
+    /search) and fills `search_results`; `include_filters=false` skips the list
+    itself. The ETag changes whenever a server snapshot or the query changes;
+    If-None-Match answers 304.
+    """
     try:
         dhcp = require_dhcp_manager()
-        
-        # This route currently returns 404 as the full implementation is not ready
-        # The /search route should be used instead for now
-        raise HTTPException(
-            status_code=404, 
-            detail=f"DHCP filters endpoint for {ship_name} not implemented. Use /dhcp/search instead."
-        )
-        
+        org = dhcp.get_organization_from_prefix(ship_name)
+        servers = dhcp.org_to_servers.get(org)
+        if not servers:
+            raise HTTPException(status_code=404, detail=f'Navio/organização desconhecido: {ship_name}')
+        if filter_type:
+            filter_type = filter_type.capitalize()
+            if filter_type not in ('Allow', 'Deny'):
+                raise HTTPException(status_code=400, detail='filter_type deve ser "Allow" ou "Deny"')
+        page = max(1, page)
+        page_size = max(1, min(page_size, 1000))
+
+        try:
+            indexes = [dhcp_filter_store.get(s, refresh=refresh) for s in servers]
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f'Filtros DHCP de {ship_name} indisponíveis: {e}')
+
+        query = f'{service_tag or ""}|{filter_type or ""}|{page}|{page_size}|{int(include_filters)}'
+        etag = '"' + hashlib.sha1(('|'.join(i.etag for i in indexes) + '|' + query).encode('utf-8')).hexdigest() + '"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+            return Response(status_code=304, headers=headers)
+
+        matched = []
+        for index in indexes:
+            matched += index.search(service_tag, filter_type) if service_tag else index.search('', filter_type)
+        counts = {'total': 0, 'allow_count': 0, 'deny_count': 0}
+        for index in indexes:
+            for k, v in index.counts().items():
+                counts[k] += v
+
+        body = {
+            'ship_name': ship_name,
+            'organization': org,
+            'dhcp_server': servers[0],
+            'servers': servers,
+            'filters': counts,
+            'timestamp': min(i.fetched_at for i in indexes).isoformat(),
+            'source': 'snapshot',
+        }
+        if service_tag:
+            body.update(service_tag=service_tag, service_tag_found=bool(matched),
+                        search_results=[_filter_row(f, service_tag) for f in matched])
+        if include_filters:
+            offset = (page - 1) * page_size
+            body['items'] = [_filter_row(f) for f in matched[offset:offset + page_size]]
+            body['pagination'] = {'page': page, 'page_size': page_size, 'total_items': len(matched),
+                                  'total_pages': (len(matched) + page_size - 1) // page_size}
+        return JSONResponse(content=body, headers=headers)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -39,7 +127,18 @@ def get_dhcp_filters_by_ship(ship_name: str, service_tag: str = None, include_fi
 
 
 @dhcp_router.post('/search')
-def search(payload: dict):
+def search(payload: dict, request: Request):
+    """Search a service tag in the DHCP allow-filters of the ship servers, all at once.
+
+    Body: {"service_tag": ..., "ships": [prefixes], "timeout": seconds, "stream": bool,
+    "refresh": bool, "live": bool}. Answers come from the local filter snapshots
+    (refreshed first with "refresh": true, or when missing/too old); "live": true
+    (or DHCP_SEARCH_SOURCE=live) runs the old per-server PowerShell search instead.
+    Servers are queried concurrently with a shared deadline. With "stream": true
+    (or Accept: application/x-ndjson) each server's result is sent as an NDJSON
+    line as soon as it answers, followed by a {"summary": ...} line; otherwise
+    the usual {"results": [...]} comes back once every server answered or timed out.
+    """
     try:
         tag = payload.get('service_tag')
         ships = payload.get('ships') or []
@@ -51,12 +150,91 @@ def search(payload: dict):
             servers += dhcp.org_to_servers.get(org, [])
         if not servers:
             servers = dhcp.all_servers
+        servers = list(dict.fromkeys(servers))
+
+        buscar = None
+        if not payload.get('live') and os.getenv('DHCP_SEARCH_SOURCE', 'snapshot') != 'live':
+            buscar = functools.partial(dhcp_filter_store.buscar_service_tag, refresh=bool(payload.get('refresh')))
+        results = dhcp.buscar_service_tag_paralelo(servers, tag, deadline=payload.get('timeout'), buscar=buscar)
+        wants_stream = payload.get('stream') or 'application/x-ndjson' in request.headers.get('accept', '')
+        if wants_stream:
+            def _stream():
+                t0 = time.time()
+                statuses = {}
+                for res in results:
+                    statuses[res['status']] = statuses.get(res['status'], 0) + 1
+                    yield dumps(res) + b'\n'
+                yield dumps({'summary': {'servers': len(servers), 'statuses': statuses,
+                                         'elapsed': round(time.time() - t0, 3)}}) + b'\n'
 
-        results = []
-        for s in servers:
-            res = dhcp.buscar_service_tag_servidor(s, tag)
-            results.append(res)
+            return StreamingResponse(_stream(), media_type='application/x-ndjson')
 
-        return JSONResponse(content={'results': results})
+        # Keep the server order of the request for the non-streamed response
+        by_server = {res['servidor']: res for res in results}
+        return JSONResponse(content={'results': [by_server[s] for s in servers if s in by_server]})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+DHCP_BULK_MAX_TAGS = int(os.getenv('DHCP_BULK_MAX_TAGS', '5000'))
+
+
+@dhcp_router.post('/search/bulk')
+def search_bulk(payload: dict):
+    """Look up many service tags / computer names at once against the filter snapshots.
+
+    Body: {"service_tags": [...], "refresh": bool}. Tags are grouped by ship
+    (prefix_to_org -> org_to_servers) only when a ship prefix is followed by a
+    full tag; bare 7-character Dell tags and unknown prefixes go to every server, and
+    each server's snapshot is matched once for its whole group. Returns
+    {"results": {tag: [{mac_address, server, filter_type, description}]},
+    "not_found": [...], "servers": {server: {fetched_at, error}}}.
+    """
+    tags = payload.get('service_tags') if payload else None
+    if not isinstance(tags, list) or not tags:
+        raise HTTPException(status_code=400, detail='Campo "service_tags" (lista não vazia) é obrigatório no body')
+    if len(tags) > DHCP_BULK_MAX_TAGS:
+        raise HTTPException(status_code=400, detail=f'Máximo de {DHCP_BULK_MAX_TAGS} service tags por chamada')
+    tags = list(dict.fromkeys(str(t).strip() for t in tags if t and str(t).strip()))
+
+    try:
+        dhcp = require_dhcp_manager()
+        t0 = time.time()
+        by_server = {}
+        for tag in tags:
+            # Uma service tag Dell tem 7 caracteres: "TOP1234" é tag pura e pode estar em
+            # qualquer navio; só "TOPABC1234" identifica o navio pelo prefixo
+            org = dhcp.prefix_to_org.get(tag[:3].upper()) if len(tag) > 7 else None
+            for server in dhcp.org_to_servers.get(org) or dhcp.all_servers:
+                by_server.setdefault(server, []).append(tag)
+
+        refresh = bool(payload.get('refresh'))
+        with ThreadPoolExecutor(max_workers=max(1, len(by_server)), thread_name_prefix='dhcp-bulk') as pool:
+            futures = {server: pool.submit(dhcp_filter_store.match_service_tags, server, server_tags, refresh)
+                       for server, server_tags in by_server.items()}
+
+        results, servers = {}, {}
+        for server, future in futures.items():
+            snapshot = dhcp_filter_store.peek(server)
+            servers[server] = {'fetched_at': snapshot.fetched_at.isoformat() if snapshot else None, 'error': None}
+            if future.exception() is not None:
+                servers[server]['error'] = str(future.exception())
+                continue
+            for tag, matches in future.result().items():
+                results.setdefault(tag, []).extend({
+                    'mac_address': f['mac_address'],
+                    'server': server,
+                    'filter_type': f['filter_type'],
+                    'description': f['description'],
+                } for f in matches)
+
+        return JSONResponse(content={
+            'results': results,
+            'not_found': [t for t in tags if t not in results],
+            'servers': servers,
+            'elapsed': round(time.time() - t0, 3),
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
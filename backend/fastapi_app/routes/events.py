@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import logging
+
+from ..managers.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+events_router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+
+def _format_sse(event):
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+def _matches_job(event, job_id):
+    return job_id is None or event['data'].get('job_id') in (None, job_id)
+
+
+@events_router.get('/stream')
+async def stream_events(
+    request: Request,
+    topics: Optional[str] = None,
+    job_id: Optional[str] = None,
+    last_event_id: Optional[int] = None
+):
+    """Server-Sent Events com o progresso de jobs (warranty, sync, detect).
+
+    `topics` é uma lista separada por vírgula; `job_id` filtra um job. Na
+    reconexão o navegador manda `Last-Event-ID` e os eventos perdidos que
+    ainda estão no buffer são reenviados antes dos novos.
+    """
+    wanted = {t.strip() for t in topics.split(',') if t.strip()} if topics else None
+    header_id = request.headers.get('last-event-id')
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    # Assina antes de ler o buffer para não perder eventos entre os dois passos
+    sub = event_bus.subscribe(wanted)
+    backlog, gap = event_bus.events_since(last_event_id, wanted)
+
+    async def _events():
+        sent = last_event_id or 0
+        try:
+            yield 'retry: 3000\n\n'
+            if gap:
+                # Parte do histórico já saiu do buffer: o cliente deve recarregar o status completo
+                yield f"event: reset\ndata: {json.dumps({'reason': 'buffer_overflow'})}\n\n"
+            for event in backlog:
+                if _matches_job(event, job_id):
+                    sent = event['id']
+                    yield _format_sse(event)
+            while True:
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                if sub.overflowed:
+                    yield f"event: reset\ndata: {json.dumps({'reason': 'slow_consumer'})}\n\n"
+                    return
+                if event['id'] <= sent or not _matches_job(event, job_id):
+                    continue
+                sent = event['id']
+                yield _format_sse(event)
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(_events(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@events_router.get('/recent')
+def recent_events(topics: Optional[str] = None, after: int = 0, limit: int = 200):
+    """Eventos ainda no buffer (debug / clientes sem EventSource)."""
+    wanted = {t.strip() for t in topics.split(',') if t.strip()} if topics else None
+    events, gap = event_bus.events_since(after, wanted)
+    return {'events': events[-max(1, min(limit, 2000)):], 'gap': gap, 'last_id': event_bus.last_id}
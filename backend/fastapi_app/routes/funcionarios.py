@@ -5,6 +5,7 @@ import logging
 import re
 from ..managers.corpore_db import DatabaseConfig
 from ..managers import sql_manager
+from ..concurrency import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -52,21 +53,11 @@ def extrair_nome_completo_email(email_corporativo: str) -> tuple:
     return nome_formatado, None
 
 
-@funcionarios_router.get('/')
-async def listar_funcionarios(
-    unidade: Optional[str] = None, 
-    search: Optional[str] = None, 
-    limit: Optional[int] = Query(None, ge=1), 
-    include_demitidos: Optional[int] = Query(0, ge=0, le=1)
-):
-    """Lista funcionários atuais no sistema CorporeRM usando pyodbc.
-
-    Exclui funcionários cuja situação atual seja 'Demitido'.
-    Parâmetros opcionais: unidade (filtro por cidade), search (pesquisa em chapa/nome), limit (limita resultados).
-    """
+def _consultar_funcionarios(unidade, search, limit, include_demitidos):
+    """Consulta bloqueante (pyodbc) na VW_FUNCIONARIOS do CorporeRM."""
+    # abrir conexão pyodbc para CorporeRM
+    conn = DatabaseConfig.get_pyodbc_connection('corporerm')
     try:
-        # abrir conexão pyodbc para CorporeRM
-        conn = DatabaseConfig.get_pyodbc_connection('corporerm')
         cursor = conn.cursor()
 
         base_query = '''
@@ -139,8 +130,25 @@ async def listar_funcionarios(
                 'demitido': demitido_flag,
                 'secao_atual_descricao': row_dict.get('secao_atual_descricao') or ''
             })
-
+        return results
+    finally:
         conn.close()
+
+
+@funcionarios_router.get('/')
+async def listar_funcionarios(
+    unidade: Optional[str] = None, 
+    search: Optional[str] = None, 
+    limit: Optional[int] = Query(None, ge=1), 
+    include_demitidos: Optional[int] = Query(0, ge=0, le=1)
+):
+    """Lista funcionários atuais no sistema CorporeRM usando pyodbc.
+
+    Exclui funcionários cuja situação atual seja 'Demitido'.
+    Parâmetros opcionais: unidade (filtro por cidade), search (pesquisa em chapa/nome), limit (limita resultados).
+    """
+    try:
+        results = await run_blocking(_consultar_funcionarios, unidade, search, limit, include_demitidos)
         return JSONResponse({'success': True, 'funcionarios': results, 'count': len(results)})
     except HTTPException:
         raise
@@ -182,7 +190,7 @@ async def vincular_usuario_computador(payload: dict):
         
         # Verificar se o computador existe
         computer_query = "SELECT id, Usuario_Atual, Usuario_Anterior FROM computers WHERE name = ?"
-        computer_result = sql_manager.execute_query(computer_query, params=(computer_name,))
+        computer_result = await run_blocking(sql_manager.execute_query, computer_query, params=(computer_name,))
         
         if not computer_result:
             raise HTTPException(status_code=404, detail=f"Computador {computer_name} não encontrado")
@@ -193,32 +201,16 @@ async def vincular_usuario_computador(payload: dict):
         # Verificar se é computador SHQ para atualizar status para "Em uso"
         is_shq_computer = computer_name.upper().startswith('SHQ')
         
-        # Atualizar o computador com o novo usuário e status
-        if is_shq_computer:
-            update_query = """
-                UPDATE computers 
-                SET Usuario_Atual = ?, 
-                    Usuario_Anterior = ?,
-                    Status = 'Em uso',
-                    updated_at = GETDATE()
-                WHERE name = ?
-            """
-        else:
-            update_query = """
-                UPDATE computers 
-                SET Usuario_Atual = ?, 
-                    Usuario_Anterior = ?,
-                    updated_at = GETDATE()
-                WHERE name = ?
-            """
-        
         # Se já havia um usuário atual, ele vai para anterior
         novo_usuario_anterior = usuario_atual_anterior if usuario_atual_anterior else computer.get('Usuario_Anterior')
         
-        sql_manager.execute_query(
-            update_query, 
-            params=(nome_formatado, novo_usuario_anterior, computer_name),
-            fetch=False
+        # Atualizar o computador com o novo usuário (e status "Em uso" se SHQ), registrando no histórico
+        await run_blocking(
+            sql_manager.set_current_user,
+            computer_name,
+            nome_formatado,
+            status='Em uso' if is_shq_computer else None,
+            source='vincular'
         )
         
         logger.info(f"Usuário vinculado com sucesso: {nome_formatado} -> {computer_name}")
@@ -262,7 +254,7 @@ async def desvincular_usuario_computador(payload: dict):
         
         # Verificar se o computador existe
         computer_query = "SELECT id, Usuario_Atual, Usuario_Anterior FROM computers WHERE name = ?"
-        computer_result = sql_manager.execute_query(computer_query, params=(computer_name,))
+        computer_result = await run_blocking(sql_manager.execute_query, computer_query, params=(computer_name,))
         
         if not computer_result:
             raise HTTPException(status_code=404, detail=f"Computador {computer_name} não encontrado")
@@ -276,26 +268,14 @@ async def desvincular_usuario_computador(payload: dict):
         # Verificar se é computador SHQ para atualizar status para "spare"
         is_shq_computer = computer_name.upper().startswith('SHQ')
         
-        # Mover usuário atual para anterior e limpar atual, atualizar status se for SHQ
-        if is_shq_computer:
-            update_query = """
-                UPDATE computers 
-                SET Usuario_Atual = NULL,
-                    Usuario_Anterior = ?,
-                    Status = 'spare',
-                    updated_at = GETDATE()
-                WHERE name = ?
-            """
-        else:
-            update_query = """
-                UPDATE computers 
-                SET Usuario_Atual = NULL,
-                    Usuario_Anterior = ?,
-                    updated_at = GETDATE()
-                WHERE name = ?
-            """
-        
-        sql_manager.execute_query(update_query, params=(usuario_atual, computer_name), fetch=False)
+        # Mover usuário atual para anterior e limpar atual, atualizar status se for SHQ (registrando no histórico)
+        await run_blocking(
+            sql_manager.set_current_user,
+            computer_name,
+            None,
+            status='spare' if is_shq_computer else None,
+            source='desvincular'
+        )
         
         logger.info(f"Usuário {usuario_atual} desvinculado do computador {computer_name}")
         
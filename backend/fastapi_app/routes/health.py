@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..managers.health import health_prober
+
+health_router = APIRouter()
+
+
+@health_router.get('/live')
+async def liveness():
+    """Processo de pé e atendendo (não toca em nenhuma dependência)."""
+    return {'status': 'alive', 'uptime_seconds': health_prober.snapshot()['uptime_seconds']}
+
+
+@health_router.get('/ready')
+async def readiness():
+    """Snapshot em cache das dependências; 503 enquanto as críticas estiverem fora."""
+    snapshot = health_prober.snapshot()
+    return JSONResponse(content=snapshot, status_code=200 if snapshot['ready'] else 503)
+
+
+@health_router.get('')
+async def health():
+    return health_prober.snapshot()
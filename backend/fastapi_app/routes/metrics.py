@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import registry
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get('')
+async def metrics():
+    """Prometheus scrape endpoint (text format 0.0.4)."""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
@@ -5,6 +5,7 @@ import logging
 from datetime import datetime, date
 
 from ..managers import sql_manager
+from ..responses import FastJSONResponse, rows_as_dicts
 
 logger = logging.getLogger(__name__)
 
@@ -65,17 +66,15 @@ def list_mobiles(limit: Optional[int] = Query(100, ge=1), search: Optional[str]
         except Exception:
             top_n = 100
         base_q = f"SELECT TOP {top_n} * FROM mobiles"
-        rows = sql_manager.execute_query(base_q)
+        columns, rows = sql_manager.fetch_rows(base_q)
 
-        # Simple search filter in-memory if requested
+        # Simple search filter in-memory if requested (on the raw tuples)
         if search and rows:
             q = search.lower()
-            rows = [r for r in rows if any(q in (str(v) or '').lower() for v in r.values())]
+            rows = [r for r in rows if any(q in str(v).lower() for v in r if v is not None)]
 
-        # Prepare rows for JSON serialization
-        serialized_rows = prepare_rows_for_json(rows)
-        
-        return JSONResponse(content={'success': True, 'mobiles': serialized_rows, 'count': len(serialized_rows)})
+        mobiles = rows_as_dicts(columns, rows)
+        return FastJSONResponse(content={'success': True, 'mobiles': mobiles, 'count': len(mobiles)})
     except Exception as e:
         logger.exception('Error listing mobiles')
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from ..managers.dell import dell_api, dell_warranty_manager
+from ..responses import FastJSONResponse, rows_as_dicts
 
 warranty_router = APIRouter()
 
@@ -91,7 +92,8 @@ def get_warranties_from_database():
         ORDER BY c.name
         """
         
-        warranties = sql_manager.execute_query(query)
+        columns, rows = sql_manager.fetch_rows(query)
+        warranties = rows_as_dicts(columns, rows)
         
         # Process results to include service tags extracted from computer names
         for warranty in warranties:
@@ -100,12 +102,13 @@ def get_warranties_from_database():
                 extracted_tag = sql_manager.extract_service_tag_from_computer_name(warranty['computer_name'])
                 warranty['service_tag'] = extracted_tag
         
-        return {
+        # FastJSONResponse skips FastAPI's jsonable_encoder walk over every row
+        return FastJSONResponse(content={
             'warranties': warranties,
             'total': len(warranties),
             'with_warranty_data': len([w for w in warranties if w.get('warranty_status')]),
             'needs_update': len([w for w in warranties if w.get('needs_update')])
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching warranties from database: {str(e)}")
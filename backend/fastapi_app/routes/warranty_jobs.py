@@ -7,17 +7,62 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 
 from ..config import settings
+from ..managers.event_bus import publish
+from ..managers.coordination import job_store
 
 router = APIRouter()
 
 # Simple in-memory job store (job_id -> status dict)
 import threading as _threading
 
-# Simple in-memory job store (job_id -> status dict)
+# Simple in-memory job store (job_id -> status dict); snapshots are mirrored to
+# coordination.job_store so every uvicorn worker can answer status requests
+_JOB_KIND = 'warranty_refresh'
 _jobs = {}
 _jobs_lock = _threading.Lock()
 
 
+_PROGRESS_FIELDS = (
+    'status', 'total', 'processed', 'progress_percent', 'success_count', 'error_count',
+    'current_batch', 'total_batches', 'current_processing', 'last_batch_duration',
+    'started_at', 'ended_at', 'error'
+)
+
+
+def _publish_progress(jid, item=None):
+    """Publish an incremental progress event (summary fields + the item just processed)."""
+    job = _jobs.get(jid) or {}
+    data = {'job_id': jid}
+    data.update({k: job.get(k) for k in _PROGRESS_FIELDS if k in job})
+    if item is not None:
+        data['item'] = item
+    publish('warranty', data)
+    # Item-less calls mark status/total changes: write those through immediately
+    _persist(jid, force=item is None)
+
+
+def _persist(jid, force=False):
+    """Mirror the job to the shared job store (throttled, terminal states always written)."""
+    with _jobs_lock:
+        job = _jobs.get(jid)
+        if job is None:
+            return
+        snapshot = dict(job)
+        snapshot['current_batch_items'] = list(job.get('current_batch_items') or [])
+    job_store.save(jid, _JOB_KIND, snapshot, force=force)
+
+
+def _get_job(job_id):
+    """Local job if this worker runs it, else the snapshot from the shared job store."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    try:
+        return job_store.get(job_id, _JOB_KIND)
+    except Exception:
+        return None
+
+
 def _chunk_list(seq, size=100):
     for i in range(0, len(seq), size):
         yield seq[i:i + size]
@@ -113,6 +158,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
         'ended_at': None,
         'error': None
     }
+    _persist(job_id, force=True)
 
     def _job_runner(jid: str):
         try:
@@ -120,6 +166,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
             with _jobs_lock:
                 _jobs[jid]['status'] = 'running'
                 _jobs[jid]['started_at'] = time.time()
+            _publish_progress(jid)
 
             # Use the new Dell API manager instead of legacy script
             from ..managers.dell import dell_api, dell_warranty_manager
@@ -146,6 +193,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
                     _jobs[jid]['status'] = 'failed'
                     _jobs[jid]['error'] = 'Dell API client not available'
                     _jobs[jid]['ended_at'] = time.time()
+                _publish_progress(jid)
                 return
 
             # Get list of computers from SQL manager (service tags already extracted in SQL)
@@ -158,6 +206,15 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
             
             logger.info(f"Processing {len(tags)} service tags: {tags[:5]}{'...' if len(tags) > 5 else ''}")
 
+            # Resolve every computer in AD up front (a few OR-filter searches) for the OS
+            # update below, instead of one LDAP lookup per tag; None = fall back per tag
+            ad_computers = None
+            try:
+                from ..managers import ad_computer_manager
+                ad_computers = ad_computer_manager.find_computers([c['name'] for c in computers_with_tags if c.get('name')])
+            except Exception as e:
+                logger.warning(f"Could not resolve computers in AD for OS update: {e}")
+
             # Processar de 10 em 10 para melhor controle de progresso
             batches = list(_chunk_list(tags, 10))
             _jobs[jid]['total'] = len(tags)
@@ -174,6 +231,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
                     _jobs[jid]['current_batch'] = batch_idx + 1
                     _jobs[jid]['current_batch_items'] = []
                     _jobs[jid]['batch_start_time'] = batch_start_time
+                _publish_progress(jid)
                 
                 logger.info(f"Starting batch {batch_idx + 1}/{len(batches)} with {len(batch)} items")
                 
@@ -204,7 +262,10 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
                                     
                                     # Also update OS for this computer (sync from AD)
                                     try:
-                                        sql_manager.update_os_for_computer_by_name(computer_name)
+                                        if ad_computers is None:
+                                            sql_manager.update_os_for_computer_by_name(computer_name)
+                                        elif computer_name in ad_computers:
+                                            sql_manager.update_os_for_computer_by_name(computer_name, ad_computers[computer_name])
                                     except Exception:
                                         pass  # non-critical
                                     
@@ -254,6 +315,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
                             _jobs[jid]['error_count'] = error_count
                             # Update progress percentage
                             _jobs[jid]['progress_percent'] = int((processed_count / len(tags)) * 100)
+                        _publish_progress(jid, _jobs[jid]['current_batch_items'][-1] if _jobs[jid]['current_batch_items'] else None)
                         
                     except Exception as e:
                         # Continue on API errors
@@ -269,6 +331,7 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
                             'error': str(e)[:50] + '...' if len(str(e)) > 50 else str(e)
                         })
                         logger.exception(f"❌ Exception for {service_tag}: {e}")
+                        _publish_progress(jid, _jobs[jid]['current_batch_items'][-1])
 
                 # Batch completion
                 batch_duration = time.time() - batch_start_time
@@ -285,22 +348,24 @@ def start_warranty_refresh(background_tasks: BackgroundTasks, mode: Optional[str
             with _jobs_lock:
                 _jobs[jid]['status'] = 'completed'
                 _jobs[jid]['ended_at'] = time.time()
+            _publish_progress(jid)
         except Exception as e:
             with _jobs_lock:
                 _jobs[jid]['status'] = 'failed'
                 _jobs[jid]['error'] = str(e)
                 _jobs[jid]['ended_at'] = time.time()
+            _publish_progress(jid)
 
     # Start thread
     thread = threading.Thread(target=_job_runner, args=(job_id,), daemon=True)
     thread.start()
 
-    return {'job_id': job_id}
+    return {'job_id': job_id, 'stream_url': f'/api/events/stream?topics=warranty&job_id={job_id}'}
 
 
 @router.get("/computers/warranty-refresh/{job_id}")
 def warranty_refresh_status(job_id: str):
-    job = _jobs.get(job_id)
+    job = _get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail='Job not found')
 
@@ -387,7 +452,14 @@ def get_active_warranty_jobs():
     """Get list of active warranty jobs"""
     try:
         active_jobs = []
-        for job_id, job_data in _jobs.items():
+        jobs = dict(_jobs)
+        try:
+            # Jobs running on other workers
+            for remote in job_store.list_active(_JOB_KIND):
+                jobs.setdefault(remote['id'], remote)
+        except Exception:
+            pass
+        for job_id, job_data in jobs.items():
             if job_data.get('status') in ['pending', 'running']:
                 active_jobs.append({
                     'job_id': job_id,
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+
+from backend.fastapi_app.managers.ad_computer import ADComputerManager, ComputerLookupCache
+
+
+class _Attr:
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+
+class _Entry:
+    def __init__(self, name, uac, description=''):
+        self.cn = _Attr(name)
+        self.distinguishedName = _Attr(f'CN={name},OU=Ships,DC=corp,DC=local')
+        self.userAccountControl = _Attr(uac)
+        self.description = _Attr(description)
+        self.operatingSystem = _Attr('Windows 11 Pro')
+        self.operatingSystemVersion = _Attr('10.0 (22631)')
+        self.lastLogonTimestamp = _Attr(None)
+        self.lastLogon = _Attr(None)
+
+
+class _Conn:
+    def __init__(self, entries):
+        self._all = entries
+        self.entries = []
+        self.searches = []
+        self.modified = []
+        self.result = {}
+
+    def search(self, search_base, search_filter, **kwargs):
+        self.searches.append(search_filter)
+        self.entries = [e for e in self._all if f'(cn={e.cn.value})'.lower() in search_filter.lower()]
+        return True
+
+    def modify(self, dn, changes):
+        self.modified.append((dn, sorted(changes)))
+        return True
+
+
+class _Pool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.checkouts = 0
+
+    @contextmanager
+    def connection(self):
+        self.checkouts += 1
+        yield self.conn
+
+    def run(self, operation):
+        with self.connection() as conn:
+            return operation(conn)
+
+
+def test_bulk_resolves_once_and_reuses_one_connection():
+    conn = _Conn([_Entry('PC-001', 4096), _Entry('PC-002', 4098, 'old')])
+    pool = _Pool(conn)
+    manager = ADComputerManager(pool=pool, cache=ComputerLookupCache(ttl=60))
+
+    results = list(manager.bulk_modify([
+        {'name': 'PC-001', 'action': 'disable', 'description': 'decommissioned'},
+        {'name': 'PC-002', 'action': 'disable'},
+        {'name': 'PC-404', 'action': 'enable'},
+    ]))
+
+    assert pool.checkouts == 1 and len(conn.searches) == 1
+    assert results[0]['success'] and results[0]['changed'] == ['description', 'userAccountControl']
+    assert results[0]['new_status']['userAccountControl'] == 4098
+    assert results[1]['already_in_desired_state']
+    assert not results[2]['success'] and 'PC-404' in results[2]['error']
+    assert conn.modified == [('CN=PC-001,OU=Ships,DC=corp,DC=local', ['description', 'userAccountControl'])]
+
+
+def test_bulk_escapes_filter_values():
+    conn = _Conn([])
+    manager = ADComputerManager(pool=_Pool(conn), cache=ComputerLookupCache(ttl=60))
+    list(manager.bulk_modify([{'name': 'PC*)(cn=x', 'action': 'enable'}]))
+    assert '(cn=PC\\2a\\29\\28cn=x)' in conn.searches[0]
+
+
+def test_find_computers_chunks_filters_and_primes_cache():
+    conn = _Conn([_Entry(f'PC-{i:03d}', 4096) for i in range(5)])
+    manager = ADComputerManager(pool=_Pool(conn), cache=ComputerLookupCache(ttl=60))
+    manager.lookup_chunk_size = 2
+
+    found = manager.find_computers(['pc-000', 'PC-001', 'PC-002', 'PC-003', 'PC-404'])
+    assert sorted(found) == ['PC-001', 'PC-002', 'PC-003', 'pc-000']
+    assert found['pc-000']['name'] == 'PC-000'
+    assert len(conn.searches) == 3
+
+    assert manager.find_computer('PC-002')['dn'].startswith('CN=PC-002')
+    manager.find_computers(['PC-001', 'PC-003'])
+    assert len(conn.searches) == 3
+
+
+def test_bulk_route_mirrors_to_sql_in_chunks_without_a_reader(monkeypatch):
+    import queue
+    from backend.fastapi_app.routes import computers as routes
+
+    def bulk_modify(operations):
+        for op in operations:
+            yield {'name': op['name'], 'success': True, 'changed': ['userAccountControl'],
+                   'new_status': {'disabled': True, 'userAccountControl': 4098}}
+
+    mirrored = []
+    monkeypatch.setattr(routes, 'BULK_AD_MIRROR_EVERY', 2)
+    monkeypatch.setattr(routes.ad_computer_manager, 'bulk_modify', bulk_modify)
+    monkeypatch.setattr(routes.sql_manager, 'apply_ad_changes_bulk', lambda changes: mirrored.append(changes) or len(changes))
+
+    # Nobody consumes the stream: the run still finishes and every change reaches SQL
+    results = queue.Queue()
+    routes._run_bulk_ad_operations([{'name': f'SHQ000{i}', 'action': 'disable'} for i in range(5)], results)
+    items = [results.get_nowait() for _ in range(results.qsize())]
+
+    assert [len(chunk) for chunk in mirrored] == [2, 2, 1]
+    assert items[-1] is routes._BULK_AD_DONE
+    assert items[-2]['summary']['succeeded'] == 5
+    assert items[-2]['summary']['sql_updated'] == 5
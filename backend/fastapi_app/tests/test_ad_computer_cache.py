@@ -0,0 +1,37 @@
+from backend.fastapi_app.managers.ad_computer import ComputerLookupCache
+
+
+def test_lookup_is_cached_until_invalidated():
+    cache = ComputerLookupCache(ttl=60, max_entries=10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'name': 'PC-001', 'disabled': False}
+
+    first = cache.get_or_load('PC-001', loader)
+    first['disabled'] = True  # callers get copies
+    assert cache.get_or_load('pc-001', loader) == {'name': 'PC-001', 'disabled': False}
+    assert len(calls) == 1
+
+    cache.invalidate('PC-001')
+    cache.get_or_load('PC-001', loader)
+    assert len(calls) == 2
+
+
+def test_write_during_lookup_does_not_cache_old_value():
+    cache = ComputerLookupCache(ttl=60, max_entries=10)
+
+    def stale_loader():
+        cache.invalidate('PC-001')  # a toggle finishing while the lookup is in flight
+        return {'name': 'PC-001', 'disabled': False}
+
+    cache.get_or_load('PC-001', stale_loader)
+    assert len(cache) == 0
+
+
+def test_cache_is_bounded():
+    cache = ComputerLookupCache(ttl=60, max_entries=2)
+    for name in ('A', 'B', 'C'):
+        cache.get_or_load(name, lambda: {'name': name})
+    assert len(cache) == 2
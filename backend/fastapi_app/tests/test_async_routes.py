@@ -0,0 +1,54 @@
+"""Async routes must not run blocking I/O on the event loop.
+
+Static check (no app import needed): inside every `async def` under routes/,
+calls into pyodbc/LDAP/WinRM managers, DB cursors, requests, subprocess or
+time.sleep are only allowed when handed to `run_blocking` (i.e. not called
+directly). Nested sync functions are skipped since they run off-loop.
+"""
+import ast
+from pathlib import Path
+
+ROUTES_DIR = Path(__file__).resolve().parent.parent / 'routes'
+
+# Call roots whose methods block (managers, DB-API objects, sync HTTP, processes)
+BLOCKING_ROOTS = {
+    'sql_manager', 'ad_manager', 'ad_computer_manager', 'dhcp_manager', 'dell_api',
+    'powershell_manager', 'sync_service', 'DatabaseConfig',
+    'conn', 'connection', 'cursor', 'pyodbc', 'requests', 'subprocess',
+}
+BLOCKING_NAMES = {'test_all_connections', 'require_dhcp_manager'}
+
+
+def _call_root(func):
+    while isinstance(func, ast.Attribute):
+        if isinstance(func.value, ast.Name) and func.value.id == 'time' and func.attr == 'sleep':
+            return 'time.sleep'
+        func = func.value
+    if isinstance(func, ast.Call):
+        return _call_root(func.func)
+    return func.id if isinstance(func, ast.Name) else None
+
+
+def _blocking_calls(async_fn):
+    found = []
+    stack = list(async_fn.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.Lambda)):
+            continue  # runs wherever it is scheduled, typically run_blocking
+        if isinstance(node, ast.Call):
+            root = _call_root(node.func)
+            if root in BLOCKING_ROOTS or root in BLOCKING_NAMES or root == 'time.sleep':
+                found.append(f'{async_fn.name}:{node.lineno} ({ast.unparse(node.func)})')
+        stack.extend(ast.iter_child_nodes(node))
+    return found
+
+
+def test_async_routes_do_not_block_the_event_loop():
+    offenders = []
+    for path in sorted(ROUTES_DIR.glob('*.py')):
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.AsyncFunctionDef):
+                offenders.extend(f'{path.name}:{c}' for c in _blocking_calls(node))
+    assert not offenders, 'Blocking calls on the event loop (wrap with run_blocking):\n' + '\n'.join(offenders)
@@ -0,0 +1,131 @@
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.fastapi_app.compression import (
+    CompressionMiddleware, PrecompressedCache, choose_encoding, HAS_BROTLI,
+)
+
+BIG = b'{"name":"SHQ0000001","os":"Windows 11"},' * 200
+
+cache = PrecompressedCache(ttl=60)
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@app.get('/big')
+def big():
+    return PlainTextResponse(BIG)
+
+
+@app.get('/small')
+def small():
+    return PlainTextResponse('ok')
+
+
+@app.get('/stream')
+def stream():
+    return StreamingResponse((BIG for _ in range(3)), media_type='application/x-ndjson')
+
+
+@app.get('/sse')
+def sse():
+    return StreamingResponse(iter([b'data: x\n\n']), media_type='text/event-stream')
+
+
+@app.get('/cached')
+def cached(request: Request):
+    entry = cache.get('k') or cache.put('k', BIG)
+    return entry.response(request)
+
+
+client = TestClient(app)
+
+
+def _get(path, encoding='gzip'):
+    # Raw stream so the test client does not transparently decode
+    with client.stream('GET', path, headers={'Accept-Encoding': encoding}) as r:
+        return r, b''.join(r.iter_raw())
+
+
+def test_choose_encoding():
+    assert choose_encoding('gzip, deflate') == 'gzip'
+    assert choose_encoding('identity') is None
+    assert choose_encoding('gzip;q=0') is None
+    assert choose_encoding('br, gzip') == ('br' if HAS_BROTLI else 'gzip')
+
+
+def test_large_body_is_gzipped():
+    r, raw = _get('/big')
+    assert r.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in r.headers['vary']
+    assert int(r.headers['content-length']) == len(raw) < len(BIG)
+    assert gzip.decompress(raw) == BIG
+
+
+def test_small_body_and_sse_pass_through():
+    r, raw = _get('/small')
+    assert 'content-encoding' not in r.headers and raw == b'ok'
+    r, raw = _get('/sse')
+    assert 'content-encoding' not in r.headers
+
+
+def test_streaming_body_is_compressed_incrementally():
+    r, raw = _get('/stream')
+    assert r.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in r.headers
+    assert gzip.decompress(raw) == BIG * 3
+
+
+def test_precompressed_entry_is_not_compressed_twice():
+    r, raw = _get('/cached')
+    assert r.headers['content-encoding'] == 'gzip'
+    assert gzip.decompress(raw) == BIG
+    r, raw = _get('/cached', encoding='identity')
+    assert 'content-encoding' not in r.headers and raw == BIG
+
+
+def test_body_built_before_clear_is_not_stored():
+    local = PrecompressedCache(ttl=60)
+    generation = local.generation()
+    local.clear()
+    entry = local.put('k', BIG, generation=generation)
+    assert entry.body == BIG
+    assert local.get('k') is None
+
+
+def test_concurrent_misses_build_once():
+    import threading
+    import time
+
+    local = PrecompressedCache(ttl=60)
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return BIG
+
+    threads = [threading.Thread(target=local.get_or_build, args=('k', build)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert local.get('k').body == BIG
+
+
+def test_computer_list_cache_ignores_progress_events():
+    from backend.fastapi_app.routes.computers import computers_list_cache, _invalidate_computers_list
+
+    computers_list_cache.put('probe', BIG)
+    _invalidate_computers_list({'topic': 'warranty', 'data': {'status': 'running', 'item': {}}})
+    _invalidate_computers_list({'topic': 'detect', 'data': {'kind': 'bulk_update', 'status': 'running', 'items': []}})
+    assert computers_list_cache.get('probe') is not None
+    _invalidate_computers_list({'topic': 'sync', 'data': {'mode': 'incremental', 'status': 'completed'}})
+    assert computers_list_cache.get('probe') is None
+    computers_list_cache.put('probe', BIG)
+    _invalidate_computers_list({'topic': 'inventory', 'data': {'type': 'changed'}})
+    assert computers_list_cache.get('probe') is None
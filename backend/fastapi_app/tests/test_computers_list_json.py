@@ -0,0 +1,113 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.fastapi_app import responses
+from backend.fastapi_app.managers import sql_manager
+
+COMPUTER_COLUMNS = ['id', 'name', 'distinguished_name', 'last_logon_timestamp', 'created_date', 'description',
+                    'is_enabled', 'user_account_control', 'primary_group_id', 'dns_hostname', 'model',
+                    'usuario_atual', 'usuario_anterior', 'status', 'location']
+DELL_COLUMNS = ['computer_id', 'product_line_description', 'warranty_end_date', 'warranty_status']
+
+# Same two computers as stored (legacy input) and as the new SELECT returns them
+# (COALESCE/CASE already applied in SQL, BIT as bool like pyodbc)
+STORED = [
+    {'id': 1, 'name': 'SHQ0001', 'dn': 'CN=SHQ0001,OU=Onshore', 'lastLogon': datetime(2026, 3, 10, 8, 30, 0, 123000),
+     'created': datetime(2024, 1, 2, 9, 0), 'description': 'Estação João', 'is_enabled': 1,
+     'user_account_control': 4096, 'primary_group_id': 515, 'dns_hostname': 'shq0001.corp.local',
+     'model': 'Latitude 5440', 'usuario_atual': 'João Silva', 'usuario_anterior': None, 'status': 'Em uso',
+     'location': 'SHQ', 'os': 'Windows 11 Pro', 'osVersion': '10.0 (22631)',
+     'product_line_description': 'LATITUDE 5440', 'warranty_end_date': datetime(2027, 5, 1), 'warranty_status': 'Active'},
+    {'id': 2, 'name': 'ESM0002', 'dn': None, 'lastLogon': None, 'created': None, 'description': None,
+     'is_enabled': 0, 'user_account_control': None, 'primary_group_id': None, 'dns_hostname': None,
+     'model': None, 'usuario_atual': None, 'usuario_anterior': 'Maria', 'status': None, 'location': None,
+     'os': None, 'osVersion': None, 'product_line_description': None, 'warranty_end_date': None,
+     'warranty_status': None},
+]
+SELECTED = [
+    (1, 'SHQ0001', 'CN=SHQ0001,OU=Onshore', datetime(2026, 3, 10, 8, 30, 0, 123000), 'Windows 11 Pro',
+     '10.0 (22631)', datetime(2024, 1, 2, 9, 0), 'Estação João', False, 4096, 515, 'shq0001.corp.local', '', '',
+     'Latitude 5440', 'João Silva', None, 'Em uso', 'SHQ', '', '', 'LATITUDE 5440', datetime(2027, 5, 1), 'Active'),
+    (2, 'ESM0002', None, None, 'N/A', 'N/A', None, '', True, 0, 515, '', '', '', '', None, 'Maria', None, None,
+     '', '', None, None, None),
+]
+
+
+def _legacy(r):
+    """The per-row Python mapping get_computers_from_sql used before the SQL-side formatting."""
+    fmt = lambda v: v.isoformat() if v is not None else None
+    return {
+        'id': r['id'], 'name': r['name'], 'dn': r['dn'], 'lastLogon': fmt(r['lastLogon']),
+        'os': r['os'] or 'N/A', 'osVersion': r['osVersion'] or 'N/A', 'created': fmt(r['created']),
+        'description': r['description'] or '', 'disabled': not bool(r['is_enabled']),
+        'userAccountControl': r['user_account_control'] or 0, 'primaryGroupID': r['primary_group_id'] or 515,
+        'dnsHostName': r['dns_hostname'] or '', 'ipAddress': '', 'macAddress': '', 'model': r['model'] or '',
+        'usuarioAtual': r['usuario_atual'], 'usuarioAnterior': r['usuario_anterior'],
+        'inventoryStatus': r['status'], 'location': r['location'],
+        'organizationName': '', 'organizationCode': '',
+        'product_line_description': r['product_line_description'],
+        'warranty_end_date': fmt(r['warranty_end_date']) if r['warranty_end_date'] else None,
+        'warranty_status': r['warranty_status'],
+    }
+
+
+class _Cursor:
+    description = None
+
+    def execute(self, query, params=None):
+        if 'TOP 0 * FROM computers' in query:
+            self.description = [(c,) for c in COMPUTER_COLUMNS]
+        elif 'TOP 0 * FROM dell_warranty' in query:
+            self.description = [(c,) for c in DELL_COLUMNS]
+        else:
+            aliases = re.findall(r' AS (\w+),?\n', query)
+            self.description = [(a,) for a in aliases]
+            self.rows = SELECTED
+
+    def fetchall(self):
+        return self.rows
+
+
+class _Connection:
+    def cursor(self):
+        return _Cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_sql(monkeypatch):
+    monkeypatch.setattr(sql_manager, 'get_connection', lambda: _Connection())
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_list_json_matches_legacy_mapping(fake_sql, monkeypatch, use_orjson):
+    if use_orjson and not responses.HAS_ORJSON:
+        pytest.skip('orjson not installed')
+    monkeypatch.setattr(responses, 'HAS_ORJSON', use_orjson)
+
+    body = responses.dumps(sql_manager.get_computers_from_sql())
+    # Old route: JSONResponse(content=legacy rows) -> stdlib json, ensure_ascii=False, compact
+    expected = json.dumps([_legacy(r) for r in STORED], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    assert body == expected
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dumps_scalar_types(monkeypatch, use_orjson):
+    if use_orjson and not responses.HAS_ORJSON:
+        pytest.skip('orjson not installed')
+    monkeypatch.setattr(responses, 'HAS_ORJSON', use_orjson)
+
+    data = {'price': Decimal('12.50'), 'when': datetime(2026, 3, 10, 8, 30), 'none': None, 'flag': True}
+    assert json.loads(responses.dumps(data)) == {
+        'price': 12.5, 'when': '2026-03-10T08:30:00', 'none': None, 'flag': True,
+    }
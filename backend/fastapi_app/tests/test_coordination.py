@@ -0,0 +1,82 @@
+from unittest import mock
+
+from backend.fastapi_app.managers import sql_manager
+from backend.fastapi_app.managers.coordination import JobStore, LeaseManager, LeaderElector
+
+
+def test_local_backend_is_always_leader(monkeypatch):
+    monkeypatch.setenv('COORDINATION_BACKEND', 'local')
+    elector = LeaderElector(LeaseManager())
+    assert elector.is_leader
+    assert not JobStore().enabled
+
+
+def test_lease_acquired_only_when_merge_touches_row(monkeypatch):
+    monkeypatch.setenv('COORDINATION_BACKEND', 'sql')
+    leases = LeaseManager(holder='host:1')
+    leases._ready = True
+    with mock.patch.object(sql_manager, 'execute_query', return_value=1):
+        assert leases.try_acquire('scheduler-leader', 60)
+    with mock.patch.object(sql_manager, 'execute_query', return_value=0):
+        assert not leases.try_acquire('scheduler-leader', 60)
+
+
+def test_job_store_throttles_progress_and_reports_cancel(monkeypatch):
+    monkeypatch.setenv('COORDINATION_BACKEND', 'sql')
+    store = JobStore(owner='host:1')
+    store._ready = True
+    store.flush_seconds = 60
+    with mock.patch.object(sql_manager, 'execute_query', return_value=[{'cancel_requested': 0}]) as q:
+        store.save('j1', 'detect_bulk', {'id': 'j1', 'status': 'running'})
+        store.save('j1', 'detect_bulk', {'id': 'j1', 'status': 'running', 'processed': 5})
+        assert q.call_count == 1
+        store.save('j1', 'detect_bulk', {'id': 'j1', 'status': 'completed'})
+        assert q.call_count == 2
+    with mock.patch.object(sql_manager, 'execute_query', return_value=[{'cancel_requested': 1}]):
+        assert store.save('j2', 'detect_bulk', {'id': 'j2', 'status': 'running'})
+
+
+def test_wait_for_decision_returns_after_first_attempt(monkeypatch):
+    import time
+
+    monkeypatch.setenv('COORDINATION_BACKEND', 'sql')
+    leases = mock.Mock()
+    leases.try_acquire.return_value = False
+    elector = LeaderElector(leases)
+    start = time.monotonic()
+    try:
+        assert elector.wait_for_decision(timeout=5) is False
+        assert time.monotonic() - start < 1
+    finally:
+        elector.stop()
+
+
+def test_sync_loop_runs_as_soon_as_leadership_moves_here(monkeypatch):
+    import threading
+    import time
+    from backend.fastapi_app.managers import coordination
+    from backend.fastapi_app.managers.sync_service import BackgroundSyncService
+
+    class _Elector:
+        ttl = 0.15
+        is_leader = False
+
+        def wait_for_decision(self, timeout=5.0):
+            return self.is_leader
+
+    elector = _Elector()
+    monkeypatch.setattr(coordination, 'leader_elector', elector)
+    service = BackgroundSyncService()
+    synced = threading.Event()
+    monkeypatch.setattr(service, 'sync_ad_to_sql', synced.set)
+
+    thread = threading.Thread(target=service._sync_loop, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.2)
+        assert not synced.is_set()
+        elector.is_leader = True          # o lease do líder anterior expirou
+        assert synced.wait(1)
+    finally:
+        service.stop_background_sync()
+        thread.join(1)
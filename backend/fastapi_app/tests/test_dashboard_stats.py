@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.fastapi_app.managers import coordination, sql_manager
+from backend.fastapi_app.managers.dashboard_stats import DashboardStatsService, _build_stats
+
+ROWS = [
+    {'metric': 'total', 'bucket': 'all', 'value': 10},
+    {'metric': 'enabled', 'bucket': 'enabled', 'value': 8},
+    {'metric': 'enabled', 'bucket': 'disabled', 'value': 2},
+    {'metric': 'last_login', 'bucket': 'recent', 'value': 6},
+    {'metric': 'last_login', 'bucket': 'never', 'value': 1},
+    {'metric': 'os', 'bucket': 'Windows 10', 'value': 3},
+    {'metric': 'os', 'bucket': 'Windows 11', 'value': 7},
+]
+
+
+def _service(monkeypatch, load_delay=0.0):
+    monkeypatch.setenv('COORDINATION_BACKEND', 'local')
+    service = DashboardStatsService()
+    service.debounce_seconds = 0.1
+    service.poll_seconds = 60
+    calls = {'refresh': 0, 'load': 0}
+
+    def load():
+        calls['load'] += 1
+        time.sleep(load_delay)
+        stats = _build_stats(ROWS, datetime.now())
+        with service._lock:
+            service._stats = stats
+            service._refreshed_at = datetime.now()
+        return stats
+
+    def refresh():
+        calls['refresh'] += 1
+        return load()
+
+    monkeypatch.setattr(service, '_load', load)
+    monkeypatch.setattr(service, 'refresh', refresh)
+    return service, calls
+
+
+def test_build_stats_shape():
+    stats = _build_stats(ROWS, datetime(2026, 3, 10, 8, 0))
+    assert stats['totalComputers'] == 10
+    assert stats['inactiveComputers'] == 1
+    assert stats['osDistribution'][0] == {'name': 'Windows 11', 'value': 7}
+    assert stats['lastLoginBuckets']['recent'] == 6
+    assert stats['refreshedAt'] == '2026-03-10T08:00:00'
+
+
+def test_first_get_stats_does_not_wait_for_sql(monkeypatch):
+    service, calls = _service(monkeypatch, load_delay=0.3)
+    try:
+        start = time.monotonic()
+        stats = service.get_stats()
+        assert time.monotonic() - start < 0.1
+        assert stats['refreshing'] is True
+        assert stats['totalComputers'] == 0
+
+        deadline = time.monotonic() + 2
+        while service.get_stats().get('refreshing') and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert service.get_stats()['totalComputers'] == 10
+    finally:
+        service.stop()
+
+
+def test_mark_dirty_burst_coalesces_into_one_refresh(monkeypatch):
+    service, calls = _service(monkeypatch)
+    try:
+        service.start()
+        deadline = time.monotonic() + 2
+        while calls['load'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert calls['refresh'] == 0          # snapshot fresco: o startup só leu a tabela
+
+        threads = [threading.Thread(target=service.mark_dirty, args=({'topic': 'sync'},)) for _ in range(50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        time.sleep(0.4)
+        assert calls['refresh'] == 1
+    finally:
+        service.stop()
+
+
+def test_follower_reloads_when_refreshed_at_changes(monkeypatch):
+    class _Follower:
+        is_leader = False
+
+    monkeypatch.setattr(coordination, 'leader_elector', _Follower())
+    table = {'at': datetime.now(), 'total': 10}
+    calls = {'refresh': 0, 'load': 0, 'poll': 0}
+
+    def execute_query(query, *args, **kwargs):
+        if 'MAX(refreshed_at)' in query:
+            calls['poll'] += 1
+            return [{'refreshed_at': table['at']}]
+        if query.startswith('SELECT metric'):
+            calls['load'] += 1
+            return [{'metric': 'total', 'bucket': 'all', 'value': table['total'], 'refreshed_at': table['at']}]
+        calls['refresh'] += 1
+
+    monkeypatch.setattr(sql_manager, 'execute_query', execute_query)
+    service = DashboardStatsService()
+    service.poll_seconds = 0.05
+    try:
+        service.start()
+        deadline = time.monotonic() + 2
+        while calls['poll'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert calls['load'] == 1                # refreshed_at igual: só a linha do MAX
+        assert service.get_stats()['totalComputers'] == 10
+
+        # o líder recalculou em outro worker
+        table.update(at=table['at'] + timedelta(seconds=1), total=12)
+        deadline = time.monotonic() + 2
+        while service.get_stats()['totalComputers'] != 12 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert service.get_stats()['totalComputers'] == 12
+        assert calls['refresh'] == 0             # seguidor nunca recalcula por idade
+    finally:
+        service.stop()
@@ -0,0 +1,76 @@
+import time
+
+from backend.fastapi_app.managers import dc_selector as dc_module
+from backend.fastapi_app.managers.dc_selector import DCSelector
+
+
+def test_fastest_healthy_dc_first_and_breaker_excludes_failing():
+    selector = DCSelector(['dc1', 'dc2', 'dc3'])
+    selector.breaker_failures = 2
+    selector.record_success('dc1', 0.200)
+    selector.record_success('dc2', 0.050)
+    assert selector.ordered() == ['dc2', 'dc1', 'dc3']
+
+    selector.record_failure('dc2', 'timeout')
+    assert selector.ordered()[0] == 'dc2'
+    selector.record_failure('dc2', 'timeout')
+    assert selector.ordered() == ['dc1', 'dc3']
+    assert not selector.snapshot()['dc2']['available']
+
+    selector.record_success('dc2', 0.040)
+    assert selector.ordered()[0] == 'dc2'
+
+
+class _FakeConnection:
+    delays = {}
+    unbound = []
+
+    def __init__(self, server, **kwargs):
+        delay = self.delays[server.host]
+        if delay is None:
+            raise OSError(f'{server.host} unreachable')
+        time.sleep(delay)
+        self.server = server
+
+    def unbind(self):
+        self.unbound.append(self.server.host)
+
+
+def test_bind_keeps_first_response_and_records_failures(monkeypatch):
+    monkeypatch.setattr(dc_module, 'Connection', _FakeConnection)
+    _FakeConnection.delays = {'dc1': 0.3, 'dc2': 0.01, 'dc3': None}
+    _FakeConnection.unbound = []
+    selector = DCSelector(['dc1', 'dc2', 'dc3'])
+
+    conn = selector.bind('user', 'secret')
+    assert selector.host_of(conn) == 'dc2'
+
+    time.sleep(0.4)
+    assert _FakeConnection.unbound == ['dc1']        # slower winner-candidate closed when it finished
+    assert selector.ordered()[:2] == ['dc2', 'dc1']
+
+    _FakeConnection.delays = {'dc1': None, 'dc2': None, 'dc3': 0.01}
+    conn = selector.bind('user', 'secret')
+    assert selector.host_of(conn) == 'dc3'
+    assert selector.snapshot()['dc1']['consecutive_failures'] == 1
+
+
+def test_probe_returns_on_first_answer_without_using_bind_executor(monkeypatch):
+    monkeypatch.setattr(dc_module, 'Connection', _FakeConnection)
+    _FakeConnection.delays = {'dc1': 0.5, 'dc2': 0.01, 'dc3': None}
+    _FakeConnection.unbound = []
+    selector = DCSelector(['dc1', 'dc2', 'dc3'])
+
+    start = time.monotonic()
+    answered, dcs = selector.probe('user', 'secret', timeout=2)
+    assert answered == 'dc2'
+    assert time.monotonic() - start < 0.4
+    assert selector._executor is None
+    assert dcs['dc3']['consecutive_failures'] == 1
+
+    # Sonda ainda pendente em dc1: a próxima rodada não empilha outra
+    answered, _ = selector.probe('user', 'secret', timeout=2)
+    assert answered == 'dc2'
+    time.sleep(0.6)
+    assert _FakeConnection.unbound.count('dc1') == 1
+    assert selector.snapshot()['dc1']['latency_ms'] is not None
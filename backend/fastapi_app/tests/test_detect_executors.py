@@ -0,0 +1,37 @@
+from backend.fastapi_app.managers import user_detect_service as uds
+from backend.fastapi_app.managers.detect_executors import SimulatedExecutor, set_executor
+
+PSEXEC_OUTPUT = (
+    'PsExec v2.43 - Execute processes remotely\n'
+    ' USERNAME              SESSIONNAME        ID  STATE   IDLE TIME  LOGON TIME\n'
+    '>maria.souza           console             1  Active      none   1/6/2026 8:01 AM\n'
+)
+
+
+def test_detect_user_with_simulated_executor():
+    previous = set_executor(SimulatedExecutor(latency_ms=0, recordings={
+        'SHQOFF': {'online': False},
+        'SHQIDLE': {'online': True, 'query_user': {'stderr': 'No User exists for *', 'rc': 1}},
+        'SHQPSEXEC': {'online': True,
+                      'query_user': {'stderr': 'Error 5', 'rc': 1},
+                      'psexec': {'stdout': PSEXEC_OUTPUT, 'rc': 0}},
+        'SHQSLOW': {'online': True, 'query_user': {'rc': 'TIMEOUT'}, 'psexec': {'rc': 'TIMEOUT'}},
+    }))
+    try:
+        ok = uds.detect_user('SHQABC123', persist=False)
+        assert ok['status'] == 'ok'
+        assert ok['method'] == 'query_user'
+        assert ok['usuario_atual'] == 'User Shqabc123'
+
+        assert uds.detect_user('SHQOFF', persist=False)['status'] == 'offline'
+        assert uds.detect_user('SHQIDLE', persist=False)['status'] == 'no_user'
+
+        fallback = uds.detect_user('SHQPSEXEC', persist=False)
+        assert fallback['method'] == 'psexec'
+        assert fallback['usuario_atual'] == 'Maria Souza'
+
+        slow = uds.detect_user('SHQSLOW', persist=False)
+        assert slow['status'] == 'error'
+        assert 'quser:TIMEOUT' in slow['error']
+    finally:
+        set_executor(previous)
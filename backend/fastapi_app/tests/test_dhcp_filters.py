@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+
+from backend.fastapi_app.managers.dhcp import DHCPManager
+from backend.fastapi_app.managers.dhcp_filters import DHCPFilterIndex, DHCPFilterStore
+
+_FILTERS = [
+    {'mac_address': 'AA-BB-CC-00-11-22', 'description': 'ESM-ABC1234 notebook ponte', 'filter_type': 'Allow'},
+    {'mac_address': 'AA-BB-CC-00-11-23', 'description': 'esmabc1234 dock', 'filter_type': 'Allow'},
+    {'mac_address': 'AA-BB-CC-00-11-24', 'description': 'XYZ9876 impressora', 'filter_type': 'Deny'},
+]
+
+
+def test_index_by_tag_mac_and_substring():
+    index = DHCPFilterIndex('ESMDC02', _FILTERS, datetime.now(timezone.utc), prefixes=('ESM', 'DIA'))
+    assert [f['mac_address'] for f in index.by_service_tag('abc1234')] == ['AA-BB-CC-00-11-22', 'AA-BB-CC-00-11-23']
+    assert index.by_mac('aabbcc001124')[0]['filter_type'] == 'Deny'
+    assert len(index.search('c123')) == 2
+    assert index.search('impressora', filter_type='Allow') == []
+    assert index.counts() == {'total': 3, 'allow_count': 2, 'deny_count': 1}
+
+
+class _Manager(DHCPManager):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def listar_filtros_servidor(self, servidor):
+        self.calls += 1
+        return list(_FILTERS)
+
+
+def test_store_serves_search_from_snapshot():
+    manager = _Manager()
+    store = DHCPFilterStore(manager=manager)
+    store._persist = lambda index: None
+
+    first = store.buscar_service_tag('ESMDC02', 'ABC1234')
+    second = store.buscar_service_tag('ESMDC02', 'ABC1234')
+    assert manager.calls == 1
+    assert second['status'] == 'encontrado' and second['source'] == 'snapshot'
+    assert [m['mac'] for m in second['macs']] == ['AA-BB-CC-00-11-22', 'AA-BB-CC-00-11-23']
+    assert first['macs'] == second['macs']
+
+    store.buscar_service_tag('ESMDC02', 'ABC1234', refresh=True)
+    assert manager.calls == 2
+
+
+def test_filters_route_paginates_and_honours_etag(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.fastapi_app.routes import dhcp as dhcp_routes
+
+    manager = _Manager()
+    store = DHCPFilterStore(manager=manager)
+    store._persist = lambda index: None
+    monkeypatch.setattr(dhcp_routes, 'require_dhcp_manager', lambda: manager)
+    monkeypatch.setattr(dhcp_routes, 'dhcp_filter_store', store)
+    app = FastAPI()
+    app.include_router(dhcp_routes.dhcp_router, prefix='/api/dhcp')
+    client = TestClient(app)
+
+    resp = client.get('/api/dhcp/filters/ESM?page_size=2')
+    body = resp.json()
+    assert body['dhcp_server'] == 'ESMDC02' and len(body['items']) == 2
+    assert body['pagination']['total_pages'] == 2
+    assert client.get('/api/dhcp/filters/ESM?page_size=2', headers={'If-None-Match': resp.headers['etag']}).status_code == 304
+
+    found = client.get('/api/dhcp/filters/ESM?service_tag=ABC1234&include_filters=false').json()
+    assert found['service_tag_found'] and len(found['search_results']) == 2 and 'items' not in found
+    assert manager.calls == 1
+
+
+def test_bulk_lookup_groups_tags_by_ship(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.fastapi_app.routes import dhcp as dhcp_routes
+
+    manager = _Manager()
+    store = DHCPFilterStore(manager=manager)
+    store._persist = lambda index: None
+    monkeypatch.setattr(dhcp_routes, 'require_dhcp_manager', lambda: manager)
+    monkeypatch.setattr(dhcp_routes, 'dhcp_filter_store', store)
+    app = FastAPI()
+    app.include_router(dhcp_routes.dhcp_router, prefix='/api/dhcp')
+
+    body = TestClient(app).post('/api/dhcp/search/bulk', json={'service_tags': ['ESMABC1234', 'DIAXYZ9876', 'ESMNOPE000']}).json()
+    assert sorted(r['mac_address'] for r in body['results']['ESMABC1234']) == ['AA-BB-CC-00-11-22', 'AA-BB-CC-00-11-23']
+    assert body['results']['DIAXYZ9876'][0]['server'] == 'DIADC02'
+    assert body['not_found'] == ['ESMNOPE000']
+    assert sorted(body['servers']) == ['DIADC02', 'ESMDC02']
+    assert manager.calls == 2
+
+
+def test_bulk_lookup_sends_bare_tags_to_every_ship(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.fastapi_app.routes import dhcp as dhcp_routes
+
+    class _PerServerManager(DHCPManager):
+        def listar_filtros_servidor(self, servidor):
+            # A máquina foi para a Esmeralda, mas a tag começa com o prefixo do Topázio
+            if servidor == 'ESMDC02':
+                return [{'mac_address': 'AA-BB-CC-00-22-33', 'description': 'TOP1234 notebook', 'filter_type': 'Allow'}]
+            return []
+
+    manager = _PerServerManager()
+    store = DHCPFilterStore(manager=manager)
+    store._persist = lambda index: None
+    monkeypatch.setattr(dhcp_routes, 'require_dhcp_manager', lambda: manager)
+    monkeypatch.setattr(dhcp_routes, 'dhcp_filter_store', store)
+    app = FastAPI()
+    app.include_router(dhcp_routes.dhcp_router, prefix='/api/dhcp')
+
+    body = TestClient(app).post('/api/dhcp/search/bulk', json={'service_tags': ['TOP1234']}).json()
+    assert [r['server'] for r in body['results']['TOP1234']] == ['ESMDC02']
+    assert sorted(body['servers']) == sorted(manager.all_servers)
@@ -0,0 +1,21 @@
+import time
+from unittest import mock
+
+from backend.fastapi_app.managers.dhcp import DHCPManager
+
+
+def test_parallel_search_streams_by_arrival_and_times_out_slow_servers():
+    delays = {'DIADC02': 0.2, 'ESMDC02': 0.05, 'JADDC02': 2}
+
+    def fake_search(self, servidor, service_tag):
+        time.sleep(delays[servidor])
+        return {'servidor': servidor, 'status': 'nao_encontrado', 'macs': [], 'erro': None, 'tempo': delays[servidor]}
+
+    with mock.patch.object(DHCPManager, 'buscar_service_tag_servidor', fake_search):
+        t0 = time.time()
+        results = list(DHCPManager().buscar_service_tag_paralelo(['DIADC02', 'ESMDC02', 'JADDC02', 'ESMDC02'], 'ABC1234', deadline=0.5))
+        elapsed = time.time() - t0
+
+    assert [r['servidor'] for r in results] == ['ESMDC02', 'DIADC02', 'JADDC02']
+    assert results[-1]['status'] == 'timeout'
+    assert elapsed < 1
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+from backend.fastapi_app.managers.event_bus import EventBus
+
+
+def test_events_since_replays_after_last_event_id_and_flags_gaps():
+    bus = EventBus(capacity=3)
+    for i in range(5):
+        bus.publish('warranty' if i % 2 == 0 else 'sync', {'n': i})
+
+    events, gap = bus.events_since(3)
+    assert [e['id'] for e in events] == [4, 5]
+    assert not gap
+
+    events, gap = bus.events_since(1, {'warranty'})
+    assert [e['data']['n'] for e in events] == [2, 4]
+    assert gap  # id 2 already left the buffer
+
+    # Id from before a restart: everything still buffered is replayed
+    events, _ = bus.events_since(99)
+    assert [e['id'] for e in events] == [3, 4, 5]
+
+
+def test_publish_from_thread_reaches_async_subscriber():
+    bus = EventBus()
+
+    async def _consume():
+        sub = bus.subscribe({'detect'})
+        thread = threading.Thread(target=lambda: [bus.publish('sync', {}), bus.publish('detect', {'job_id': 'x'})])
+        thread.start()
+        event = await asyncio.wait_for(sub.queue.get(), timeout=2)
+        bus.unsubscribe(sub)
+        return event
+
+    event = asyncio.run(_consume())
+    assert event['topic'] == 'detect'
+    assert event['data'] == {'job_id': 'x'}
+    assert bus.subscriber_count() == 0
@@ -0,0 +1,69 @@
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.fastapi_app.responses import HAS_OPENPYXL, iter_csv, iter_ndjson, iter_xlsx
+from backend.fastapi_app.routes import computers as routes
+
+COLUMNS = ['name', 'lastLogon', 'usuario_atual', 'warranty_days']
+CHUNKS = [
+    (COLUMNS, [('SHQ0001', datetime(2026, 3, 10, 8, 30), 'João Silva', Decimal('12.5'))]),
+    (COLUMNS, [('ESM0002', None, None, Decimal('0'))]),
+]
+
+
+def test_ndjson_one_object_per_row():
+    lines = b''.join(iter_ndjson(CHUNKS)).decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'name': 'SHQ0001', 'lastLogon': '2026-03-10T08:30:00', 'usuario_atual': 'João Silva', 'warranty_days': 12.5},
+        {'name': 'ESM0002', 'lastLogon': None, 'usuario_atual': None, 'warranty_days': 0.0},
+    ]
+
+
+def test_csv_has_bom_semicolons_and_one_header():
+    body = b''.join(iter_csv(CHUNKS)).decode('utf-8')
+    assert body.startswith('\ufeff')
+    assert body[1:].split('\r\n') == [
+        'name;lastLogon;usuario_atual;warranty_days',
+        'SHQ0001;2026-03-10T08:30:00;João Silva;12.5',
+        'ESM0002;;;0',
+        '',
+    ]
+
+
+@pytest.mark.skipif(not HAS_OPENPYXL, reason='openpyxl not installed')
+def test_xlsx_round_trip():
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(b''.join(iter_xlsx(CHUNKS, read_size=512))))
+    rows = list(wb['Inventario'].iter_rows(values_only=True))
+    assert rows == [
+        tuple(COLUMNS),
+        ('SHQ0001', datetime(2026, 3, 10, 8, 30), 'João Silva', 12.5),
+        ('ESM0002', None, None, 0),
+    ]
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(routes.computers_router, prefix='/api/computers')
+    return TestClient(app)
+
+
+def test_export_route_rejects_unknown_format():
+    r = _client().get('/api/computers/export', params={'format': 'pdf'})
+    assert r.status_code == 400
+
+
+def test_export_route_streams_csv(monkeypatch):
+    monkeypatch.setattr(routes.sql_manager, 'iter_computers', lambda **kwargs: iter(CHUNKS))
+    r = _client().get('/api/computers/export', params={'format': 'csv'})
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('text/csv')
+    assert 'inventario_' in r.headers['content-disposition']
+    assert r.content.decode('utf-8').count('\r\n') == 3
@@ -0,0 +1,41 @@
+import time
+
+from backend.fastapi_app.managers.health import HealthProber
+
+
+def _ok():
+    pass
+
+
+def _fail():
+    raise RuntimeError('down')
+
+
+def _slow():
+    time.sleep(2)
+
+
+def test_snapshot_starting_until_first_probe():
+    prober = HealthProber({'sql': _ok})
+    snap = prober.snapshot()
+    assert snap['status'] == 'starting' and not snap['ready']
+
+
+def test_non_critical_failure_is_degraded_but_ready():
+    prober = HealthProber({'sql': _ok, 'dell': _fail})
+    prober.critical = {'sql'}
+    prober.probe_once()
+    snap = prober.snapshot()
+    assert snap['ready'] and snap['status'] == 'degraded'
+    assert snap['dependencies']['dell']['error'] == 'down'
+    assert 'latency_ms' in snap['dependencies']['sql']
+
+
+def test_critical_timeout_is_down():
+    prober = HealthProber({'sql': _slow})
+    prober.critical = {'sql'}
+    prober.timeout = 0.1
+    prober.probe_once()
+    snap = prober.snapshot()
+    assert not snap['ready'] and snap['status'] == 'down'
+    assert snap['dependencies']['sql']['error'] == 'timeout'
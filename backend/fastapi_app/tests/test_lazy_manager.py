@@ -0,0 +1,32 @@
+from unittest import mock
+
+from backend.fastapi_app.managers.lazy import LazyManager
+
+
+class _Dummy:
+    built = 0
+
+    def __init__(self):
+        _Dummy.built += 1
+        self.value = 1
+
+    def ping(self):
+        return 'pong'
+
+
+def test_builds_once_on_first_use():
+    _Dummy.built = 0
+    proxy = LazyManager(_Dummy, 'dummy')
+    assert not proxy.is_initialized and _Dummy.built == 0
+    assert proxy.ping() == 'pong'
+    assert proxy.value == 1
+    assert proxy.is_initialized and _Dummy.built == 1
+
+
+def test_setattr_and_patch_forward_to_instance():
+    proxy = LazyManager(_Dummy)
+    proxy.value = 5
+    assert proxy.value == 5
+    with mock.patch.object(proxy, 'ping', return_value='patched'):
+        assert proxy.ping() == 'patched'
+    assert proxy.ping() == 'pong'
@@ -0,0 +1,52 @@
+from ldap3.core.exceptions import LDAPCommunicationError
+
+from backend.fastapi_app.managers.ldap_pool import LDAPConnectionPool
+
+
+class _FakeConn:
+    closed = False
+    bound = True
+
+    def __init__(self):
+        self.unbound = False
+
+    def unbind(self):
+        self.unbound = True
+
+
+def _pool(monkeypatch):
+    pool = LDAPConnectionPool('dc01', 'user', 'secret')
+    created = []
+
+    def _bind():
+        conn = _FakeConn()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(pool, '_bind', _bind)
+    return pool, created
+
+
+def test_connection_is_reused_between_operations(monkeypatch):
+    pool, created = _pool(monkeypatch)
+    first = pool.run(lambda conn: conn)
+    second = pool.run(lambda conn: conn)
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats()['idle'] == 1
+
+
+def test_broken_connection_is_discarded_and_operation_retried(monkeypatch):
+    pool, created = _pool(monkeypatch)
+    calls = []
+
+    def operation(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise LDAPCommunicationError('session terminated')
+        return 'ok'
+
+    assert pool.run(operation) == 'ok'
+    assert len(created) == 2
+    assert created[0].unbound
+    assert pool.stats()['idle'] == 1
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+from backend.fastapi_app.managers import sql_manager
+
+
+class _FakeCursor:
+    description = None
+    rowcount = 1
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def executemany(self, query, rows):
+        self.statements.append((query, rows))
+
+    def fetchall(self):
+        return []
+
+
+class _FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def cursor(self):
+        return _FakeCursor(self.statements)
+
+    def commit(self):
+        pass
+
+
+def _record(monkeypatch):
+    statements = []
+
+    @contextmanager
+    def connection():
+        yield _FakeConnection(statements)
+
+    monkeypatch.setattr(sql_manager, '_logon_events_ready', True)
+    monkeypatch.setattr(sql_manager, '_user_history_ready', True)
+    monkeypatch.setattr(sql_manager, '_logon_events_pruned_at', datetime.now())
+    monkeypatch.setattr(sql_manager, 'get_connection', connection)
+    return statements
+
+
+def test_ad_and_detection_events_share_the_utc_clock(monkeypatch):
+    statements = _record(monkeypatch)
+
+    # AD value in another offset is normalised to naive UTC before it reaches SQL
+    assert sql_manager.update_last_logon('ESM0001', '2026-03-10T12:00:00-03:00')
+    query, params = statements[-1]
+    assert 'computer_logon_events' in query
+    assert params == [datetime(2026, 3, 10, 15, 0), 'ESM0001', datetime(2026, 3, 10, 15, 0)]
+
+    sql_manager.update_current_users_bulk({'ESM0001': 'joao.silva'}, source='detect')
+    with mock.patch.object(sql_manager, 'execute_query', return_value=[]) as q:
+        sql_manager.get_last_logon_event('ESM0001')
+        sql_manager.get_computer_users('ESM0001')
+        sql_manager.prune_logon_events()
+    queries = [query for query, _ in statements] + [call.args[0] for call in q.call_args_list]
+
+    logon_statements = [query for query in queries if 'computer_logon_events' in query]
+    assert len(logon_statements) == 5
+    for query in logon_statements:
+        assert 'GETDATE()' not in query
+    assert all('SYSUTCDATETIME()' in query for query in logon_statements[1:])
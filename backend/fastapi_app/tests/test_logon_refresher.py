@@ -0,0 +1,31 @@
+import threading
+
+from backend.fastapi_app.managers.logon_refresher import LastLogonRefresher
+
+
+def test_refresh_is_coalesced_and_skipped_while_fresh():
+    release = threading.Event()
+    lookups, stored = [], []
+
+    def find(name):
+        lookups.append(name)
+        release.wait(2)
+        return {'lastLogon': '2026-01-05T10:00:00+00:00'}
+
+    refresher = LastLogonRefresher(find=find, store=lambda name, value: stored.append((name, value)))
+    refresher.threads = 1
+    first = refresher.schedule('PC-001')
+    second = refresher.schedule('pc-001')
+    assert first['refreshing'] and second['refreshing'] and not second['fresh']
+
+    release.set()
+    for _ in range(200):
+        if not refresher.status('PC-001')['refreshing']:
+            break
+        threading.Event().wait(0.01)
+
+    third = refresher.schedule('PC-001')
+    assert third['fresh'] and not third['refreshing']
+    assert third['ad_last_logon'] == '2026-01-05T10:00:00+00:00'
+    assert lookups == ['PC-001']
+    assert stored == [('PC-001', '2026-01-05T10:00:00+00:00')]
@@ -0,0 +1,91 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.fastapi_app import metrics
+from backend.fastapi_app.concurrency import run_blocking
+from backend.fastapi_app.metrics import MetricsMiddleware, registry, timed
+
+
+@timed('sql')
+def _query():
+    _nested()
+    time.sleep(0.01)
+
+
+@timed('sql')
+def _nested():
+    time.sleep(0.01)
+
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get('/sync/{name}')
+def sync_route(name: str):
+    _query()
+    return {'name': name}
+
+
+@app.get('/async')
+async def async_route():
+    await run_blocking(_query)
+    return {}
+
+
+client = TestClient(app)
+
+
+def _route_sql(route):
+    return registry.route_dependency.get((route, 'sql'), [0.0, 0])
+
+
+def test_route_template_and_sub_timers():
+    client.get('/sync/a')
+    client.get('/sync/b')
+    assert registry.requests[('GET', '/sync/{name}', '200')] >= 2
+    spent, requests = _route_sql('/sync/{name}')
+    assert requests >= 2 and spent >= 0.04
+    assert '/sync/{name}' in registry.render()
+
+
+def test_run_blocking_carries_request_timers():
+    client.get('/async')
+    spent, requests = _route_sql('/async')
+    assert requests == 1
+    # nested timed() calls are not counted twice
+    assert 0.02 <= spent < 0.04
+
+
+class _SlowDict(dict):
+    """Request timers dict that yields between the read and the write of an update."""
+    def get(self, *args):
+        value = super().get(*args)
+        time.sleep(0.0001)
+        return value
+
+
+@timed('fanout')
+def _fanout_call():
+    pass
+
+
+def test_concurrent_sub_timers_in_one_request_are_not_lost():
+    timers = _SlowDict()
+    ctx = contextvars.copy_context()
+    ctx.run(metrics._request_timers.set, timers)
+    before = registry.dependency.get('fanout', metrics._Histogram()).sum
+
+    def work():
+        for _ in range(100):
+            _fanout_call()
+
+    # Same request context copied into several threads, like run_blocking/detect pools
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for f in [pool.submit(ctx.copy().run, work) for _ in range(8)]:
+            f.result()
+    assert abs(timers['fanout'] - (registry.dependency['fanout'].sum - before)) < 1e-9
@@ -0,0 +1,25 @@
+from backend.fastapi_app.managers.powershell_manager import powershell_manager
+
+
+def test_parse_bulk_script_output_maps_every_requested_name():
+    output = '\n'.join([
+        'RESULT:{"name":"SHQABC123","status":"ok","user":"SNM\\\\joao.silva"}',
+        'RESULT:{"name":"shqdef456","status":"ok","user":""}',
+        'RESULT:{"name":"SHQDC01","status":"skipped"}',
+        'RESULT:{"name":"SHQGHI789","status":"offline","error":"WinRM cannot complete the operation"}',
+        'ruido qualquer',
+        'RESULT:{json quebrado',
+    ])
+    names = ['SHQABC123', 'SHQDEF456', 'SHQDC01', 'SHQGHI789', 'SHQMISSING']
+
+    results = powershell_manager._parse_bulk_script_output(output, names)
+
+    assert [r['computer_name'] for r in results] == names
+    by_name = {r['computer_name']: r for r in results}
+    assert by_name['SHQABC123']['status'] == 'ok'
+    assert by_name['SHQABC123']['raw_user'] == 'SNM\\joao.silva'
+    assert by_name['SHQABC123']['usuario_atual'] == 'Joao Silva'
+    assert by_name['SHQDEF456']['status'] == 'no_user'
+    assert by_name['SHQDC01']['status'] == 'skipped'
+    assert by_name['SHQGHI789']['status'] == 'unreachable'
+    assert by_name['SHQMISSING']['status'] == 'error'
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.fastapi_app import connections
+from backend.fastapi_app.managers import ad_computer_manager, sql_manager
+from backend.fastapi_app.managers import user_detect_service as uds
+from backend.fastapi_app.routes import computers as computer_routes
+
+NAMES = ['SHQ0001', 'SHQ0002', 'SHQ0003']
+
+
+def _find_computers(names):
+    # SHQ0002 desativada, SHQ0003 fora do AD
+    return {'SHQ0001': {'name': 'SHQ0001', 'disabled': False},
+            'SHQ0002': {'name': 'SHQ0002', 'disabled': True}}
+
+
+def test_ad_prefilter_is_off_by_default(monkeypatch):
+    monkeypatch.delenv('USER_DETECT_AD_PREFILTER', raising=False)
+    calls = []
+    monkeypatch.setattr(ad_computer_manager, 'find_computers', lambda names: calls.append(names))
+    assert uds._skip_disabled_in_ad(NAMES) == NAMES
+    assert calls == []
+
+
+def test_ad_prefilter_drops_disabled_and_missing_when_enabled(monkeypatch):
+    monkeypatch.setenv('USER_DETECT_AD_PREFILTER', '1')
+    monkeypatch.setattr(ad_computer_manager, 'find_computers', _find_computers)
+    assert uds._skip_disabled_in_ad(NAMES) == ['SHQ0001']
+
+
+def test_ad_prefilter_keeps_sql_list_when_ad_fails(monkeypatch):
+    monkeypatch.setenv('USER_DETECT_AD_PREFILTER', '1')
+
+    def _down(names):
+        raise OSError('DC unreachable')
+
+    monkeypatch.setattr(ad_computer_manager, 'find_computers', _down)
+    assert uds._skip_disabled_in_ad(NAMES) == NAMES
+
+
+# ─── bulk-update-current-users job ─────────────────────────────────────────────
+
+class _FakeDHCP:
+    all_servers = ['CLODC02']
+
+    def testar_conexao_servidor(self, server):
+        return object()
+
+
+@pytest.fixture
+def bulk_job(monkeypatch):
+    """Job com WinRM/SQL falsos; cada lote espera `gate` antes de responder."""
+    monkeypatch.setenv('COORDINATION_BACKEND', 'local')
+    monkeypatch.setattr(uds, '_bulk_jobs', {})
+    monkeypatch.setattr(uds, '_bulk_cancel_events', {})
+    monkeypatch.setattr(connections, 'require_dhcp_manager', lambda: _FakeDHCP())
+    monkeypatch.setattr(sql_manager, 'execute_query', lambda query, *a, **k: [{'name': n} for n in NAMES])
+    gate = threading.Event()
+    batches = []
+
+    def detect(names, client, batch_size=200, throttle_limit=None):
+        batches.append(list(names))
+        gate.wait(5)
+        return [{'computer_name': n, 'status': 'ok', 'usuario_atual': f'user {n}'} for n in names]
+
+    def apply(results):
+        for r in results:
+            r['db_status'] = 'updated'
+            r['previous_user'] = None
+        return results
+
+    monkeypatch.setattr(uds, 'detect_users_batched', detect)
+    monkeypatch.setattr(uds, 'apply_detected_users', apply)
+    app = FastAPI()
+    app.include_router(computer_routes.computers_router, prefix='/api/computers')
+    yield TestClient(app), gate, batches
+    gate.set()
+
+
+def _wait_for(job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = uds.get_bulk_update_job(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job ficou em {job["status"]}')
+
+
+def test_bulk_job_returns_202_and_refuses_a_second_sweep(bulk_job):
+    client, gate, _ = bulk_job
+    start = time.monotonic()
+    r = client.post('/api/computers/bulk-update-current-users', params={'batch_size': 1, 'max_workers': 1})
+    assert r.status_code == 202
+    assert time.monotonic() - start < 1          # não espera os lotes
+    first = r.json()
+    assert first['status'] == 'started'
+
+    again = client.post('/api/computers/bulk-update-current-users').json()
+    assert again['status'] == 'already_running'
+    assert again['job_id'] == first['job_id']
+
+    gate.set()
+    job = _wait_for(first['job_id'], {'completed'})
+    assert (job['total'], job['processed'], job['updated'], job['total_batches']) == (3, 3, 3, 3)
+
+
+def test_cancel_stops_pending_batches(bulk_job):
+    client, gate, batches = bulk_job
+    job_id = client.post('/api/computers/bulk-update-current-users',
+                         params={'batch_size': 1, 'max_workers': 1}).json()['job_id']
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    cancelling = client.post(f'/api/computers/bulk-update-current-users/{job_id}/cancel').json()
+    assert cancelling['status'] == 'cancelling'
+    gate.set()
+    job = _wait_for(job_id, {'cancelled'})
+    assert batches == [['SHQ0001']]               # o lote em andamento termina, os outros não começam
+    assert job['processed'] == 1
+
+
+def test_progress_snapshot_and_stream(bulk_job):
+    client, gate, _ = bulk_job
+    job_id = client.post('/api/computers/bulk-update-current-users',
+                         params={'batch_size': 2, 'max_workers': 2}).json()['job_id']
+    snapshot = client.get(f'/api/computers/bulk-update-current-users/{job_id}').json()
+    assert snapshot['id'] == job_id
+    assert snapshot['status'] in ('pending', 'running')
+
+    gate.set()
+    with client.stream('GET', f'/api/computers/bulk-update-current-users/{job_id}/stream') as r:
+        lines = [json.loads(line) for line in r.iter_lines() if line]
+    assert lines[-1]['status'] == 'completed'
+    assert lines[-1]['progress_percent'] == 100
+    assert {item['computer'] for item in lines[-1]['recent_results']} == set(NAMES)
+    assert len({line['version'] for line in lines}) == len(lines)
+
+    assert client.get('/api/computers/bulk-update-current-users/nao-existe').status_code == 404
+
+
+def test_start_prunes_old_finished_jobs(bulk_job):
+    client, gate, _ = bulk_job
+    now = time.time()
+    old_end = now - uds.BULK_UPDATE_JOB_RETENTION_SECONDS - 1
+    uds._bulk_jobs.update({
+        'old': {'id': 'old', 'status': 'completed', 'created_at': old_end - 60, 'ended_at': old_end},
+        'old-cancelled': {'id': 'old-cancelled', 'status': 'cancelled', 'created_at': old_end - 60, 'ended_at': old_end},
+        'recent': {'id': 'recent', 'status': 'failed', 'created_at': now - 60, 'ended_at': now - 30},
+    })
+    uds._bulk_cancel_events['old-cancelled'] = threading.Event()
+
+    gate.set()
+    job_id = client.post('/api/computers/bulk-update-current-users').json()['job_id']
+    _wait_for(job_id, {'completed'})
+    assert set(uds._bulk_jobs) == {'recent', job_id}
+    deadline = time.monotonic() + 2               # o Event sai no finally, logo depois do status final
+    while uds._bulk_cancel_events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert uds._bulk_cancel_events == {}
+
+
+# ─── UserDetectScheduler ───────────────────────────────────────────────────────
+
+def test_scheduler_sweeps_within_one_check_after_taking_leadership(monkeypatch):
+    class _Elector:
+        ttl = 0.15
+        is_leader = False
+
+    elector = _Elector()
+    monkeypatch.setattr(uds, 'leader_elector', elector)
+    swept = threading.Event()
+    monkeypatch.setattr(uds, 'run_bulk_detect_onshore', swept.set)
+
+    scheduler = uds.UserDetectScheduler()
+    scheduler.STARTUP_DELAY_SECONDS = 0
+    monkeypatch.setattr(scheduler, '_is_business_hours', lambda: True)
+    scheduler.start()
+    try:
+        time.sleep(0.2)
+        assert not swept.is_set()
+        elector.is_leader = True          # o líder anterior caiu e este worker pegou o lease
+        assert swept.wait(elector.ttl / 3 + 0.2)
+        swept.clear()
+        time.sleep(0.2)
+        assert not swept.is_set()         # próxima só depois de INTERVAL_SECONDS
+    finally:
+        scheduler.stop()
+        scheduler._thread.join(1)
+    assert not scheduler._thread.is_alive()
@@ -0,0 +1,104 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+from backend.fastapi_app.managers import sql_manager
+
+
+class _FakeCursor:
+    rowcount = 1
+
+    def __init__(self, statements):
+        self.statements = statements
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+        if 'OUTPUT inserted.name' in query:
+            self._rows = [('SHQ0001', 'Maria Souza', 'Joao Silva')]
+        elif 'WHERE c.id IS NULL' in query:
+            self._rows = [('SHQ9999',)]
+        else:
+            self._rows = []
+
+    def executemany(self, query, rows):
+        self.statements.append((' '.join(query.split()), list(rows)))
+
+    def fetchall(self):
+        return self._rows
+
+
+class _FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+        self.commits = 0
+
+    def cursor(self):
+        return _FakeCursor(self.statements)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _fake_sql(monkeypatch):
+    statements = []
+    conn = _FakeConnection(statements)
+
+    @contextmanager
+    def connection():
+        yield conn
+
+    monkeypatch.setattr(sql_manager, '_user_history_ready', True)
+    monkeypatch.setattr(sql_manager, '_logon_events_ready', True)
+    monkeypatch.setattr(sql_manager, '_logon_events_pruned_at', datetime.now())
+    monkeypatch.setattr(sql_manager, 'get_connection', connection)
+    return statements, conn
+
+
+def test_bulk_user_update_is_one_set_based_transaction(monkeypatch):
+    statements, conn = _fake_sql(monkeypatch)
+
+    result = sql_manager.update_current_users_bulk({'SHQ0001': 'Joao Silva', 'SHQ9999': 'Ana Lima'}, source='detect')
+
+    assert result == {'changed': [{'name': 'SHQ0001', 'previous': 'Maria Souza', 'current': 'Joao Silva'}],
+                      'not_found': ['SHQ9999']}
+    assert conn.commits == 1
+    staged = next(params for query, params in statements if query.startswith('INSERT INTO #user_changes'))
+    assert staged == [('SHQ0001', 'Joao Silva', 'detect'), ('SHQ9999', 'Ana Lima', 'detect')]
+
+    update = next(query for query, _ in statements if query.startswith('UPDATE c'))
+    assert 'SET c.Usuario_Anterior = c.Usuario_Atual, c.Usuario_Atual = d.usuario' in update
+    assert 'INTO dbo.computer_user_history (computer_id, computer_name, previous_user, new_user, source, changed_at)' in update
+    assert 'WHERE c.Usuario_Atual IS NULL OR c.Usuario_Atual <> d.usuario' in update
+    assert statements[-1][0] == 'DROP TABLE #user_changes'
+
+
+def test_set_current_user_records_history_with_source(monkeypatch):
+    _fake_sql(monkeypatch)
+    monkeypatch.setattr(sql_manager, '_mark_dashboard_dirty', lambda: None)
+    with mock.patch.object(sql_manager, 'execute_query', return_value=1) as q:
+        assert sql_manager.set_current_user('SHQ0001', 'Joao Silva', status='Em uso', source='manual') == 1
+    query, = q.call_args.args
+    assert 'INTO dbo.computer_user_history' in query
+    assert 'c.Usuario_Anterior = COALESCE(c.Usuario_Atual, c.Usuario_Anterior)' in query
+    assert q.call_args.kwargs['params'] == ('Joao Silva', 'Em uso', 'manual', 'SHQ0001')
+
+
+def test_history_table_ddl_runs_once_under_concurrency(monkeypatch):
+    monkeypatch.setattr(sql_manager, '_user_history_ready', False)
+    calls = []
+
+    def slow_ddl(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.05)
+
+    monkeypatch.setattr(sql_manager, 'execute_query', slow_ddl)
+    threads = [threading.Thread(target=sql_manager._ensure_user_history_table) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sql_manager._user_history_ready
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização de listas grandes (ex.: /api/computers com 10k linhas).
+
+Compara o caminho antigo (dict por linha + _format_dt em cada valor +
+JSONResponse/json.dumps) com o novo (tuplas do cursor -> dict(zip) ->
+FastJSONResponse). Não precisa de SQL: gera linhas sintéticas no formato do
+inventário.
+
+Exemplo:
+    python backend/scripts/bench_json_rows.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+repo_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_dir))
+
+from fastapi.responses import JSONResponse
+
+from backend.fastapi_app.responses import FastJSONResponse, HAS_ORJSON, rows_as_dicts
+
+COLUMNS = [
+    'id', 'name', 'dn', 'lastLogon', 'os', 'osVersion', 'created', 'description', 'disabled',
+    'userAccountControl', 'primaryGroupID', 'dnsHostName', 'ipAddress', 'macAddress', 'model',
+    'usuarioAtual', 'usuarioAnterior', 'inventoryStatus', 'location', 'organizationName',
+    'organizationCode', 'product_line_description', 'warranty_end_date', 'warranty_status', 'cost',
+]
+
+
+def make_rows(n):
+    base = datetime(2026, 1, 5, 8, 30, 15, 123000)
+    return [(
+        i, f'SHQ{i:07d}', f'CN=SHQ{i:07d},OU=Computers,DC=snm,DC=local', base - timedelta(hours=i),
+        'Windows 11 Enterprise', '10.0 (22631)', base - timedelta(days=i % 900), 'Notebook colaborador',
+        False, 4096, 515, f'shq{i:07d}.snm.local', '', '', 'Latitude 5440', 'Joao Silva', '',
+        'Em uso', '', '', '', 'Latitude', base + timedelta(days=365), 'Active', Decimal('1234.50'),
+    ) for i in range(n)]
+
+
+def legacy(rows):
+    """Caminho anterior: dict por linha com formatação de cada datetime em Python."""
+    def _format_dt(v):
+        return v.isoformat() if isinstance(v, datetime) else v
+
+    items = []
+    for row in rows:
+        r = dict(zip(COLUMNS, row))
+        items.append({k: (float(v) if isinstance(v, Decimal) else _format_dt(v)) for k, v in r.items()})
+    return JSONResponse(content=items).body
+
+
+def fast(rows):
+    return FastJSONResponse(content=rows_as_dicts(COLUMNS, rows)).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSONResponse x FastJSONResponse')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f'{args.rows} linhas, {args.repeat} repetições, orjson={"sim" if HAS_ORJSON else "não (fallback stdlib)"}')
+    timings = {}
+    for label, fn in (('legacy', legacy), ('fast', fast)):
+        fn(rows)  # aquecimento
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            body = fn(rows)
+        timings[label] = (time.perf_counter() - t0) / args.repeat
+        print(f'  {label:<7} {timings[label] * 1000:8.1f} ms/resposta  {len(body) / 1024:8.0f} KiB')
+    print(f'  ganho   {timings["legacy"] / timings["fast"]:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
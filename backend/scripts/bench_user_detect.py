@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark local da detecção de usuário logado com o executor simulado.
+
+Mede a vazão da varredura (ping → query user → PsExec) em diferentes níveis de
+concorrência e a vazão dos parsers de quser/PsExec, sem rede nem SQL.
+
+Exemplo:
+    python backend/scripts/bench_user_detect.py --hosts 500 --workers 1 8 32 --latency-ms 40 --offline-rate 0.2
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+repo_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_dir))
+
+from backend.fastapi_app.managers import user_detect_service as uds
+from backend.fastapi_app.managers.detect_executors import SimulatedExecutor, set_executor
+
+PSEXEC_OUTPUT = (
+    'PsExec v2.43 - Execute processes remotely\n'
+    'Copyright (C) 2001-2023 Mark Russinovich\n'
+    'Sysinternals - www.sysinternals.com\n\n'
+    ' USERNAME              SESSIONNAME        ID  STATE   IDLE TIME  LOGON TIME\n'
+    '>joao.silva            console             1  Active      none   1/6/2026 8:01 AM\n'
+    'query exited on SHQBENCH with error code 0.\n'
+)
+
+
+def bench_sweep(hosts, workers, args):
+    executor = SimulatedExecutor(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        offline_rate=args.offline_rate, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, seed=args.seed,
+    )
+    set_executor(executor)
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda h: uds.detect_user(h, persist=False), hosts))
+    elapsed = time.time() - t0
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    print(f'  workers={workers:<4} {elapsed:7.2f}s  {len(hosts) / elapsed:8.1f} hosts/s  '
+          f'comandos={executor.calls}  {counts}')
+
+
+def bench_parsers(iterations):
+    set_executor(SimulatedExecutor(latency_ms=0, recordings={
+        'SHQBENCH': {'online': True, 'psexec': {'stdout': PSEXEC_OUTPUT, 'rc': 0}},
+    }))
+    for label, fn in (('query user', uds._try_query_user), ('psexec', uds._try_psexec)):
+        t0 = time.time()
+        for _ in range(iterations):
+            fn('SHQBENCH' if label == 'psexec' else 'SHQOTHER')
+        elapsed = time.time() - t0
+        print(f'  {label:<11} {iterations / elapsed:10.0f} parses/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da detecção de usuários (executor simulado)')
+    parser.add_argument('--hosts', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--offline-rate', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--parse-iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    hosts = [f'SHQBENCH{i:05d}' for i in range(args.hosts)]
+    print(f'Varredura: {args.hosts} hosts, latência {args.latency_ms}ms (+{args.jitter_ms}ms jitter)')
+    for workers in args.workers:
+        bench_sweep(hosts, workers, args)
+
+    print('Parsers:')
+    bench_parsers(args.parse_iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useMemo, useCallback, useRef, useDeferredValue, startTransition, memo } from 'react'
 import { Link, useLocation } from 'react-router-dom'
 import { Search, RefreshCw, Eye, Calendar, Monitor, Server, Filter, ChevronDown, CheckCircle, XCircle, Database, Clock, ArrowLeft, Power, Loader2, AlertCircle, Building2, Shield, ShieldAlert, ShieldCheck, ShieldOff, ChevronUp, ArrowUpDown, RotateCcw } from 'lucide-react'
-import api, { apiMethods } from '../services/api'
+import api, { apiMethods, openJobEvents } from '../services/api'
 import logo_seagems from '../assets/LogoSeagems.png'
 
 // Componente de linha otimizado com React.memo
@@ -432,10 +432,8 @@ const Computers = () => {
         console.log('🔄 Estado inicial do job:', initialJob)
         console.log('💾 Job salvo no localStorage para persistência')
         
-        // Iniciar polling do status imediatamente
-        setTimeout(() => {
-          pollWarrantyRefreshStatus(jobId)
-        }, 1000)
+        // Acompanhar progresso via SSE (polling só como fallback)
+        watchWarrantyRefreshJob(jobId)
       } else {
         console.error('❌ Resposta inválida do servidor:', response.data)
         setToast({ 
@@ -573,6 +571,57 @@ const Computers = () => {
     }
   }, [warrantyRefreshPolling, fetchWarrantyData])
 
+  // Acompanhar o job por Server-Sent Events: cada item processado chega como evento,
+  // sem reconstruir o status inteiro. Se o stream cair de vez, volta para o polling.
+  const warrantyEventSource = useRef(null)
+  const watchWarrantyRefreshJob = useCallback((jobId) => {
+    if (warrantyEventSource.current) {
+      warrantyEventSource.current.close()
+      warrantyEventSource.current = null
+    }
+
+    const source = openJobEvents({ topics: 'warranty', jobId }, async (name, data) => {
+      if (name === 'reset') {
+        // Eventos perdidos: recarregar o status completo uma vez
+        try {
+          const response = await api.get(`/computers/warranty-refresh/${jobId}`)
+          setWarrantyRefreshJob(response.data)
+        } catch (error) {
+          console.error('❌ Erro ao recarregar status do job:', error)
+        }
+        return
+      }
+
+      setWarrantyRefreshJob((prev) => {
+        const items = prev && prev.current_batch === data.current_batch ? (prev.current_batch_items || []) : []
+        return { ...prev, ...data, current_batch_items: data.item ? [...items, data.item] : items }
+      })
+
+      if (data.status === 'completed' || data.status === 'failed') {
+        source.close()
+        warrantyEventSource.current = null
+        // Status final (toasts, limpeza do localStorage e recarga) pelo fluxo existente
+        pollWarrantyRefreshStatus(jobId)
+      }
+    }, (error, es) => {
+      if (es.readyState === EventSource.CLOSED) {
+        console.warn('⚠️ Stream de eventos encerrado, voltando para polling')
+        warrantyEventSource.current = null
+        pollWarrantyRefreshStatus(jobId)
+      }
+    })
+
+    if (!source) {
+      setTimeout(() => pollWarrantyRefreshStatus(jobId), 1000)
+      return
+    }
+    warrantyEventSource.current = source
+  }, [pollWarrantyRefreshStatus])
+
+  useEffect(() => () => {
+    if (warrantyEventSource.current) warrantyEventSource.current.close()
+  }, [])
+
   // Aplicar filtros vindos da navegação do Dashboard
   useEffect(() => {
     if (navigationState && !navigationFiltersApplied.current) {
@@ -1424,11 +1473,9 @@ const Computers = () => {
     })
     setTimeout(() => setToast(null), 5000)
     
-    // Iniciar polling imediatamente
-    setTimeout(() => {
-      pollWarrantyRefreshStatus(jobData.job_id)
-    }, 1000)
-  }, [pollWarrantyRefreshStatus])
+    // Retomar acompanhamento via SSE
+    watchWarrantyRefreshJob(jobData.job_id)
+  }, [watchWarrantyRefreshJob])
 
   // Função para testar conectividade com o backend
   const testBackendConnectivity = useCallback(async () => {
@@ -16,6 +16,10 @@ const Dashboard = () => {
       const response = await api.get('/dashboard/stats')
       setStats(response.data)
       setError(null)
+      // Backend ainda calculando o primeiro snapshot: busca de novo em instantes
+      if (response.data?.refreshing) {
+        setTimeout(fetchStats, 3000)
+      }
     } catch (err) {
       setError('Erro ao carregar estatísticas')
       console.error(err)
@@ -101,4 +101,20 @@ export const apiMethods = {
   }
 }
 
+// Progresso de jobs via Server-Sent Events (topics: warranty, sync, detect).
+// O EventSource reconecta sozinho mandando Last-Event-ID. Retorna null se o navegador não suportar.
+export const openJobEvents = ({ topics, jobId }, onEvent, onError) => {
+  if (typeof EventSource === 'undefined') return null
+  const params = new URLSearchParams()
+  if (topics) params.set('topics', topics)
+  if (jobId) params.set('job_id', jobId)
+  const source = new EventSource(`${API_BASE}/events/stream?${params.toString()}`)
+  const names = [...(topics ? topics.split(',') : ['warranty', 'sync', 'detect']), 'reset']
+  names.forEach((name) => {
+    source.addEventListener(name, (e) => onEvent(name, JSON.parse(e.data)))
+  })
+  source.onerror = (e) => onError && onError(e, source)
+  return source
+}
+
 export default api
\ No newline at end of file